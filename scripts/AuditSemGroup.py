@@ -1,9 +1,19 @@
 import streamlit as st
 import pandas as pd
-from collections import defaultdict
+import numpy as np
+from itertools import combinations
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
 from urllib.parse import urlparse
 import io
 
+GROUPING_EXACT = "Top N identique"
+GROUPING_OVERLAP = "URLs communes (seuil de recouvrement)"
+
+REPRESENTATIVE_FREQUENCY = "URL la plus fréquente du groupe"
+REPRESENTATIVE_POSITION = "URL la mieux positionnée en moyenne"
+REPRESENTATIVE_MAIN = "URL du mot-clé de référence"
+
 def load_data(file):
     data = pd.read_excel(file, sheet_name=0)
     data.columns = data.columns.str.strip()
@@ -28,56 +38,198 @@ def detect_url_position_columns(data):
     
     return matched_cols
 
+def top_competitors_long(data, position_cols, url_cols, num_top_competitors):
+    """Passe les colonnes concurrents en format long et garde les N meilleures positions de chaque ligne.
+
+    Retourne un DataFrame (ligne, rang, concurrent, position, url) trié par ligne puis rang, et les URLs normalisées.
+    """
+    positions = data[position_cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    urls = data[url_cols].to_numpy(dtype=object)
+    rows, competitors = np.nonzero(~np.isnan(positions) & ~pd.isna(urls))
+
+    # Normaliser chaque URL distincte une seule fois
+    url_codes, unique_urls = pd.factorize(pd.Series(urls[rows, competitors], dtype=object))
+    normalized_codes, normalized_urls = pd.factorize(pd.Series([normalize_url(url) or '' for url in unique_urls], dtype=object))
+
+    # Classement par position dans chaque ligne (à égalité, l'ordre des colonnes est conservé)
+    row_positions = positions[rows, competitors]
+    order = np.lexsort((competitors, row_positions, rows))
+    rows, competitors, row_positions = rows[order], competitors[order], row_positions[order]
+    ranks = np.arange(len(rows)) - np.searchsorted(rows, rows, side='left')
+    keep = ranks < num_top_competitors
+
+    long_data = pd.DataFrame({
+        'row': rows[keep],
+        'rank': ranks[keep],
+        'competitor': competitors[keep],
+        'position': row_positions[keep],
+        'url': normalized_codes[url_codes[order]][keep],
+    })
+    return long_data, np.asarray(normalized_urls, dtype=object)
+
+def keyword_volumes(data, rows):
+    # Volume si la colonne existe, sinon 0
+    if "Volume" in data.columns:
+        return pd.to_numeric(data["Volume"], errors='coerce').fillna(0).astype(float).to_numpy()[rows]
+    return np.zeros(len(rows), dtype=np.int64)
+
 def group_keywords(data, position_cols, url_cols, num_top_competitors):
-    grouped_keywords = defaultdict(list)
-    
-    for index, row in data.iterrows():
-        competitors = []
-        for pos_col, url_col in zip(position_cols, url_cols):
-            if not pd.isna(row[pos_col]) and not pd.isna(row[url_col]):
-                competitor_name = pos_col.replace("Position", "").strip()
-                competitors.append((competitor_name, float(row[pos_col]), normalize_url(row[url_col])))
-        
-        if competitors:
-            sorted_competitors = sorted(competitors, key=lambda x: x[1])[:num_top_competitors]
-            group_key = tuple((comp[0], comp[2]) for comp in sorted_competitors)
-            
-            # Récupération du volume si la colonne existe, sinon 0
-            volume_value = float(row["Volume"]) if "Volume" in data.columns and not pd.isna(row["Volume"]) else 0
-            
-            grouped_keywords[group_key].append({
-                'mot_cle': row['Mot-clé'],
-                'volume': volume_value,
-                'positions': {comp[0]: comp[1] for comp in sorted_competitors}
-            })
-    
+    competitor_names = [pos_col.replace("Position", "").strip() for pos_col in position_cols]
+    long_data, normalized_urls = top_competitors_long(data, position_cols, url_cols, num_top_competitors)
+    if long_data.empty:
+        return []
+
+    # Clé de groupe : suite des couples (concurrent, URL) du top N, codés en entiers puis regroupés par hachage
+    pair_codes = long_data['competitor'].to_numpy(dtype=np.int64) * len(normalized_urls) + long_data['url'].to_numpy(dtype=np.int64)
+    kept_rows, row_slots = np.unique(long_data['row'].to_numpy(), return_inverse=True)
+    keys = np.full((len(kept_rows), num_top_competitors), -1, dtype=np.int64)
+    positions = np.full((len(kept_rows), num_top_competitors), np.nan)
+    keys[row_slots, long_data['rank']] = pair_codes
+    positions[row_slots, long_data['rank']] = long_data['position']
+    group_ids = pd.DataFrame(keys).groupby(list(range(num_top_competitors)), sort=False).ngroup()
+
+    volumes = keyword_volumes(data, kept_rows)
+    keywords = data['Mot-clé'].to_numpy(dtype=object)[kept_rows]
+
+    # Lignes rangées par groupe (ordre d'origine conservé dans chaque groupe), puis découpées en tranches
+    order = np.argsort(group_ids.to_numpy(), kind='stable')
+    bounds = np.flatnonzero(np.diff(group_ids.to_numpy()[order])) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(order)]))
+    keywords, volumes, positions = keywords[order], volumes[order], positions[order]
+    total_volumes = np.add.reduceat(volumes, starts)
+
     final_groups = []
-    for competitors_urls, keywords in grouped_keywords.items():
-        # Choisir le mot-clé principal basé sur le volume le plus élevé
-        main_entry = max(keywords, key=lambda x: x.get('volume', 0))
-        primary_keyword = main_entry['mot_cle']
-        primary_volume = main_entry['volume']
-        total_volume = sum(kw.get('volume', 0) for kw in keywords)
-        
-        all_keywords = [kw['mot_cle'] for kw in keywords]
-        competitors = [comp for comp, _ in competitors_urls]
-        urls = [url for _, url in competitors_urls]
-        positions = {comp: [kw['positions'].get(comp, '-') for kw in keywords] for comp in competitors}
+    for start, end, total_volume in zip(starts, ends, total_volumes):
+        # Le mot-clé principal est celui qui a le volume le plus élevé
+        main_row = start + int(np.argmax(volumes[start:end]))
+        top_pairs = [code for code in keys[order[start]].tolist() if code >= 0]
+        competitors = [competitor_names[code // len(normalized_urls)] for code in top_pairs]
+        urls = [normalized_urls[code % len(normalized_urls)] for code in top_pairs]
+        group_positions = positions[start:end].T.tolist()
 
         final_groups.append({
-            'Mot-clé de référence': primary_keyword,
-            'Mots-clés regroupés': ', '.join(all_keywords),
-            'Volume du mot-clé principal': primary_volume,
+            'Mot-clé de référence': keywords[main_row],
+            'Mots-clés regroupés': ', '.join(map(str, keywords[start:end])),
+            'Volume du mot-clé principal': volumes[main_row],
             'Volume total': total_volume,
             'Concurrents concernés': ', '.join(competitors),
             'URLs concernées': ', '.join(urls),
             'Positions des URLs concernées': ', '.join(
-                [f"{comp}: {positions[comp]}" for comp in competitors]
+                [f"{comp}: {group_positions[rank]}" for rank, comp in enumerate(competitors)]
             )
         })
     
     return final_groups
 
+def overlap_components(row_slots, ranks, urls, num_rows, num_top_competitors, min_shared_urls):
+    """Relie les mots-clés qui partagent au moins `min_shared_urls` URLs de leur top N.
+
+    Index inversé sur les combinaisons de `min_shared_urls` URLs de chaque mot-clé : deux mots-clés qui ont une
+    combinaison en commun partagent au moins autant d'URLs. Les composantes connexes du graphe mots-clés /
+    combinaisons donnent les groupes (équivalent d'un union-find), en temps linéaire pour N petit.
+    """
+    # URLs du top N de chaque mot-clé, triées et dédoublonnées (-1 = case vide)
+    url_sets = np.full((num_rows, num_top_competitors), -1, dtype=np.int64)
+    url_sets[row_slots, ranks] = urls
+    url_sets.sort(axis=1)
+    url_sets[:, 1:][url_sets[:, 1:] == url_sets[:, :-1]] = -1
+    url_sets.sort(axis=1)
+
+    subset_rows, subsets = [], []
+    for columns in combinations(range(num_top_competitors), min_shared_urls):
+        subset = url_sets[:, columns]
+        valid = (subset >= 0).all(axis=1)
+        subset_rows.append(np.flatnonzero(valid))
+        subsets.append(subset[valid])
+    subset_rows = np.concatenate(subset_rows)
+    if len(subset_rows) == 0:
+        return np.arange(num_rows)
+    subset_ids = pd.DataFrame(np.concatenate(subsets)).groupby(list(range(min_shared_urls)), sort=False).ngroup().to_numpy()
+
+    # Graphe biparti mots-clés / combinaisons d'URLs
+    num_nodes = num_rows + subset_ids.max() + 1
+    graph = csr_matrix(
+        (np.ones(len(subset_rows), dtype=np.int8), (subset_rows, num_rows + subset_ids)),
+        shape=(num_nodes, num_nodes)
+    )
+    _, labels = connected_components(graph, directed=False)
+    # Numérotation des groupes dans l'ordre d'apparition des mots-clés
+    return pd.factorize(labels[:num_rows])[0]
+
+def group_keywords_by_overlap(data, position_cols, url_cols, num_top_competitors, min_shared_urls, representative):
+    competitor_names = [pos_col.replace("Position", "").strip() for pos_col in position_cols]
+    long_data, normalized_urls = top_competitors_long(data, position_cols, url_cols, num_top_competitors)
+    if long_data.empty:
+        return []
+
+    kept_rows, row_slots = np.unique(long_data['row'].to_numpy(), return_inverse=True)
+    group_ids = overlap_components(
+        row_slots, long_data['rank'].to_numpy(), long_data['url'].to_numpy(dtype=np.int64),
+        len(kept_rows), num_top_competitors, min_shared_urls
+    )
+    volumes = keyword_volumes(data, kept_rows)
+    keywords = data['Mot-clé'].to_numpy(dtype=object)[kept_rows]
+
+    # Position de chaque concurrent pour chaque mot-clé (NaN hors du top N)
+    competitor_positions = np.full((len(kept_rows), len(position_cols)), np.nan)
+    competitor_positions[row_slots, long_data['competitor']] = long_data['position']
+
+    # Statistiques par URL dans chaque groupe : fréquence, position moyenne, concurrent
+    long_data['group'] = group_ids[row_slots]
+    url_stats = long_data.groupby(['group', 'url'], sort=False).agg(
+        count=('row', 'size'), mean_position=('position', 'mean'), competitor=('competitor', 'first')
+    ).reset_index()
+    by_frequency = url_stats.sort_values(['group', 'count', 'mean_position'], ascending=[True, False, True], kind='stable')
+    url_bounds = np.searchsorted(by_frequency['group'].to_numpy(), np.arange(group_ids.max() + 2))
+    group_urls = by_frequency['url'].to_numpy()
+    group_competitors = by_frequency['competitor'].to_numpy()
+
+    order = np.argsort(group_ids, kind='stable')
+    bounds = np.flatnonzero(np.diff(group_ids[order])) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(order)]))
+    keywords, volumes, competitor_positions = keywords[order], volumes[order], competitor_positions[order]
+    total_volumes = np.add.reduceat(volumes, starts)
+    main_rows = np.array([start + int(np.argmax(volumes[start:end])) for start, end in zip(starts, ends)], dtype=np.int64)
+
+    # URL représentative de chaque groupe selon le critère choisi
+    if representative == REPRESENTATIVE_POSITION:
+        by_position = url_stats.sort_values(['group', 'mean_position', 'count'], ascending=[True, True, False], kind='stable')
+        representative_urls = by_position.drop_duplicates('group')['url'].to_numpy()
+    elif representative == REPRESENTATIVE_MAIN:
+        best_urls = np.empty(len(kept_rows), dtype=np.int64)
+        best_urls[row_slots[long_data['rank'].to_numpy() == 0]] = long_data.loc[long_data['rank'] == 0, 'url'].to_numpy()
+        representative_urls = best_urls[order[main_rows]]
+    else:
+        representative_urls = group_urls[url_bounds[:-1]]
+
+    final_groups = []
+    for group, (start, end, main_row) in enumerate(zip(starts, ends, main_rows)):
+        # Le mot-clé principal est celui qui a le volume le plus élevé
+        urls = group_urls[url_bounds[group]:url_bounds[group + 1]]
+        competitors = list(dict.fromkeys(group_competitors[url_bounds[group]:url_bounds[group + 1]].tolist()))
+        positions = {
+            competitor_names[comp]: ['-' if np.isnan(pos) else pos for pos in competitor_positions[start:end, comp].tolist()]
+            for comp in competitors
+        }
+
+        final_groups.append({
+            'Mot-clé de référence': keywords[main_row],
+            'Mots-clés regroupés': ', '.join(map(str, keywords[start:end])),
+            'Volume du mot-clé principal': volumes[main_row],
+            'Volume total': total_volumes[group],
+            'Nombre de mots-clés': end - start,
+            'URL représentative': normalized_urls[representative_urls[group]],
+            'Concurrents concernés': ', '.join(competitor_names[comp] for comp in competitors),
+            'URLs concernées': ', '.join(normalized_urls[urls]),
+            'Positions des URLs concernées': ', '.join(
+                [f"{comp}: {comp_positions}" for comp, comp_positions in positions.items()]
+            )
+        })
+
+    return final_groups
+
 def create_output_file(final_groups):
     df = pd.DataFrame(final_groups)
     output = io.BytesIO()
@@ -98,10 +250,23 @@ def main():
         num_top_competitors = st.slider("Nombre de meilleurs concurrents à considérer pour le groupement", 
                                         min_value=1, max_value=num_competitors, value=min(2, num_competitors))
 
+        grouping_mode = st.radio("Mode de groupement", [GROUPING_EXACT, GROUPING_OVERLAP])
+        if grouping_mode == GROUPING_OVERLAP:
+            min_shared_urls = 1
+            if num_top_competitors > 1:
+                min_shared_urls = st.slider("Nombre minimum d'URLs communes pour regrouper deux mots-clés",
+                                            min_value=1, max_value=num_top_competitors, value=2)
+            representative = st.selectbox("URL représentative de chaque groupe",
+                                          [REPRESENTATIVE_FREQUENCY, REPRESENTATIVE_POSITION, REPRESENTATIVE_MAIN])
+
         if st.button("Grouper les mots-clés"):
             url_cols = [col[0] for col in matched_cols]
             position_cols = [col[1] for col in matched_cols]
-            final_groups = group_keywords(data, position_cols, url_cols, num_top_competitors)
+            if grouping_mode == GROUPING_OVERLAP:
+                final_groups = group_keywords_by_overlap(data, position_cols, url_cols, num_top_competitors,
+                                                         min_shared_urls, representative)
+            else:
+                final_groups = group_keywords(data, position_cols, url_cols, num_top_competitors)
             results_excel = create_output_file(final_groups)
             st.download_button(
                 label="Télécharger les résultats en Excel",
@@ -1,199 +1,389 @@
 import streamlit as st
 import pandas as pd
+import os
+import re
+from datetime import date
+from importlib.util import find_spec
+from urllib.parse import quote, unquote
 from io import BytesIO
+from pandas.api.types import union_categoricals
 
-def main():
-    st.title("Analyse de mots-clés")
+SITE_COLUMN = 'Site'
+LONG_COLUMNS = ['Mot-clé', 'Volume', 'Position', 'URL']
+
+CHUNK_SIZE = 200_000
+# Taille (en octets) des blocs lus par pyarrow, analysés en parallèle puis convertis bloc par bloc
+PYARROW_BLOCK_SIZE = 16 * 1024 * 1024
+PREVIEW_ROWS = 5
+PYARROW_AVAILABLE = find_spec("pyarrow") is not None
+
+# Instantanés mensuels : un fichier Parquet par site et par mois (site=<nom>/date=<AAAA-MM>/data.parquet)
+SNAPSHOT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "auditsemantique", "snapshots")
+SNAPSHOT_MONTH_PATTERN = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
+SOURCE_UPLOAD = "Fichiers importés"
+SOURCE_SNAPSHOTS = "Instantanés enregistrés"
+SOURCE_EVOLUTION = "Évolution d'un mois à l'autre"
+
+def read_export(uploaded_file, nrows=None, usecols=None, chunksize=None, use_pyarrow=False):
+    """Lit un export (CSV UTF-16 tabulé ou Excel). Avec `chunksize`, renvoie un itérateur de blocs."""
+    uploaded_file.seek(0)
+    if not uploaded_file.name.endswith('.csv'):
+        df = pd.read_excel(uploaded_file, nrows=nrows, usecols=usecols, dtype=str if usecols else None)
+        return [df] if chunksize else df
+    if use_pyarrow and chunksize and nrows is None:
+        return read_csv_batches(uploaded_file, usecols)
+    return pd.read_csv(uploaded_file, encoding='utf-16', sep='\t', nrows=nrows, usecols=usecols,
+                       dtype=str if usecols else None, chunksize=chunksize)
+
+def read_csv_batches(uploaded_file, usecols=None):
+    """Lit un CSV UTF-16 tabulé avec le lecteur en flux de pyarrow : un DataFrame (colonnes texte) par bloc."""
+    import pyarrow as pa
+    from pyarrow import csv
+
+    reader = csv.open_csv(
+        uploaded_file,
+        read_options=csv.ReadOptions(encoding='utf-16', block_size=PYARROW_BLOCK_SIZE),
+        parse_options=csv.ParseOptions(delimiter='\t'),
+        convert_options=csv.ConvertOptions(include_columns=usecols, strings_can_be_null=True,
+                                           column_types={column: pa.string() for column in usecols or []}),
+    )
+    for batch in reader:
+        yield batch.to_pandas()
+
+def clean_chunk(chunk, keyword_column, volume_column, position_column, url_column):
+    """Convertit un bloc brut au format long compact (Mot-clé, Volume, Position, URL)."""
+    site_data = pd.DataFrame({
+        'Mot-clé': chunk[keyword_column].astype(str).str.strip(), # Nettoyer aussi les espaces
+        'Volume': pd.to_numeric(chunk[volume_column], errors='coerce'),
+        'Position': pd.to_numeric(chunk[position_column], errors='coerce'),
+        'URL': chunk[url_column].astype(str),
+    })
+    site_data = site_data.dropna(subset=['Mot-clé', 'Position']) # Besoin d'un mot-clé et d'une position valides
+    # Ignorer les mots-clés vides après conversion
+    site_data = site_data[site_data['Mot-clé'] != '']
+    return site_data.astype({'Position': 'int32', 'Mot-clé': 'category', 'URL': 'category'})
+
+def concat_compact(frames):
+    """Concatène des tables longues en gardant les colonnes catégorielles (catégories fusionnées et triées)."""
+    combined = pd.concat(frames, ignore_index=True)
+    for column in frames[0].columns:
+        if isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+            combined[column] = union_categoricals([frame[column] for frame in frames], sort_categories=True)
+    return combined
+
+def load_site_data(uploaded_file, site_name, file_columns, keyword_column, volume_column, position_column, url_column, use_pyarrow):
+    """Lit les 4 colonnes utiles d'un export par blocs typés et renvoie sa table longue, ou None."""
+    required_cols = [keyword_column, volume_column, position_column, url_column]
+    missing_cols = [col for col in required_cols if col not in file_columns]
+    if missing_cols:
+        st.error(f"Colonnes manquantes dans '{site_name}': {', '.join(missing_cols)}. Ce fichier sera ignoré pour l'analyse.")
+        return None
+
+    try:
+        chunks = [
+            clean_chunk(chunk, keyword_column, volume_column, position_column, url_column)
+            for chunk in read_export(uploaded_file, usecols=list(dict.fromkeys(required_cols)), chunksize=CHUNK_SIZE, use_pyarrow=use_pyarrow)
+        ]
+        site_data = concat_compact(chunks) if chunks else None
+    except Exception as e:
+        st.error(f"Erreur lors de la conversion des types de données pour le fichier {site_name}: {e}. Ce fichier sera ignoré.")
+        return None
+
+    if site_data is None or site_data.empty:
+        st.info(f"Le fichier {site_name} est vide après nettoyage initial des données (conversion de types, suppression des NaN sur mot-clé/position).")
+        return None
+    return site_data
+
+def build_long_table(site_files, file_columns, keyword_column, volume_column, position_column, url_column, use_pyarrow=False):
+    """Charge les exports de tous les sites en une seule table longue compacte avec une colonne Site."""
+    site_frames = []
+    for site_name, uploaded_file in site_files.items():
+        st.write(f"Analyse du fichier {site_name}...")
+        site_data = load_site_data(uploaded_file, site_name, file_columns[site_name],
+                                   keyword_column, volume_column, position_column, url_column, use_pyarrow)
+        if site_data is not None:
+            site_frames.append(site_data.assign(**{SITE_COLUMN: site_name}))
+
+    if not site_frames:
+        return pd.DataFrame(columns=LONG_COLUMNS + [SITE_COLUMN])
+    long_data = concat_compact(site_frames)
+    long_data[SITE_COLUMN] = pd.Categorical(long_data[SITE_COLUMN], categories=list(file_columns))
+    return long_data
+
+def best_positions(long_data):
+    """Meilleure ligne de chaque site pour chaque mot-clé (la première en cas d'égalité de position)."""
+    best = long_data.sort_values([SITE_COLUMN, 'Mot-clé', 'Position'], kind='stable')
+    return best.drop_duplicates([SITE_COLUMN, 'Mot-clé'])
+
+def keyword_gap_analysis(long_data, site_names, max_site_pos_threshold, min_total_sites_with_keyword, min_sites_in_top_pos):
+    """Meilleure position de chaque site par mot-clé, filtres sur le nombre de sites, puis tableau large (un pivot)."""
+    top_count_column = f'Nb sites position ≤ {max_site_pos_threshold}'
+    if long_data.empty:
+        return pd.DataFrame()
+
+    best = best_positions(long_data)
+    best['Volume'] = best['Volume'].fillna(0)
+
+    # Agrégats par mot-clé : volume max, nombre de sites, nombre de sites bien positionnés
+    best['in_top'] = best['Position'] <= max_site_pos_threshold
+    best['site_order'] = best[SITE_COLUMN].cat.codes
+    stats = best.groupby('Mot-clé', sort=False, observed=True).agg(
+        volume=('Volume', 'max'),
+        total_sites=('site_order', 'size'),
+        top_sites=('in_top', 'sum'),
+        first_site=('site_order', 'min'),
+    )
+    stats = stats[(stats['total_sites'] >= min_total_sites_with_keyword) & (stats['top_sites'] >= min_sites_in_top_pos)]
+    if stats.empty:
+        return pd.DataFrame()
+    # Ordre d'origine : mots-clés du premier site (triés), puis nouveaux mots-clés des sites suivants
+    stats = stats.reset_index().sort_values(['first_site', 'Mot-clé'], kind='stable')
+
+    # Colonnes Position et URL de chaque site, en un seul pivot
+    kept = best[best['Mot-clé'].isin(stats['Mot-clé'])].astype({'Mot-clé': object, 'URL': object})
+    wide = kept.pivot(index='Mot-clé', columns=SITE_COLUMN, values=['Position', 'URL'])
+    wide = wide.reindex(index=stats['Mot-clé'].to_numpy(dtype=object))
+    result_df = pd.DataFrame({
+        'Mot-clé': stats['Mot-clé'].to_numpy(dtype=object),
+        'Volume Global Max': stats['volume'].clip(lower=0).to_numpy(),
+        'Nb total sites avec M-C': stats['total_sites'].to_numpy(),
+        top_count_column: stats['top_sites'].to_numpy(),
+    })
+    # Tri par nom de fichier/site pour la cohérence
+    for site_name in sorted(site_names):
+        for value in ('Position', 'URL'):
+            column = wide[(value, site_name)] if (value, site_name) in wide.columns else None
+            result_df[f'{site_name} - {value}'] = column.to_numpy() if column is not None else None
+    result_df = result_df.infer_objects()
+
+    # Trier les résultats
+    result_df.sort_values(by=[top_count_column, 'Nb total sites avec M-C', 'Volume Global Max'],
+                          ascending=[False, False, False],
+                          inplace=True,
+                          na_position='last')
+    return result_df
+
+def snapshot_path(site_name, snapshot_month):
+    return os.path.join(SNAPSHOT_DIR, f"site={quote(site_name, safe='')}", f"date={snapshot_month}", "data.parquet")
+
+def save_snapshot(site_data, site_name, snapshot_month):
+    """Enregistre la table longue d'un site pour un mois, en remplaçant l'instantané existant."""
+    path = snapshot_path(site_name, snapshot_month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Les catégories sont communes à tous les sites importés : ne garder que celles de ce site
+    site_data = site_data[LONG_COLUMNS].copy()
+    for column in ('Mot-clé', 'URL'):
+        if isinstance(site_data[column].dtype, pd.CategoricalDtype):
+            site_data[column] = site_data[column].cat.remove_unused_categories()
+    site_data.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+
+def list_snapshots():
+    """Inventaire des instantanés enregistrés : DataFrame (Site, Mois)."""
+    snapshots = []
+    if os.path.isdir(SNAPSHOT_DIR):
+        for site_dir in sorted(os.listdir(SNAPSHOT_DIR)):
+            if not site_dir.startswith("site="):
+                continue
+            for date_dir in sorted(os.listdir(os.path.join(SNAPSHOT_DIR, site_dir))):
+                if date_dir.startswith("date=") and os.path.exists(os.path.join(SNAPSHOT_DIR, site_dir, date_dir, "data.parquet")):
+                    snapshots.append({SITE_COLUMN: unquote(site_dir[len("site="):]), 'Mois': date_dir[len("date="):]})
+    return pd.DataFrame(snapshots, columns=[SITE_COLUMN, 'Mois'])
+
+def load_snapshots(snapshot_month, site_names):
+    """Relit les instantanés d'un mois pour les sites choisis, au format long, sans relire les exports bruts."""
+    site_frames = [
+        pd.read_parquet(snapshot_path(site_name, snapshot_month)).assign(**{SITE_COLUMN: site_name})
+        for site_name in site_names
+        if os.path.exists(snapshot_path(site_name, snapshot_month))
+    ]
+    if not site_frames:
+        return pd.DataFrame(columns=LONG_COLUMNS + [SITE_COLUMN])
+    long_data = concat_compact(site_frames)
+    long_data[SITE_COLUMN] = pd.Categorical(long_data[SITE_COLUMN], categories=list(site_names))
+    return long_data
 
+def top_position_changes(previous_data, current_data, max_site_pos_threshold):
+    """Entrées et sorties du top (position ≤ seuil) de chaque site entre deux mois, avec un bilan par site."""
+    columns = [SITE_COLUMN, 'Mot-clé', 'Volume', 'Position', 'URL']
+    previous = best_positions(previous_data)[columns].astype({SITE_COLUMN: object, 'Mot-clé': object, 'URL': object})
+    current = best_positions(current_data)[columns].astype({SITE_COLUMN: object, 'Mot-clé': object, 'URL': object})
+    merged = previous.merge(current, on=[SITE_COLUMN, 'Mot-clé'], how='outer', suffixes=(' précédente', ' actuelle'))
+
+    # Un mot-clé absent d'un mois compte comme hors du top
+    was_in_top = merged['Position précédente'] <= max_site_pos_threshold
+    is_in_top = merged['Position actuelle'] <= max_site_pos_threshold
+    merged['Évolution'] = None
+    merged.loc[~was_in_top & is_in_top, 'Évolution'] = "Entrée dans le top"
+    merged.loc[was_in_top & ~is_in_top, 'Évolution'] = "Sortie du top"
+    changes = merged.dropna(subset=['Évolution'])
+    changes = changes.assign(Volume=changes[['Volume actuelle', 'Volume précédente']].max(axis=1))
+    changes = changes[[SITE_COLUMN, 'Mot-clé', 'Volume', 'Évolution', 'Position précédente', 'Position actuelle', 'URL précédente', 'URL actuelle']]
+    changes = changes.sort_values([SITE_COLUMN, 'Évolution', 'Volume'], ascending=[True, True, False], kind='stable')
+
+    summary = pd.crosstab(changes[SITE_COLUMN], changes['Évolution']).reindex(columns=["Entrée dans le top", "Sortie du top"], fill_value=0)
+    summary.columns = ["Entrées dans le top", "Sorties du top"]
+    summary['Solde'] = summary["Entrées dans le top"] - summary["Sorties du top"]
+    return changes.reset_index(drop=True), summary.reset_index()
+
+def filter_parameters():
+    st.subheader("Paramètres de filtrage avancés")
+    max_site_pos_threshold = st.number_input("Position maximum pour qu'un site soit considéré 'bien positionné' (ex: 10)", min_value=1, value=10, key="max_site_pos_thresh")
+    min_total_sites_with_keyword = st.number_input("Nombre total minimum de sites devant avoir le mot-clé (ex: 3)", min_value=1, value=3, key="min_total_sites")
+    min_sites_in_top_pos = st.number_input(f"Parmi ces sites, nombre minimum devant être 'bien positionnés' (position <= {max_site_pos_threshold}) (ex: 2)", min_value=0, value=2, key="min_sites_top")
+
+    if min_sites_in_top_pos > min_total_sites_with_keyword:
+        st.warning("'Nombre minimum de sites bien positionnés' ne peut pas être supérieur au 'Nombre total minimum de sites'. Ajustez les valeurs.")
+        # On pourrait bloquer le bouton "Lancer l'analyse" ici ou juste laisser l'utilisateur corriger.
+    return max_site_pos_threshold, min_total_sites_with_keyword, min_sites_in_top_pos
+
+def show_results(result_df):
+    if not result_df.empty:
+        st.write("Résultats de l'analyse :")
+        st.dataframe(result_df)
+
+        output = BytesIO()
+        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+            result_df.to_excel(writer, index=False, sheet_name='Analyse Mots-clés')
+        output.seek(0)
+        st.download_button(
+            label="Télécharger le fichier Excel",
+            data=output,
+            file_name="resultat_analyse_mots_cles_avances.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+    else:
+        st.write("Aucun mot-clé ne correspond à tous vos critères de filtrage. Essayez d'assouplir les filtres.")
+
+def analyse_uploaded_files():
     uploaded_files = st.file_uploader("Importer les fichiers de données", accept_multiple_files=True, type=['csv', 'xlsx'])
 
     if uploaded_files:
-        dataframes = {}
-        for uploaded_file in uploaded_files:
+        # Seuls l'en-tête et les premières lignes sont lus ici ; les fichiers complets sont lus à l'analyse
+        site_files = {uploaded_file.name: uploaded_file for uploaded_file in uploaded_files}
+        previews = {}
+        for uploaded_file in site_files.values():
             try:
-                if uploaded_file.name.endswith('.csv'):
-                    df = pd.read_csv(uploaded_file, encoding='utf-16', sep='\t')
-                else:
-                    df = pd.read_excel(uploaded_file)
-                dataframes[uploaded_file.name] = df
+                previews[uploaded_file.name] = read_export(uploaded_file, nrows=PREVIEW_ROWS)
             except Exception as e:
                 st.error(f"Erreur lors de la lecture du fichier {uploaded_file.name}: {e}")
                 return
 
-        if dataframes:
+        if previews:
             st.write("Fichiers importés :")
-            for name, df_head in dataframes.items():
+            for name, df_head in previews.items():
                 st.write(f"Fichier : {name} (premières lignes)")
-                st.write(df_head.head())
-
-            if not dataframes:
-                st.warning("Aucun fichier n'a pu être chargé correctement.")
-                return
-
-            # Utiliser les colonnes du premier dataframe comme référence
-            try:
-                reference_df_columns = list(dataframes.values())[0].columns.tolist()
-            except IndexError:
-                st.error("Aucun fichier n'a été chargé ou les fichiers sont vides.")
-                return
+                st.write(df_head)
 
+            file_columns = {name: df_head.columns.tolist() for name, df_head in previews.items()}
+            # Utiliser les colonnes du premier fichier comme référence
+            reference_df_columns = next(iter(file_columns.values()))
 
             keyword_column = st.selectbox("Sélectionner la colonne Mot-clé", reference_df_columns, key="kw_col")
             volume_column = st.selectbox("Sélectionner la colonne Volume de recherche", reference_df_columns, key="vol_col")
             position_column = st.selectbox("Sélectionner la colonne Position", reference_df_columns, key="pos_col")
             url_column = st.selectbox("Sélectionner la colonne URL", reference_df_columns, key="url_col")
 
-            st.subheader("Paramètres de filtrage avancés")
-            max_site_pos_threshold = st.number_input("Position maximum pour qu'un site soit considéré 'bien positionné' (ex: 10)", min_value=1, value=10, key="max_site_pos_thresh")
-            min_total_sites_with_keyword = st.number_input("Nombre total minimum de sites devant avoir le mot-clé (ex: 3)", min_value=1, value=3, key="min_total_sites")
-            min_sites_in_top_pos = st.number_input(f"Parmi ces sites, nombre minimum devant être 'bien positionnés' (position <= {max_site_pos_threshold}) (ex: 2)", min_value=0, value=2, key="min_sites_top")
+            use_pyarrow = st.checkbox("Lecture rapide des CSV avec pyarrow (par blocs)", value=PYARROW_AVAILABLE,
+                                      disabled=not PYARROW_AVAILABLE, key="use_pyarrow")
+
+            with st.expander("Enregistrer ces fichiers comme instantanés mensuels"):
+                snapshot_month = st.text_input("Mois de l'instantané (AAAA-MM)", value=date.today().strftime("%Y-%m"), key="snapshot_month")
+                snapshot_sites = {
+                    name: st.text_input(f"Nom du site pour '{name}'", value=os.path.splitext(name)[0], key=f"snapshot_site_{name}").strip()
+                    for name in site_files
+                }
+                if st.button("Enregistrer les instantanés"):
+                    if not SNAPSHOT_MONTH_PATTERN.match(snapshot_month):
+                        st.error("Le mois doit être au format AAAA-MM.")
+                    elif not all(snapshot_sites.values()) or len(set(snapshot_sites.values())) != len(snapshot_sites):
+                        st.error("Chaque fichier doit avoir un nom de site non vide et unique.")
+                    else:
+                        long_data = build_long_table(site_files, file_columns, keyword_column, volume_column, position_column, url_column, use_pyarrow)
+                        for file_name, site_data in long_data.groupby(SITE_COLUMN, observed=True):
+                            save_snapshot(site_data, snapshot_sites[file_name], snapshot_month)
+                            st.write(f"Instantané {snapshot_month} enregistré pour {snapshot_sites[file_name]} ({len(site_data)} lignes).")
+                        st.success("Instantanés enregistrés : les prochaines analyses de ce mois peuvent se faire sans réimporter les fichiers.")
 
-            if min_sites_in_top_pos > min_total_sites_with_keyword:
-                st.warning("'Nombre minimum de sites bien positionnés' ne peut pas être supérieur au 'Nombre total minimum de sites'. Ajustez les valeurs.")
-                # On pourrait bloquer le bouton "Lancer l'analyse" ici ou juste laisser l'utilisateur corriger.
+            max_site_pos_threshold, min_total_sites_with_keyword, min_sites_in_top_pos = filter_parameters()
 
             if st.button("Lancer l'analyse"):
-                result_rows = []
-                # Dictionnaire pour stocker les informations agrégées par mot-clé
-                # keyword_info[keyword] = {
-                # 'Volume': 0,
-                # 'total_sites_having_keyword': 0,
-                # 'sites_in_top_position_count': 0,
-                # 'Site_Data': { site_name: {'Position': pos, 'URL': url, 'Volume_Site': vol}, ... }
-                # }
-                keyword_info = {}
-
-                for site_name, df_original in dataframes.items():
-                    st.write(f"Analyse du fichier {site_name}...")
-                    df = df_original.copy()
-
-                    required_cols = [keyword_column, volume_column, position_column, url_column]
-                    missing_cols = [col for col in required_cols if col not in df.columns]
-                    if missing_cols:
-                        st.error(f"Colonnes manquantes dans '{site_name}': {', '.join(missing_cols)}. Ce fichier sera ignoré pour l'analyse.")
-                        continue
-
-                    try:
-                        df[keyword_column] = df[keyword_column].astype(str).str.strip() # Nettoyer aussi les espaces
-                        df[url_column] = df[url_column].astype(str)
-                        df[position_column] = pd.to_numeric(df[position_column], errors='coerce')
-                        df[volume_column] = pd.to_numeric(df[volume_column], errors='coerce')
-                        
-                        df.dropna(subset=[keyword_column, position_column], inplace=True) # Besoin d'un mot-clé et d'une position valides
-                        if not df.empty:
-                            df[position_column] = df[position_column].astype(int)
-                        else:
-                            st.info(f"Le fichier {site_name} est vide après nettoyage initial des données (conversion de types, suppression des NaN sur mot-clé/position).")
-                            continue
-                    except Exception as e:
-                        st.error(f"Erreur lors de la conversion des types de données pour le fichier {site_name}: {e}. Ce fichier sera ignoré.")
-                        continue
-                    
-                    if df.empty:
-                        st.info(f"Aucune donnée valide à analyser pour le fichier {site_name} après conversion.")
-                        continue
-                    
-                    # Grouper par mot-clé pour ce site, pour trouver la meilleure position du site pour chaque mot-clé
-                    grouped_by_keyword_for_site = df.groupby(keyword_column)
-
-                    for keyword_value, group_for_keyword in grouped_by_keyword_for_site:
-                        if not keyword_value: # Ignorer les mots-clés vides après conversion
-                            continue
-
-                        best_row_for_site_keyword = group_for_keyword.loc[group_for_keyword[position_column].idxmin()]
-                        
-                        site_pos_for_kw = best_row_for_site_keyword[position_column]
-                        site_url_for_kw = best_row_for_site_keyword[url_column]
-                        site_vol_for_kw = best_row_for_site_keyword[volume_column] if pd.notna(best_row_for_site_keyword[volume_column]) else 0
-
-                        # Initialiser/mettre à jour les informations pour ce mot-clé
-                        if keyword_value not in keyword_info:
-                            keyword_info[keyword_value] = {
-                                'Volume': 0, # Sera le max des volumes de tous les sites ayant le mot-clé
-                                'total_sites_having_keyword': 0,
-                                'sites_in_top_position_count': 0,
-                                'Site_Data': {} # Stockera {site_name: {Position, URL, Volume_Site}}
-                            }
-                        
-                        # Mettre à jour le volume global du mot-clé avec le max rencontré
-                        keyword_info[keyword_value]['Volume'] = max(keyword_info[keyword_value]['Volume'], site_vol_for_kw)
-                        
-                        # Ce site a ce mot-clé
-                        keyword_info[keyword_value]['total_sites_having_keyword'] += 1
-                        
-                        # Stocker les données de ce site pour ce mot-clé
-                        keyword_info[keyword_value]['Site_Data'][site_name] = {
-                            'Position': site_pos_for_kw,
-                            'URL': site_url_for_kw,
-                            'Volume_Site': site_vol_for_kw # Peut être utile pour des analyses futures
-                        }
-                        
-                        # Vérifier si ce site est "bien positionné" pour ce mot-clé
-                        if site_pos_for_kw <= max_site_pos_threshold:
-                            keyword_info[keyword_value]['sites_in_top_position_count'] += 1
-
-                # Étape finale: Filtrer les mots-clés et construire le DataFrame de résultats
-                for keyword, info in keyword_info.items():
-                    passes_min_total_sites = info['total_sites_having_keyword'] >= min_total_sites_with_keyword
-                    passes_min_sites_in_top = info['sites_in_top_position_count'] >= min_sites_in_top_pos
-                    
-                    if passes_min_total_sites and passes_min_sites_in_top:
-                        row = {
-                            'Mot-clé': keyword,
-                            'Volume Global Max': info['Volume'], # Volume max trouvé pour ce mot-clé
-                            'Nb total sites avec M-C': info['total_sites_having_keyword'],
-                            f'Nb sites position ≤ {max_site_pos_threshold}': info['sites_in_top_position_count']
-                        }
-                        
-                        # Ajouter les colonnes Position et URL pour chaque site source
-                        for site_name_key in dataframes.keys(): # Pour assurer un ordre cohérent des colonnes de site
-                            if site_name_key in info['Site_Data']:
-                                site_specific_data = info['Site_Data'][site_name_key]
-                                row[f'{site_name_key} - Position'] = site_specific_data['Position']
-                                row[f'{site_name_key} - URL'] = site_specific_data['URL']
-                            else:
-                                # Ce site n'avait pas le mot-clé, ou a été filtré avant
-                                row[f'{site_name_key} - Position'] = None 
-                                row[f'{site_name_key} - URL'] = None
-                        result_rows.append(row)
-
-                if result_rows:
-                    result_df = pd.DataFrame(result_rows)
-                    
-                    # Organiser les colonnes
-                    main_cols = ['Mot-clé', 'Volume Global Max', 'Nb total sites avec M-C', f'Nb sites position ≤ {max_site_pos_threshold}']
-                    site_detail_cols_sorted = []
-                    for site_name_key in sorted(dataframes.keys()): # Tri par nom de fichier/site pour la cohérence
-                        if f'{site_name_key} - Position' in result_df.columns : # Vérifier si la colonne existe (au cas où un site n'aurait aucun mot-clé retenu)
-                             site_detail_cols_sorted.append(f'{site_name_key} - Position')
-                        if f'{site_name_key} - URL' in result_df.columns :
-                             site_detail_cols_sorted.append(f'{site_name_key} - URL')
-                    
-                    # S'assurer que seules les colonnes existantes sont demandées
-                    final_columns_order = main_cols + [col for col in site_detail_cols_sorted if col in result_df.columns]
-                    result_df = result_df[final_columns_order]
-
-                    # Trier les résultats
-                    result_df.sort_values(by=[f'Nb sites position ≤ {max_site_pos_threshold}', 'Nb total sites avec M-C', 'Volume Global Max'], 
-                                          ascending=[False, False, False], 
-                                          inplace=True,
-                                          na_position='last')
-
-                    st.write("Résultats de l'analyse :")
-                    st.dataframe(result_df)
-
-                    output = BytesIO()
-                    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                        result_df.to_excel(writer, index=False, sheet_name='Analyse Mots-clés')
-                    output.seek(0)
-                    st.download_button(
-                        label="Télécharger le fichier Excel",
-                        data=output,
-                        file_name="resultat_analyse_mots_cles_avances.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                    )
-                else:
-                    st.write("Aucun mot-clé ne correspond à tous vos critères de filtrage. Essayez d'assouplir les filtres.")
+                long_data = build_long_table(site_files, file_columns, keyword_column, volume_column, position_column, url_column, use_pyarrow)
+                result_df = keyword_gap_analysis(
+                    long_data, list(file_columns),
+                    max_site_pos_threshold, min_total_sites_with_keyword, min_sites_in_top_pos
+                )
+                show_results(result_df)
+
+def analyse_snapshots(snapshots):
+    months = sorted(snapshots['Mois'].unique(), reverse=True)
+    snapshot_month = st.selectbox("Mois à analyser", months, key="analysis_month")
+    available_sites = snapshots.loc[snapshots['Mois'] == snapshot_month, SITE_COLUMN].tolist()
+    site_names = st.multiselect("Sites à comparer", available_sites, default=available_sites, key="analysis_sites")
+
+    max_site_pos_threshold, min_total_sites_with_keyword, min_sites_in_top_pos = filter_parameters()
+
+    if st.button("Lancer l'analyse") and site_names:
+        long_data = load_snapshots(snapshot_month, site_names)
+        result_df = keyword_gap_analysis(
+            long_data, site_names,
+            max_site_pos_threshold, min_total_sites_with_keyword, min_sites_in_top_pos
+        )
+        show_results(result_df)
+
+def compare_snapshot_months(snapshots):
+    months = sorted(snapshots['Mois'].unique())
+    if len(months) < 2:
+        st.info("Il faut des instantanés sur au moins deux mois pour suivre l'évolution.")
+        return
+
+    previous_month = st.selectbox("Mois de référence", months, index=len(months) - 2, key="previous_month")
+    current_month = st.selectbox("Mois à comparer", months, index=len(months) - 1, key="current_month")
+    # Seuls les sites présents les deux mois sont comparables
+    common_sites = sorted(
+        set(snapshots.loc[snapshots['Mois'] == previous_month, SITE_COLUMN])
+        & set(snapshots.loc[snapshots['Mois'] == current_month, SITE_COLUMN])
+    )
+    site_names = st.multiselect("Sites à suivre", common_sites, default=common_sites, key="evolution_sites")
+    max_site_pos_threshold = st.number_input("Position maximum pour être dans le top (ex: 10)", min_value=1, value=10, key="evolution_threshold")
+
+    if st.button("Comparer les mois") and site_names:
+        changes, summary = top_position_changes(
+            load_snapshots(previous_month, site_names), load_snapshots(current_month, site_names), max_site_pos_threshold
+        )
+        st.write(f"Bilan par site ({previous_month} → {current_month}) :")
+        st.dataframe(summary)
+        st.write("Détail des mots-clés entrés ou sortis du top :")
+        st.dataframe(changes)
+
+        output = BytesIO()
+        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+            summary.to_excel(writer, index=False, sheet_name='Bilan par site')
+            changes.to_excel(writer, index=False, sheet_name='Évolution Mots-clés')
+        output.seek(0)
+        st.download_button(
+            label="Télécharger l'évolution en Excel",
+            data=output,
+            file_name=f"evolution_positions_{previous_month}_{current_month}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+
+def main():
+    st.title("Analyse de mots-clés")
+
+    source = st.radio("Source des données", [SOURCE_UPLOAD, SOURCE_SNAPSHOTS, SOURCE_EVOLUTION], horizontal=True)
+    if source == SOURCE_UPLOAD:
+        analyse_uploaded_files()
+        return
+
+    snapshots = list_snapshots()
+    if snapshots.empty:
+        st.info("Aucun instantané enregistré : importez des fichiers puis enregistrez-les comme instantanés mensuels.")
+    elif source == SOURCE_SNAPSHOTS:
+        analyse_snapshots(snapshots)
+    else:
+        compare_snapshot_months(snapshots)
 
 if __name__ == '__main__':
     main()
@@ -4,78 +4,44 @@ import streamlit as st
 import sqlite3
 import pandas as pd
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import tempfile
+import xlsxwriter
+
+from scripts.CrawlDatabase import cached_upload_path, connect_read_only, ensure_upload, quote_identifier
+
+MAX_WORKERS = 8
+
+# Export détaillé : lignes lues par lots dans SQLite, limites d'Excel
+DETAIL_FETCH_SIZE = 10_000
+EXCEL_MAX_ROWS = 1_048_576
+EXCEL_SHEET_NAME_LENGTH = 31
 
 def main():
     st.title("Analyse SEO Technique avec Screaming Frog")
 
     # Uploader pour le fichier .dbseospider
     uploaded_file = st.file_uploader("Téléchargez votre fichier .dbseospider", type="dbseospider")
+    # Une base déjà présente sur le serveur est ouverte sur place, sans copie
+    server_path = st.text_input("Ou chemin d'un fichier .dbseospider présent sur le serveur").strip()
 
-    if uploaded_file is not None:
-        # Enregistrer le fichier uploadé dans un fichier temporaire
-        temp_file_path = 'temp.dbseospider'
-        with open(temp_file_path, 'wb') as f:
-            f.write(uploaded_file.getbuffer())
-
-        # Se connecter à la base de données SQLite
-        conn = sqlite3.connect(temp_file_path)
-
-        # Liste des critères avec leur fonction de vérification
-        criteria_list = [
-            {"criterion": "Vérifier le robots.txt (Règles, Sitemap présent)", "function": check_robots_txt},
-            {"criterion": "Vérifier le Sitemap (Pages non indexables / Orphelines)", "function": check_sitemap},
-            {"criterion": "Présence de sous-domaines", "function": check_subdomains},
-            {"criterion": "Liens vers pages 404 / 301", "function": check_links_to_404_301},
-            {"criterion": "Pages non indexables crawlées", "function": check_non_indexable_pages_crawled},
-            {"criterion": "Erreurs 500", "function": check_500_errors},
-            {"criterion": "Redirection http > https", "function": check_http_to_https_redirection},
-            {"criterion": "Redirection www > sans www (ou inverse)", "function": check_www_redirection},
-            {"criterion": "Redirection avec '/' > sans '/' (ou inverse)", "function": check_trailing_slash_redirection},
-            {"criterion": "Soft 404", "function": check_soft_404},
-            {"criterion": "Présence de redirections Meta Refresh", "function": check_meta_refresh_redirects},
-            {"criterion": "Chaînes de redirections", "function": check_redirect_chains},
-            {"criterion": "Redirections 301 vers URLs en 404", "function": check_301_to_404},
-            {"criterion": "Poids des images (> 100 ko)", "function": check_image_sizes},
-            {"criterion": "Balises Alt présentes pour chaque image", "function": check_alt_tags_presence},
-            {"criterion": "Attributs width= & height= dans les images", "function": check_image_dimensions_attributes},
-            {"criterion": "Format des images (jpeg / WebP)", "function": check_image_formats},
-            {"criterion": "Balises Titles et H1 uniques", "function": check_unique_titles_h1},
-            {"criterion": "Longueur des balises title", "function": check_title_length},
-            {"criterion": "Vérification de l'indexabilité des pages", "function": check_pages_indexability},
-            {"criterion": "Présence de hreflang", "function": check_hreflang},
-            {"criterion": "Balise X-default présente", "function": check_x_default},
-            {"criterion": "Langue dans la balise <html>", "function": check_html_lang_attribute},
-            {"criterion": "Utilisation de balises HTML5", "function": check_html5_usage},
-            {"criterion": "Présence de la balise viewport", "function": check_viewport_meta},
-            {"criterion": "Certificat SSL présent et sécurisé", "function": check_ssl_certificate},
-            {"criterion": "Vérifier la gestion du multilingue (TLD / Dossier / Sous-domaine)", "function": check_multilingual_handling},
-            {"criterion": "Vérification de l'optimisation du moteur de recherche interne", "function": check_internal_search_optimization},
-            {"criterion": "Lazy Loading des images", "function": check_lazy_loading},
-            {"criterion": "Liens internes contenant des UTM", "function": check_internal_links_with_utm},
-            {"criterion": "Structure Hn (Ordre, Hn Structurel, Hn Vides)", "function": check_hn_structure},
-            {"criterion": "Vitesse de chargement du site", "function": check_page_speed},
-            {"criterion": "Utilisation d'un CDN", "function": check_cdn_usage},
-            {"criterion": "Taille des pages inférieures à 4Mo", "function": check_page_size},
-            {"criterion": "Présence de scripts inutilisés dans le code source", "function": check_unused_scripts},
-            {"criterion": "Cache navigateur activé", "function": check_browser_cache},
-            {"criterion": "Présence de CSS dans le code HTML", "function": check_inline_css},
-            {"criterion": "Score Optimisation Pagespeed", "function": check_pagespeed_score},
-            {"criterion": "Utilisation de DNS Prefetching", "function": check_dns_prefetching},
-            {"criterion": "Serveur mutualisé ou dédié", "function": check_server_type}
-        ]
-
-        results = []
-        for item in criteria_list:
-            criterion = item["criterion"]
-            function = item["function"]
-            status = function(conn)
-            results.append({"Critère": criterion, "Statut": status})
-
-        # Fermer la connexion
-        conn.close()
-
-        # Supprimer le fichier temporaire
-        os.remove(temp_file_path)
+    db_path = None
+    if server_path:
+        if server_path.endswith(".dbseospider") and os.path.isfile(server_path):
+            db_path = server_path
+        else:
+            st.error(f"Fichier .dbseospider introuvable sur le serveur : {server_path}")
+    elif uploaded_file is not None:
+        db_path = cached_upload_path(uploaded_file)
+
+    if db_path is not None:
+        # Vérifications exécutées en parallèle, chacune sur une connexion en lecture seule
+        start = time.perf_counter()
+        results, details, scan_timings = run_audit(db_path, CRITERIA, in_place=bool(server_path))
+        total_duration = time.perf_counter() - start
 
         # Créer un DataFrame des résultats
         df_results = pd.DataFrame(results)
@@ -83,528 +49,787 @@ def main():
         # Afficher les résultats dans l'application Streamlit
         st.header("Résultats de l'analyse")
         st.table(df_results)
+        st.caption(
+            f"Audit réalisé en {total_duration:.2f} s. Parcours groupés des tables : "
+            + ", ".join(f"{table} {duration:.2f} s" for table, duration in scan_timings.items())
+        )
 
-        # Enregistrer dans un fichier Excel
-        output_file = "resultats_analyse_seo.xlsx"
-        df_results.to_excel(output_file, index=False)
+        # Enregistrer dans un fichier Excel (en mémoire, pour ne pas mélanger les rapports de plusieurs utilisateurs)
+        output = BytesIO()
+        df_results.to_excel(output, index=False)
 
         # Proposer le téléchargement du fichier
-        with open(output_file, "rb") as f:
+        st.download_button(
+            label="Télécharger le rapport d'analyse",
+            data=output.getvalue(),
+            file_name="resultats_analyse_seo.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+
+        # Export détaillé : les lignes en échec ne sont lues dans la base qu'au clic
+        if details:
+            def detail_workbook():
+                # La copie en cache a pu être évincée depuis l'audit : elle est alors recopiée avant l'export
+                path = db_path if server_path else ensure_upload(uploaded_file, db_path)
+                return export_details(path, details, in_place=bool(server_path))
+
             st.download_button(
-                label="Télécharger le rapport d'analyse",
-                data=f,
-                file_name=output_file,
+                label=f"Télécharger le détail des {len(details)} critères en échec",
+                data=detail_workbook,
+                file_name="detail_analyse_seo.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
 
-        # Supprimer le fichier de résultats après le téléchargement
-        os.remove(output_file)
-
-    else:
+    elif uploaded_file is None and not server_path:
         st.info("Veuillez télécharger un fichier .dbseospider pour commencer l'analyse.")
 
 
+# Planificateur de requêtes : les comptages sont calculés dans SQLite, en un seul parcours par table
+
+class AuditData:
+    """Accès au crawl partagé par les vérifications : comptages planifiés et requêtes d'agrégation SQL."""
+
+    def __init__(self, connect, counts=None, errors=None):
+        # `connect()` renvoie la connexion en lecture seule du thread courant
+        self.connect = connect
+        self.counts = counts or {}
+        self.errors = errors or {}
+
+    def count(self, table, condition="1"):
+        """Nombre de lignes de `table` qui vérifient `condition` (expression SQL)."""
+        key = (table, condition)
+        if key in self.errors:
+            raise self.errors[key]
+        if key not in self.counts:
+            self.counts[key] = self.scalar(f"SELECT COUNT(*) FROM {quote_identifier(table)} WHERE {condition}")
+        return self.counts[key]
+
+    def scalar(self, query, params=()):
+        return self.connect().execute(query, params).fetchone()[0]
+
+    def rows(self, query, params=()):
+        return self.connect().execute(query, params).fetchall()
+
+
+class QueryPlanner:
+    """Passe à blanc : les vérifications tournent sans base pour recenser les comptages et index qu'elles demandent."""
+
+    def __init__(self):
+        self.conditions = {}
+
+    def count(self, table, condition="1"):
+        self.conditions.setdefault(table, [])
+        if condition not in self.conditions[table]:
+            self.conditions[table].append(condition)
+        return 0
+
+    def scalar(self, query, params=()):
+        return 0
+
+    def rows(self, query, params=()):
+        return []
+
+
+def plan_queries(checks):
+    """Comptages demandés par les vérifications, regroupés par table."""
+    planner = QueryPlanner()
+    for check in checks:
+        check(planner)
+    return planner
+
+def detail_query(table, condition, columns):
+    """Requête (non exécutée) des lignes de `table` en échec, pour l'export détaillé."""
+    return f"SELECT {', '.join(columns)} FROM {quote_identifier(table)} WHERE {condition}"
+
+class ReadOnlyConnections:
+    """Une connexion SQLite par thread, ouverte en lecture seule (immutable pour les copies en cache)."""
+
+    def __init__(self, db_path, immutable=True):
+        self.db_path = db_path
+        self.immutable = immutable
+        self.local = threading.local()
+        self.opened = []
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = connect_read_only(self.db_path, self.immutable, check_same_thread=False)
+            self.local.conn = conn
+            with self.lock:
+                self.opened.append(conn)
+        return conn
+
+    def close(self):
+        for conn in self.opened:
+            conn.close()
+
+def count_table(connect, table, conditions):
+    """Tous les comptages d'une table en un seul parcours ; une condition invalide n'affecte qu'elle-même."""
+    counts, errors = {}, {}
+    sums = ", ".join(f"COALESCE(SUM(CASE WHEN {condition} THEN 1 ELSE 0 END), 0)" for condition in conditions)
+    try:
+        values = connect().execute(f"SELECT {sums} FROM {quote_identifier(table)}").fetchone()
+        counts.update({(table, condition): value for condition, value in zip(conditions, values)})
+    except sqlite3.Error:
+        # Table ou colonne absente : on retrouve quelle condition échoue en les évaluant séparément
+        for condition in conditions:
+            try:
+                counts[(table, condition)] = connect().execute(
+                    f"SELECT COUNT(*) FROM {quote_identifier(table)} WHERE {condition}"
+                ).fetchone()[0]
+            except sqlite3.Error as e:
+                errors[(table, condition)] = e
+    return counts, errors
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def run_audit(db_path, criteria_list, max_workers=MAX_WORKERS, in_place=False):
+    """Exécute les vérifications en parallèle ; renvoie les résultats (avec durée par critère), les requêtes de détail
+    des critères en échec (exécutées seulement à l'export) et la durée des parcours de tables.
+
+    Les copies du cache ont leurs index depuis l'import (CrawlDatabase.CRAWL_INDEXES). Avec `in_place`, la base
+    (ouverte directement sur le serveur) n'est ni indexée ni supposée immuable : SQLite se contente de ses index automatiques.
+    """
+    plan = plan_queries([item["function"] for item in criteria_list])
+
+    connections = ReadOnlyConnections(db_path, immutable=not in_place)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Parcours groupés des tables, en parallèle
+            scans = {
+                table: executor.submit(timed, count_table, connections, table, conditions)
+                for table, conditions in plan.conditions.items()
+            }
+            data = AuditData(connections)
+            scan_timings = {}
+            for table, future in scans.items():
+                (counts, errors), scan_timings[table] = future.result()
+                data.counts.update(counts)
+                data.errors.update(errors)
+
+            # Puis les vérifications elles-mêmes, en parallèle
+            checks = [executor.submit(timed, item["function"], data) for item in criteria_list]
+            results, details = [], {}
+            for item, future in zip(criteria_list, checks):
+                (status, detail), duration = future.result()
+                results.append({"Critère": item["criterion"], "Statut": status, "Durée (s)": round(duration, 3)})
+                if detail:
+                    details[item["criterion"]] = detail
+    finally:
+        connections.close()
+    return results, details, scan_timings
+
+
+# Export détaillé : les lignes en échec passent directement du curseur SQLite au classeur
+
+def sheet_names(criteria, max_length=EXCEL_SHEET_NAME_LENGTH):
+    """Noms d'onglets Excel valides et uniques (31 caractères, sans []:*?/\\)."""
+    names = []
+    for number, criterion in enumerate(criteria, start=1):
+        name = "".join(" " if char in "[]:*?/\\" else char for char in criterion)
+        names.append(f"{number:02d} {name}"[:max_length].strip())
+    return names
+
+def write_rows(workbook, name, cursor):
+    """Écrit le résultat du curseur, par lots, sur un ou plusieurs onglets (au-delà de la limite de lignes d'Excel)."""
+    header = [column[0] for column in cursor.description]
+    part = 1
+    worksheet, row = None, EXCEL_MAX_ROWS
+    while True:
+        chunk = cursor.fetchmany(DETAIL_FETCH_SIZE)
+        if not chunk:
+            break
+        for values in chunk:
+            if row == EXCEL_MAX_ROWS:
+                suffix = f" ({part})" if part > 1 else ""
+                worksheet = workbook.add_worksheet(name[:EXCEL_SHEET_NAME_LENGTH - len(suffix)] + suffix)
+                worksheet.write_row(0, 0, header)
+                part += 1
+                row = 1
+            worksheet.write_row(row, 0, values)
+            row += 1
+    if worksheet is None:
+        workbook.add_worksheet(name).write_row(0, 0, header)
+
+def export_details(db_path, details, in_place=False):
+    """Classeur avec un onglet par critère en échec ; écrit en mode constant_memory dans un fichier temporaire."""
+    output = tempfile.TemporaryFile()
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True, "strings_to_urls": False})
+    connections = ReadOnlyConnections(db_path, immutable=not in_place)
+    try:
+        names = sheet_names(details)
+        summary = workbook.add_worksheet("Sommaire")
+        summary.write_row(0, 0, ["Onglet", "Critère"])
+        for row, (name, criterion) in enumerate(zip(names, details), start=1):
+            summary.write_row(row, 0, [name, criterion])
+
+        for name, (criterion, query) in zip(names, details.items()):
+            try:
+                write_rows(workbook, name, connections().execute(query))
+            except sqlite3.Error as e:
+                workbook.add_worksheet(name).write_row(0, 0, [criterion, f"Erreur : {e}"])
+    finally:
+        connections.close()
+        workbook.close()
+    output.seek(0)
+    return output
+
+
 # Fonctions de vérification pour chaque critère
 
-def check_robots_txt(conn):
+def check_robots_txt(data):
     try:
-        df_robots = pd.read_sql_query("SELECT * FROM RobotsTxt", conn)
-        if not df_robots.empty:
-            robots_content = df_robots['Content'].iloc[0]
+        robots = data.rows("SELECT Content FROM RobotsTxt LIMIT 1")
+        if robots:
+            robots_content = robots[0][0]
             sitemap_present = "Sitemap:" in robots_content
-            return "Sitemap présent dans robots.txt" if sitemap_present else "Sitemap non présent dans robots.txt"
+            return "Sitemap présent dans robots.txt" if sitemap_present else "Sitemap non présent dans robots.txt", None
         else:
-            return "robots.txt non trouvé"
+            return "robots.txt non trouvé", None
     except Exception as e:
-        return f"Erreur lors de la vérification du robots.txt : {e}"
+        return f"Erreur lors de la vérification du robots.txt : {e}", None
 
-def check_sitemap(conn):
-    try:
-        df_sitemap = pd.read_sql_query("SELECT * FROM Sitemaps", conn)
-        df_internal = pd.read_sql_query("SELECT Address FROM Internal WHERE Indexability = 'Indexable'", conn)
-
-        sitemap_urls = df_sitemap['Address'].tolist()
-        internal_urls = df_internal['Address'].tolist()
+SITEMAP_ORPHANS = "SELECT DISTINCT s.Address FROM Sitemaps s WHERE NOT EXISTS (SELECT 1 FROM Internal i WHERE i.Address = s.Address)"
 
-        non_indexable_in_sitemap = df_internal[(df_internal['Address'].isin(sitemap_urls)) & (df_internal['Indexability'] != 'Indexable')]
-        orphan_pages = set(sitemap_urls) - set(internal_urls)
+def check_sitemap(data):
+    try:
+        condition = "Indexability IS NOT 'Indexable' AND Address IN (SELECT Address FROM Sitemaps)"
+        non_indexable_in_sitemap = data.count("Internal", condition)
+        orphan_pages = data.scalar(f"SELECT COUNT(*) FROM ({SITEMAP_ORPHANS})")
 
         status = ""
-        if not non_indexable_in_sitemap.empty:
-            status += f"{len(non_indexable_in_sitemap)} pages non indexables dans le sitemap. "
+        if non_indexable_in_sitemap:
+            status += f"{non_indexable_in_sitemap} pages non indexables dans le sitemap. "
         else:
             status += "Aucune page non indexable dans le sitemap. "
 
         if orphan_pages:
-            status += f"{len(orphan_pages)} pages orphelines détectées."
+            status += f"{orphan_pages} pages orphelines détectées."
         else:
             status += "Aucune page orpheline détectée."
 
-        return status
+        details = []
+        if non_indexable_in_sitemap:
+            details.append(f"SELECT Address, 'Non indexable' AS Problème FROM Internal WHERE {condition}")
+        if orphan_pages:
+            details.append(f"SELECT Address, 'Orpheline' AS Problème FROM ({SITEMAP_ORPHANS})")
+        return status, " UNION ALL ".join(details) or None
 
     except Exception as e:
-        return f"Erreur lors de la vérification du sitemap : {e}"
+        return f"Erreur lors de la vérification du sitemap : {e}", None
+
+# Domaine d'une URL (équivalent de url.split('/')[2]), calculé dans SQLite
+DOMAINS_CTE = """
+WITH after_scheme AS (SELECT rowid AS id, Address, substr(Address, instr(Address, '/') + 1) AS rest FROM Internal),
+     after_slashes AS (SELECT id, Address, substr(rest, instr(rest, '/') + 1) AS rest FROM after_scheme),
+     domains AS (
+         SELECT id, Address, CASE WHEN instr(rest, '/') > 0 THEN substr(rest, 1, instr(rest, '/') - 1) ELSE rest END AS domain
+         FROM after_slashes
+     )
+"""
+DOMAINS_QUERY = DOMAINS_CTE + "SELECT domain, COUNT(*) AS pages, MIN(id) AS first_seen FROM domains GROUP BY domain"
 
-def check_subdomains(conn):
+def check_subdomains(data):
     try:
-        df_internal = pd.read_sql_query("SELECT Address FROM Internal", conn)
-        domains = df_internal['Address'].apply(lambda x: x.split('/')[2])
-        main_domain = domains.mode()[0]
-        subdomains = domains[domains != main_domain].unique()
+        domains = data.rows(DOMAINS_QUERY)
+        # Domaine principal : le plus fréquent (le premier par ordre alphabétique en cas d'égalité)
+        main_domain = min(domains, key=lambda row: (-row[1], row[0]))[0]
+        subdomains = [domain for domain, _, _ in sorted(domains, key=lambda row: row[2]) if domain != main_domain]
 
         if len(subdomains) > 0:
-            return f"Présence de sous-domaines : {', '.join(subdomains)}"
+            main_domain_literal = "'" + main_domain.replace("'", "''") + "'"
+            detail = DOMAINS_CTE + f"SELECT Address, domain AS Domaine FROM domains WHERE domain != {main_domain_literal} ORDER BY id"
+            return f"Présence de sous-domaines : {', '.join(subdomains)}", detail
         else:
-            return "Aucun sous-domaine détecté"
+            return "Aucun sous-domaine détecté", None
     except Exception as e:
-        return f"Erreur lors de la vérification des sous-domaines : {e}"
+        return f"Erreur lors de la vérification des sous-domaines : {e}", None
 
-def check_links_to_404_301(conn):
-    try:
-        df_links = pd.read_sql_query("SELECT Source, Destination FROM AllOutlinks", conn)
-        df_status = pd.read_sql_query("SELECT Address, StatusCode FROM Internal", conn)
+LINKS_TO_404_301 = "FROM Internal i JOIN AllOutlinks l ON l.Destination = i.Address WHERE i.StatusCode IN (404, 301)"
 
-        df_merged = df_links.merge(df_status, left_on='Destination', right_on='Address', how='left')
-        errors = df_merged[df_merged['StatusCode'].isin([404, 301])]
+def check_links_to_404_301(data):
+    try:
+        counts = dict(data.rows(f"SELECT i.StatusCode, COUNT(*) {LINKS_TO_404_301} GROUP BY i.StatusCode ORDER BY COUNT(*) DESC"))
 
-        if not errors.empty:
-            counts = errors['StatusCode'].value_counts().to_dict()
-            return f"Liens vers pages : {counts}"
+        if counts:
+            return f"Liens vers pages : {counts}", f"SELECT l.Source, l.Destination, i.StatusCode {LINKS_TO_404_301}"
         else:
-            return "Aucun lien vers pages 404 ou 301"
+            return "Aucun lien vers pages 404 ou 301", None
     except Exception as e:
-        return f"Erreur lors de la vérification des liens : {e}"
+        return f"Erreur lors de la vérification des liens : {e}", None
 
-def check_non_indexable_pages_crawled(conn):
+def check_non_indexable_pages_crawled(data):
     try:
-        df_internal = pd.read_sql_query("SELECT Address, Indexability FROM Internal", conn)
-        non_indexable = df_internal[df_internal['Indexability'] != 'Indexable']
+        condition = "Indexability IS NOT 'Indexable'"
+        non_indexable = data.count("Internal", condition)
 
-        if not non_indexable.empty:
-            return f"{len(non_indexable)} pages non indexables crawlées"
+        if non_indexable:
+            return f"{non_indexable} pages non indexables crawlées", detail_query("Internal", condition, ["Address", "Indexability"])
         else:
-            return "Aucune page non indexable crawlée"
+            return "Aucune page non indexable crawlée", None
     except Exception as e:
-        return f"Erreur lors de la vérification des pages non indexables : {e}"
+        return f"Erreur lors de la vérification des pages non indexables : {e}", None
 
-def check_500_errors(conn):
+def check_500_errors(data):
     try:
-        df_internal = pd.read_sql_query("SELECT Address, StatusCode FROM Internal", conn)
-        errors_500 = df_internal[df_internal['StatusCode'] == 500]
+        condition = "StatusCode = 500"
+        errors_500 = data.count("Internal", condition)
 
-        if not errors_500.empty:
-            return f"{len(errors_500)} erreurs 500 détectées"
+        if errors_500:
+            return f"{errors_500} erreurs 500 détectées", detail_query("Internal", condition, ["Address", "StatusCode"])
         else:
-            return "Aucune erreur 500 détectée"
+            return "Aucune erreur 500 détectée", None
     except Exception as e:
-        return f"Erreur lors de la vérification des erreurs 500 : {e}"
+        return f"Erreur lors de la vérification des erreurs 500 : {e}", None
 
-def check_http_to_https_redirection(conn):
+def check_http_to_https_redirection(data):
     try:
-        df_redirects = pd.read_sql_query("SELECT Address, RedirectURI FROM Internal WHERE RedirectURI IS NOT NULL", conn)
-        redirects_http_to_https = df_redirects[df_redirects['Address'].str.startswith('http://') & df_redirects['RedirectURI'].str.startswith('https://')]
+        condition = "RedirectURI IS NOT NULL AND substr(Address, 1, 7) = 'http://' AND substr(RedirectURI, 1, 8) = 'https://'"
+        redirects_http_to_https = data.count("Internal", condition)
 
-        if not redirects_http_to_https.empty:
-            return f"{len(redirects_http_to_https)} redirections de http vers https détectées"
+        if redirects_http_to_https:
+            return f"{redirects_http_to_https} redirections de http vers https détectées", detail_query("Internal", condition, ["Address", "RedirectURI"])
         else:
-            return "Aucune redirection de http vers https détectée"
+            return "Aucune redirection de http vers https détectée", None
     except Exception as e:
-        return f"Erreur lors de la vérification des redirections http > https : {e}"
+        return f"Erreur lors de la vérification des redirections http > https : {e}", None
 
-def check_www_redirection(conn):
+def check_www_redirection(data):
     try:
-        df_redirects = pd.read_sql_query("SELECT Address, RedirectURI FROM Internal WHERE RedirectURI IS NOT NULL", conn)
-        redirects = df_redirects[
-            (df_redirects['Address'].str.contains('//www.')) & (~df_redirects['RedirectURI'].str.contains('//www.')) |
-            (~df_redirects['Address'].str.contains('//www.')) & (df_redirects['RedirectURI'].str.contains('//www.'))
-        ]
+        condition = "RedirectURI IS NOT NULL AND (instr(Address, '//www.') > 0) != (instr(RedirectURI, '//www.') > 0)"
+        redirects = data.count("Internal", condition)
 
-        if not redirects.empty:
-            return f"{len(redirects)} redirections www vers sans www ou inverse détectées"
+        if redirects:
+            return f"{redirects} redirections www vers sans www ou inverse détectées", detail_query("Internal", condition, ["Address", "RedirectURI"])
         else:
-            return "Aucune redirection www vers sans www ou inverse détectée"
+            return "Aucune redirection www vers sans www ou inverse détectée", None
     except Exception as e:
-        return f"Erreur lors de la vérification des redirections www : {e}"
+        return f"Erreur lors de la vérification des redirections www : {e}", None
 
-def check_trailing_slash_redirection(conn):
+def check_trailing_slash_redirection(data):
     try:
-        df_redirects = pd.read_sql_query("SELECT Address, RedirectURI FROM Internal WHERE RedirectURI IS NOT NULL", conn)
-        redirects = df_redirects[
-            (df_redirects['Address'].str.endswith('/')) & (~df_redirects['RedirectURI'].str.endswith('/')) |
-            (~df_redirects['Address'].str.endswith('/')) & (df_redirects['RedirectURI'].str.endswith('/'))
-        ]
+        condition = "RedirectURI IS NOT NULL AND (substr(Address, -1) = '/') != (substr(RedirectURI, -1) = '/')"
+        redirects = data.count("Internal", condition)
 
-        if not redirects.empty:
-            return f"{len(redirects)} redirections avec '/' vers sans '/' ou inverse détectées"
+        if redirects:
+            return f"{redirects} redirections avec '/' vers sans '/' ou inverse détectées", detail_query("Internal", condition, ["Address", "RedirectURI"])
         else:
-            return "Aucune redirection avec '/' vers sans '/' ou inverse détectée"
+            return "Aucune redirection avec '/' vers sans '/' ou inverse détectée", None
     except Exception as e:
-        return f"Erreur lors de la vérification des redirections avec '/' : {e}"
+        return f"Erreur lors de la vérification des redirections avec '/' : {e}", None
 
-def check_soft_404(conn):
+def check_soft_404(data):
     try:
-        df_internal = pd.read_sql_query("SELECT Address, StatusCode, Status FROM Internal", conn)
-        soft_404 = df_internal[df_internal['Status'] == 'Soft 404']
+        condition = "Status = 'Soft 404'"
+        soft_404 = data.count("Internal", condition)
 
-        if not soft_404.empty:
-            return f"{len(soft_404)} pages soft 404 détectées"
+        if soft_404:
+            return f"{soft_404} pages soft 404 détectées", detail_query("Internal", condition, ["Address", "Status"])
         else:
-            return "Aucune page soft 404 détectée"
+            return "Aucune page soft 404 détectée", None
     except Exception as e:
-        return f"Erreur lors de la vérification des soft 404 : {e}"
+        return f"Erreur lors de la vérification des soft 404 : {e}", None
 
-def check_meta_refresh_redirects(conn):
+def check_meta_refresh_redirects(data):
     try:
-        df_internal = pd.read_sql_query("SELECT Address, MetaRefresh FROM Internal", conn)
-        meta_refresh_redirects = df_internal[df_internal['MetaRefresh'].notnull() & df_internal['MetaRefresh'] != '']
+        condition = "MetaRefresh IS NOT NULL AND MetaRefresh != ''"
+        meta_refresh_redirects = data.count("Internal", condition)
 
-        if not meta_refresh_redirects.empty:
-            return f"{len(meta_refresh_redirects)} redirections Meta Refresh détectées"
+        if meta_refresh_redirects:
+            return f"{meta_refresh_redirects} redirections Meta Refresh détectées", detail_query("Internal", condition, ["Address", "MetaRefresh"])
         else:
-            return "Aucune redirection Meta Refresh détectée"
+            return "Aucune redirection Meta Refresh détectée", None
     except Exception as e:
-        return f"Erreur lors de la vérification des redirections Meta Refresh : {e}"
+        return f"Erreur lors de la vérification des redirections Meta Refresh : {e}", None
 
-def check_redirect_chains(conn):
+def check_redirect_chains(data):
     try:
-        df_redirect_chains = pd.read_sql_query("SELECT * FROM RedirectChains", conn)
+        redirect_chains = data.count("RedirectChains")
 
-        if not df_redirect_chains.empty:
-            return f"{len(df_redirect_chains)} chaînes de redirections détectées"
+        if redirect_chains:
+            return f"{redirect_chains} chaînes de redirections détectées", detail_query("RedirectChains", "1", ["*"])
         else:
-            return "Aucune chaîne de redirection détectée"
+            return "Aucune chaîne de redirection détectée", None
     except Exception as e:
-        return f"Erreur lors de la vérification des chaînes de redirections : {e}"
+        return f"Erreur lors de la vérification des chaînes de redirections : {e}", None
 
-def check_301_to_404(conn):
-    try:
-        df_redirects = pd.read_sql_query("SELECT Address, RedirectURI, StatusCode FROM Internal WHERE StatusCode = 301", conn)
-        df_status = pd.read_sql_query("SELECT Address, StatusCode FROM Internal", conn)
+REDIRECTS_TO_404 = "FROM Internal r JOIN Internal t ON t.Address = r.RedirectURI WHERE r.StatusCode = 301 AND t.StatusCode = 404"
 
-        df_merged = df_redirects.merge(df_status, left_on='RedirectURI', right_on='Address', how='left', suffixes=('', '_Redirected'))
-        redirects_to_404 = df_merged[df_merged['StatusCode_Redirected'] == 404]
+def check_301_to_404(data):
+    try:
+        redirects_to_404 = data.scalar(f"SELECT COUNT(*) {REDIRECTS_TO_404}")
 
-        if not redirects_to_404.empty:
-            return f"{len(redirects_to_404)} redirections 301 vers URLs en 404 détectées"
+        if redirects_to_404:
+            return f"{redirects_to_404} redirections 301 vers URLs en 404 détectées", f"SELECT r.Address, r.RedirectURI {REDIRECTS_TO_404}"
         else:
-            return "Aucune redirection 301 vers URLs en 404 détectée"
+            return "Aucune redirection 301 vers URLs en 404 détectée", None
     except Exception as e:
-        return f"Erreur lors de la vérification des redirections 301 vers 404 : {e}"
+        return f"Erreur lors de la vérification des redirections 301 vers 404 : {e}", None
 
-def check_image_sizes(conn):
+def check_image_sizes(data):
     try:
-        df_images = pd.read_sql_query("SELECT Address, Size FROM Images", conn)
-        large_images = df_images[df_images['Size'] > 100 * 1024]  # 100 ko
+        condition = f"Size > {100 * 1024}"
+        large_images = data.count("Images", condition)  # 100 ko
 
-        if not large_images.empty:
-            return f"{len(large_images)} images dépassant 100 ko"
+        if large_images:
+            return f"{large_images} images dépassant 100 ko", detail_query("Images", condition, ["Address", "Size"])
         else:
-            return "Toutes les images sont inférieures à 100 ko"
+            return "Toutes les images sont inférieures à 100 ko", None
     except Exception as e:
-        return f"Erreur lors de la vérification des tailles d'images : {e}"
+        return f"Erreur lors de la vérification des tailles d'images : {e}", None
 
-def check_alt_tags_presence(conn):
+def check_alt_tags_presence(data):
     try:
-        df_images = pd.read_sql_query("SELECT Address, AltText FROM Images", conn)
-        images_without_alt = df_images[df_images['AltText'].isnull() | (df_images['AltText'] == '')]
+        condition = "AltText IS NULL OR AltText = ''"
+        images_without_alt = data.count("Images", condition)
 
-        if not images_without_alt.empty:
-            return f"{len(images_without_alt)} images sans balise alt"
+        if images_without_alt:
+            return f"{images_without_alt} images sans balise alt", detail_query("Images", condition, ["Address", "AltText"])
         else:
-            return "Toutes les images ont une balise alt"
+            return "Toutes les images ont une balise alt", None
     except Exception as e:
-        return f"Erreur lors de la vérification des balises alt : {e}"
+        return f"Erreur lors de la vérification des balises alt : {e}", None
 
-def check_image_dimensions_attributes(conn):
+def check_image_dimensions_attributes(data):
     try:
-        df_images = pd.read_sql_query("SELECT Address, Width, Height FROM Images", conn)
-        images_without_dimensions = df_images[(df_images['Width'] == 0) | (df_images['Height'] == 0)]
+        condition = "Width = 0 OR Height = 0"
+        images_without_dimensions = data.count("Images", condition)
 
-        if not images_without_dimensions.empty:
-            return f"{len(images_without_dimensions)} images sans attributs width ou height"
+        if images_without_dimensions:
+            return f"{images_without_dimensions} images sans attributs width ou height", detail_query("Images", condition, ["Address", "Width", "Height"])
         else:
-            return "Toutes les images ont des attributs width et height"
+            return "Toutes les images ont des attributs width et height", None
     except Exception as e:
-        return f"Erreur lors de la vérification des attributs width et height : {e}"
+        return f"Erreur lors de la vérification des attributs width et height : {e}", None
 
-def check_image_formats(conn):
+def check_image_formats(data):
     try:
-        df_images = pd.read_sql_query("SELECT Address FROM Images", conn)
         allowed_formats = ['.jpg', '.jpeg', '.png', '.webp']
-        images_with_wrong_format = df_images[~df_images['Address'].str.lower().str.endswith(tuple(allowed_formats))]
+        # LIKE ignore la casse, comme le lower() de la version pandas
+        condition = " AND ".join(f"Address NOT LIKE '%{extension}'" for extension in allowed_formats)
+        images_with_wrong_format = data.count("Images", condition)
 
-        if not images_with_wrong_format.empty:
-            return f"{len(images_with_wrong_format)} images avec un format non recommandé"
+        if images_with_wrong_format:
+            return f"{images_with_wrong_format} images avec un format non recommandé", detail_query("Images", condition, ["Address"])
         else:
-            return "Toutes les images sont au format recommandé (jpeg, png, webp)"
+            return "Toutes les images sont au format recommandé (jpeg, png, webp)", None
     except Exception as e:
-        return f"Erreur lors de la vérification des formats d'images : {e}"
+        return f"Erreur lors de la vérification des formats d'images : {e}", None
 
-def check_unique_titles_h1(conn):
+def check_unique_titles_h1(data):
     try:
-        df_titles = pd.read_sql_query("SELECT Address, Title1 FROM Internal", conn)
-        df_h1 = pd.read_sql_query("SELECT Address, H1_1 FROM Internal", conn)
-
-        duplicate_titles = df_titles[df_titles.duplicated(subset='Title1', keep=False)]
-        duplicate_h1 = df_h1[df_h1.duplicated(subset='H1_1', keep=False)]
+        # Nombre de pages dont la valeur apparaît plusieurs fois (les valeurs vides comptent comme une même valeur)
+        duplicate_titles = data.scalar("SELECT COALESCE(SUM(pages), 0) FROM (SELECT COUNT(*) AS pages FROM Internal GROUP BY Title1 HAVING COUNT(*) > 1)")
+        duplicate_h1 = data.scalar("SELECT COALESCE(SUM(pages), 0) FROM (SELECT COUNT(*) AS pages FROM Internal GROUP BY H1_1 HAVING COUNT(*) > 1)")
 
         status = ""
-        if not duplicate_titles.empty:
-            status += f"{len(duplicate_titles)} titres dupliqués. "
+        if duplicate_titles:
+            status += f"{duplicate_titles} titres dupliqués. "
         else:
             status += "Titres uniques. "
 
-        if not duplicate_h1.empty:
-            status += f"{len(duplicate_h1)} H1 dupliqués."
+        if duplicate_h1:
+            status += f"{duplicate_h1} H1 dupliqués."
         else:
             status += "H1 uniques."
 
-        return status
+        detail = None
+        if duplicate_titles or duplicate_h1:
+            detail = (
+                "SELECT Address, Title1, H1_1 FROM (SELECT Address, Title1, H1_1, "
+                "COUNT(*) OVER (PARTITION BY Title1) AS titles, COUNT(*) OVER (PARTITION BY H1_1) AS h1 FROM Internal) "
+                "WHERE titles > 1 OR h1 > 1 ORDER BY Title1, H1_1"
+            )
+        return status, detail
     except Exception as e:
-        return f"Erreur lors de la vérification des titres et H1 uniques : {e}"
+        return f"Erreur lors de la vérification des titres et H1 uniques : {e}", None
 
-def check_title_length(conn):
+def check_title_length(data):
     try:
-        df_titles = pd.read_sql_query("SELECT Address, Title1, Title1Length FROM Internal", conn)
-        titles_too_long = df_titles[df_titles['Title1Length'] > 60]
+        condition = "Title1Length > 60"
+        titles_too_long = data.count("Internal", condition)
 
-        if not titles_too_long.empty:
-            return f"{len(titles_too_long)} titres dépassant 60 caractères"
+        if titles_too_long:
+            return f"{titles_too_long} titres dépassant 60 caractères", detail_query("Internal", condition, ["Address", "Title1", "Title1Length"])
         else:
-            return "Tous les titres ont une longueur adéquate"
+            return "Tous les titres ont une longueur adéquate", None
     except Exception as e:
-        return f"Erreur lors de la vérification de la longueur des titres : {e}"
+        return f"Erreur lors de la vérification de la longueur des titres : {e}", None
 
-def check_pages_indexability(conn):
+def check_pages_indexability(data):
     try:
-        df_internal = pd.read_sql_query("SELECT Address, Indexability, MetaRobots, MetaRobots_1_Directive FROM Internal", conn)
-        non_indexable_pages = df_internal[df_internal['Indexability'] != 'Indexable']
+        condition = "Indexability IS NOT 'Indexable'"
+        non_indexable_pages = data.count("Internal", condition)
 
-        if not non_indexable_pages.empty:
-            return f"{len(non_indexable_pages)} pages non indexables détectées"
+        if non_indexable_pages:
+            return f"{non_indexable_pages} pages non indexables détectées", detail_query("Internal", condition, ["Address", "Indexability"])
         else:
-            return "Toutes les pages sont indexables"
+            return "Toutes les pages sont indexables", None
     except Exception as e:
-        return f"Erreur lors de la vérification de l'indexabilité des pages : {e}"
+        return f"Erreur lors de la vérification de l'indexabilité des pages : {e}", None
 
-def check_hreflang(conn):
+def check_hreflang(data):
     try:
-        df_hreflang = pd.read_sql_query("SELECT * FROM Hreflang", conn)
-
-        if not df_hreflang.empty:
-            return "Balises hreflang présentes"
+        if data.count("Hreflang"):
+            return "Balises hreflang présentes", None
         else:
-            return "Aucune balise hreflang détectée"
+            return "Aucune balise hreflang détectée", None
     except Exception as e:
-        return f"Erreur lors de la vérification des hreflang : {e}"
+        return f"Erreur lors de la vérification des hreflang : {e}", None
 
-def check_x_default(conn):
+def check_x_default(data):
     try:
-        df_hreflang = pd.read_sql_query("SELECT * FROM Hreflang", conn)
-        x_default_present = df_hreflang['Lang'].str.lower().eq('x-default').any()
+        x_default_present = data.count("Hreflang", "lower(Lang) = 'x-default'") > 0
 
         if x_default_present:
-            return "Balise x-default présente dans les hreflang"
+            return "Balise x-default présente dans les hreflang", None
         else:
-            return "Aucune balise x-default détectée"
+            return "Aucune balise x-default détectée", None
     except Exception as e:
-        return f"Erreur lors de la vérification de la balise x-default : {e}"
+        return f"Erreur lors de la vérification de la balise x-default : {e}", None
 
-def check_html_lang_attribute(conn):
+def check_html_lang_attribute(data):
     try:
-        df_internal = pd.read_sql_query("SELECT Address, HTMLLang FROM Internal", conn)
-        pages_without_lang = df_internal[df_internal['HTMLLang'].isnull() | (df_internal['HTMLLang'] == '')]
+        condition = "HTMLLang IS NULL OR HTMLLang = ''"
+        pages_without_lang = data.count("Internal", condition)
 
-        if not pages_without_lang.empty:
-            return f"{len(pages_without_lang)} pages sans attribut lang dans <html>"
+        if pages_without_lang:
+            return f"{pages_without_lang} pages sans attribut lang dans <html>", detail_query("Internal", condition, ["Address", "HTMLLang"])
         else:
-            return "Toutes les pages ont un attribut lang dans <html>"
+            return "Toutes les pages ont un attribut lang dans <html>", None
     except Exception as e:
-        return f"Erreur lors de la vérification de l'attribut lang dans <html> : {e}"
+        return f"Erreur lors de la vérification de l'attribut lang dans <html> : {e}", None
 
-def check_html5_usage(conn):
+def check_html5_usage(data):
     try:
-        df_internal = pd.read_sql_query("SELECT Address, DocType FROM Internal", conn)
-        pages_with_html5 = df_internal[df_internal['DocType'].str.contains('html', case=False, na=False)]
+        condition = "DocType IS NULL OR DocType NOT LIKE '%html%'"
+        pages_without_html5 = data.count("Internal", condition)
 
-        if len(pages_with_html5) == len(df_internal):
-            return "Toutes les pages utilisent le doctype HTML5"
+        if not pages_without_html5:
+            return "Toutes les pages utilisent le doctype HTML5", None
         else:
-            return f"{len(df_internal) - len(pages_with_html5)} pages n'utilisent pas le doctype HTML5"
+            return f"{pages_without_html5} pages n'utilisent pas le doctype HTML5", detail_query("Internal", condition, ["Address", "DocType"])
     except Exception as e:
-        return f"Erreur lors de la vérification de l'utilisation de HTML5 : {e}"
+        return f"Erreur lors de la vérification de l'utilisation de HTML5 : {e}", None
 
-def check_viewport_meta(conn):
+def check_viewport_meta(data):
     try:
-        df_internal = pd.read_sql_query("SELECT Address, MetaViewport FROM Internal", conn)
-        pages_without_viewport = df_internal[df_internal['MetaViewport'].isnull() | (df_internal['MetaViewport'] == '')]
+        condition = "MetaViewport IS NULL OR MetaViewport = ''"
+        pages_without_viewport = data.count("Internal", condition)
 
-        if not pages_without_viewport.empty:
-            return f"{len(pages_without_viewport)} pages sans balise meta viewport"
+        if pages_without_viewport:
+            return f"{pages_without_viewport} pages sans balise meta viewport", detail_query("Internal", condition, ["Address", "MetaViewport"])
         else:
-            return "Toutes les pages ont une balise meta viewport"
+            return "Toutes les pages ont une balise meta viewport", None
     except Exception as e:
-        return f"Erreur lors de la vérification de la balise viewport : {e}"
+        return f"Erreur lors de la vérification de la balise viewport : {e}", None
 
-def check_ssl_certificate(conn):
+def check_ssl_certificate(data):
     try:
-        df_internal = pd.read_sql_query("SELECT Address, Protocol, Secure FROM Internal", conn)
-        insecure_pages = df_internal[df_internal['Secure'] == 0]
+        condition = "Secure = 0"
+        insecure_pages = data.count("Internal", condition)
 
-        if not insecure_pages.empty:
-            return f"{len(insecure_pages)} pages non sécurisées détectées"
+        if insecure_pages:
+            return f"{insecure_pages} pages non sécurisées détectées", detail_query("Internal", condition, ["Address", "Protocol"])
         else:
-            return "Toutes les pages sont sécurisées avec SSL"
+            return "Toutes les pages sont sécurisées avec SSL", None
     except Exception as e:
-        return f"Erreur lors de la vérification du certificat SSL : {e}"
+        return f"Erreur lors de la vérification du certificat SSL : {e}", None
 
-def check_multilingual_handling(conn):
+def check_multilingual_handling(data):
     try:
-        df_internal = pd.read_sql_query("SELECT Address FROM Internal", conn)
-        if df_internal['Address'].str.contains('/fr/|/en/|/es/').any():
-            return "Multilingue bien géré avec des sous-dossiers"
+        # instr() respecte la casse, comme str.contains
+        if data.count("Internal", "instr(Address, '/fr/') > 0 OR instr(Address, '/en/') > 0 OR instr(Address, '/es/') > 0"):
+            return "Multilingue bien géré avec des sous-dossiers", None
         else:
-            return "Pas de gestion de multilingue via sous-dossiers"
+            return "Pas de gestion de multilingue via sous-dossiers", None
     except Exception as e:
-        return f"Erreur lors de la vérification du multilingue : {e}"
+        return f"Erreur lors de la vérification du multilingue : {e}", None
 
-def check_internal_search_optimization(conn):
+def check_internal_search_optimization(data):
     try:
-        df_internal = pd.read_sql_query("SELECT Address FROM Internal", conn)
-        search_pages = df_internal[df_internal['Address'].str.contains('search')]
-        if not search_pages.empty:
-            return "Moteur de recherche interne détecté"
+        if data.count("Internal", "instr(Address, 'search') > 0"):
+            return "Moteur de recherche interne détecté", None
         else:
-            return "Aucun moteur de recherche interne détecté"
+            return "Aucun moteur de recherche interne détecté", None
     except Exception as e:
-        return f"Erreur lors de la vérification du moteur de recherche interne : {e}"
+        return f"Erreur lors de la vérification du moteur de recherche interne : {e}", None
 
-def check_lazy_loading(conn):
+def check_lazy_loading(data):
     try:
-        df_internal = pd.read_sql_query("SELECT Address, LazyLoaded FROM Images", conn)
-        lazy_loaded_images = df_internal[df_internal['LazyLoaded'] == 'Yes']
-        if not lazy_loaded_images.empty:
-            return f"{len(lazy_loaded_images)} images avec lazy loading"
+        lazy_loaded_images = data.count("Images", "LazyLoaded = 'Yes'")
+        if lazy_loaded_images:
+            return f"{lazy_loaded_images} images avec lazy loading", None
         else:
-            return "Pas d'images avec lazy loading"
+            return "Pas d'images avec lazy loading", None
     except Exception as e:
-        return f"Erreur lors de la vérification du lazy loading : {e}"
+        return f"Erreur lors de la vérification du lazy loading : {e}", None
 
-def check_internal_links_with_utm(conn):
+def check_internal_links_with_utm(data):
     try:
-        df_links = pd.read_sql_query("SELECT Address FROM AllOutlinks WHERE Address LIKE '%utm_%'", conn)
-        if not df_links.empty:
-            return f"{len(df_links)} liens internes avec des paramètres UTM détectés"
+        condition = "Address LIKE '%utm_%'"
+        links_with_utm = data.count("AllOutlinks", condition)
+        if links_with_utm:
+            return f"{links_with_utm} liens internes avec des paramètres UTM détectés", detail_query("AllOutlinks", condition, ["Source", "Address"])
         else:
-            return "Aucun lien interne avec des paramètres UTM"
+            return "Aucun lien interne avec des paramètres UTM", None
     except Exception as e:
-        return f"Erreur lors de la vérification des liens UTM : {e}"
+        return f"Erreur lors de la vérification des liens UTM : {e}", None
 
-def check_hn_structure(conn):
+def check_hn_structure(data):
     try:
-        df_hn = pd.read_sql_query("SELECT Address, H1_1, H2_1, H3_1 FROM Internal", conn)
-
-        empty_hn = df_hn[(df_hn['H1_1'].isnull()) | (df_hn['H2_1'].isnull()) | (df_hn['H3_1'].isnull())]
-        if not empty_hn.empty:
-            return f"{len(empty_hn)} pages avec des balises Hn vides"
+        condition = "H1_1 IS NULL OR H2_1 IS NULL OR H3_1 IS NULL"
+        empty_hn = data.count("Internal", condition)
+        if empty_hn:
+            return f"{empty_hn} pages avec des balises Hn vides", detail_query("Internal", condition, ["Address", "H1_1", "H2_1", "H3_1"])
         else:
-            return "Toutes les pages ont des balises Hn bien remplies"
+            return "Toutes les pages ont des balises Hn bien remplies", None
     except Exception as e:
-        return f"Erreur lors de la vérification des balises Hn : {e}"
+        return f"Erreur lors de la vérification des balises Hn : {e}", None
 
-def check_page_speed(conn):
+def check_page_speed(data):
     try:
-        df_pages = pd.read_sql_query("SELECT Address, LoadTime FROM Internal", conn)
-        slow_pages = df_pages[df_pages['LoadTime'] > 3000]  # Temps de chargement supérieur à 3 secondes
-        if not slow_pages.empty:
-            return f"{len(slow_pages)} pages avec un temps de chargement supérieur à 3 secondes"
+        condition = "LoadTime > 3000"  # Temps de chargement supérieur à 3 secondes
+        slow_pages = data.count("Internal", condition)
+        if slow_pages:
+            return f"{slow_pages} pages avec un temps de chargement supérieur à 3 secondes", detail_query("Internal", condition, ["Address", "LoadTime"])
         else:
-            return "Toutes les pages ont un temps de chargement inférieur à 3 secondes"
+            return "Toutes les pages ont un temps de chargement inférieur à 3 secondes", None
     except Exception as e:
-        return f"Erreur lors de la vérification du temps de chargement : {e}"
+        return f"Erreur lors de la vérification du temps de chargement : {e}", None
 
-def check_cdn_usage(conn):
+def check_cdn_usage(data):
     try:
-        df_resources = pd.read_sql_query("SELECT Address FROM Images UNION SELECT Address FROM CSS UNION SELECT Address FROM JS", conn)
-        cdn_usage = df_resources[df_resources['Address'].str.contains('cdn')]
-        if not cdn_usage.empty:
-            return "Utilisation d'un CDN détectée"
+        cdn_usage = data.scalar(
+            "SELECT EXISTS (SELECT 1 FROM (SELECT Address FROM Images UNION SELECT Address FROM CSS UNION SELECT Address FROM JS) "
+            "WHERE instr(Address, 'cdn') > 0)"
+        )
+        if cdn_usage:
+            return "Utilisation d'un CDN détectée", None
         else:
-            return "Aucun CDN détecté"
+            return "Aucun CDN détecté", None
     except Exception as e:
-        return f"Erreur lors de la vérification de l'utilisation d'un CDN : {e}"
+        return f"Erreur lors de la vérification de l'utilisation d'un CDN : {e}", None
 
-def check_page_size(conn):
+def check_page_size(data):
     try:
-        df_pages = pd.read_sql_query("SELECT Address, TotalSize FROM Internal", conn)
-        large_pages = df_pages[df_pages['TotalSize'] > 4 * 1024 * 1024]  # Pages de plus de 4 Mo
-        if not large_pages.empty:
-            return f"{len(large_pages)} pages dépassant 4 Mo"
+        condition = f"TotalSize > {4 * 1024 * 1024}"  # Pages de plus de 4 Mo
+        large_pages = data.count("Internal", condition)
+        if large_pages:
+            return f"{large_pages} pages dépassant 4 Mo", detail_query("Internal", condition, ["Address", "TotalSize"])
         else:
-            return "Toutes les pages sont inférieures à 4 Mo"
+            return "Toutes les pages sont inférieures à 4 Mo", None
     except Exception as e:
-        return f"Erreur lors de la vérification de la taille des pages : {e}"
+        return f"Erreur lors de la vérification de la taille des pages : {e}", None
 
-def check_unused_scripts(conn):
+def check_unused_scripts(data):
     try:
-        df_scripts = pd.read_sql_query("SELECT Address, UnusedScripts FROM Internal WHERE UnusedScripts IS NOT NULL", conn)
-        if not df_scripts.empty:
-            return f"{len(df_scripts)} pages avec des scripts inutilisés"
+        condition = "UnusedScripts IS NOT NULL"
+        pages_with_unused_scripts = data.count("Internal", condition)
+        if pages_with_unused_scripts:
+            return f"{pages_with_unused_scripts} pages avec des scripts inutilisés", detail_query("Internal", condition, ["Address", "UnusedScripts"])
         else:
-            return "Aucun script inutilisé détecté"
+            return "Aucun script inutilisé détecté", None
     except Exception as e:
-        return f"Erreur lors de la vérification des scripts inutilisés : {e}"
+        return f"Erreur lors de la vérification des scripts inutilisés : {e}", None
 
-def check_browser_cache(conn):
+def check_browser_cache(data):
     try:
-        df_headers = pd.read_sql_query("SELECT Address, CacheControl FROM Internal", conn)
-        no_cache_pages = df_headers[df_headers['CacheControl'].isnull() | (df_headers['CacheControl'] == '')]
+        condition = "CacheControl IS NULL OR CacheControl = ''"
+        no_cache_pages = data.count("Internal", condition)
 
-        if not no_cache_pages.empty:
-            return f"{len(no_cache_pages)} pages sans cache navigateur activé"
+        if no_cache_pages:
+            return f"{no_cache_pages} pages sans cache navigateur activé", detail_query("Internal", condition, ["Address", "CacheControl"])
         else:
-            return "Toutes les pages ont le cache navigateur activé"
+            return "Toutes les pages ont le cache navigateur activé", None
     except Exception as e:
-        return f"Erreur lors de la vérification du cache navigateur : {e}"
+        return f"Erreur lors de la vérification du cache navigateur : {e}", None
 
-def check_inline_css(conn):
+def check_inline_css(data):
     try:
-        df_css = pd.read_sql_query("SELECT Address, InlineCSS FROM Internal", conn)
-        pages_with_inline_css = df_css[df_css['InlineCSS'] > 0]
-        if not pages_with_inline_css.empty:
-            return f"{len(pages_with_inline_css)} pages avec du CSS en ligne"
+        condition = "InlineCSS > 0"
+        pages_with_inline_css = data.count("Internal", condition)
+        if pages_with_inline_css:
+            return f"{pages_with_inline_css} pages avec du CSS en ligne", detail_query("Internal", condition, ["Address", "InlineCSS"])
         else:
-            return "Aucune page avec du CSS en ligne"
+            return "Aucune page avec du CSS en ligne", None
     except Exception as e:
-        return f"Erreur lors de la vérification du CSS en ligne : {e}"
+        return f"Erreur lors de la vérification du CSS en ligne : {e}", None
 
-def check_pagespeed_score(conn):
+def check_pagespeed_score(data):
     try:
-        df_speed = pd.read_sql_query("SELECT Address, PageSpeedScore FROM Internal", conn)
-        low_score_pages = df_speed[df_speed['PageSpeedScore'] < 80]
-        if not low_score_pages.empty:
-            return f"{len(low_score_pages)} pages avec un score PageSpeed inférieur à 80"
+        condition = "PageSpeedScore < 80"
+        low_score_pages = data.count("Internal", condition)
+        if low_score_pages:
+            return f"{low_score_pages} pages avec un score PageSpeed inférieur à 80", detail_query("Internal", condition, ["Address", "PageSpeedScore"])
         else:
-            return "Toutes les pages ont un score PageSpeed supérieur à 80"
+            return "Toutes les pages ont un score PageSpeed supérieur à 80", None
     except Exception as e:
-        return f"Erreur lors de la vérification du score PageSpeed : {e}"
+        return f"Erreur lors de la vérification du score PageSpeed : {e}", None
 
-def check_dns_prefetching(conn):
+def check_dns_prefetching(data):
     try:
-        df_headers = pd.read_sql_query("SELECT Address, DNSPrefetch FROM Internal WHERE DNSPrefetch IS NOT NULL", conn)
-        if not df_headers.empty:
-            return "DNS Prefetching activé"
+        if data.count("Internal", "DNSPrefetch IS NOT NULL"):
+            return "DNS Prefetching activé", None
         else:
-            return "DNS Prefetching non activé"
+            return "DNS Prefetching non activé", None
     except Exception as e:
-        return f"Erreur lors de la vérification du DNS Prefetching : {e}"
+        return f"Erreur lors de la vérification du DNS Prefetching : {e}", None
 
-def check_server_type(conn):
+def check_server_type(data):
     try:
-        df_headers = pd.read_sql_query("SELECT Address, Server FROM Internal", conn)
-        if df_headers['Server'].str.contains('dedicated').any():
-            return "Serveur dédié détecté"
+        if data.count("Internal", "instr(Server, 'dedicated') > 0"):
+            return "Serveur dédié détecté", None
         else:
-            return "Serveur mutualisé détecté"
+            return "Serveur mutualisé détecté", None
     except Exception as e:
-        return f"Erreur lors de la vérification du type de serveur : {e}"
+        return f"Erreur lors de la vérification du type de serveur : {e}", None
+
+
+# Liste des critères avec leur fonction de vérification
+CRITERIA = [
+    {"criterion": "Vérifier le robots.txt (Règles, Sitemap présent)", "function": check_robots_txt},
+    {"criterion": "Vérifier le Sitemap (Pages non indexables / Orphelines)", "function": check_sitemap},
+    {"criterion": "Présence de sous-domaines", "function": check_subdomains},
+    {"criterion": "Liens vers pages 404 / 301", "function": check_links_to_404_301},
+    {"criterion": "Pages non indexables crawlées", "function": check_non_indexable_pages_crawled},
+    {"criterion": "Erreurs 500", "function": check_500_errors},
+    {"criterion": "Redirection http > https", "function": check_http_to_https_redirection},
+    {"criterion": "Redirection www > sans www (ou inverse)", "function": check_www_redirection},
+    {"criterion": "Redirection avec '/' > sans '/' (ou inverse)", "function": check_trailing_slash_redirection},
+    {"criterion": "Soft 404", "function": check_soft_404},
+    {"criterion": "Présence de redirections Meta Refresh", "function": check_meta_refresh_redirects},
+    {"criterion": "Chaînes de redirections", "function": check_redirect_chains},
+    {"criterion": "Redirections 301 vers URLs en 404", "function": check_301_to_404},
+    {"criterion": "Poids des images (> 100 ko)", "function": check_image_sizes},
+    {"criterion": "Balises Alt présentes pour chaque image", "function": check_alt_tags_presence},
+    {"criterion": "Attributs width= & height= dans les images", "function": check_image_dimensions_attributes},
+    {"criterion": "Format des images (jpeg / WebP)", "function": check_image_formats},
+    {"criterion": "Balises Titles et H1 uniques", "function": check_unique_titles_h1},
+    {"criterion": "Longueur des balises title", "function": check_title_length},
+    {"criterion": "Vérification de l'indexabilité des pages", "function": check_pages_indexability},
+    {"criterion": "Présence de hreflang", "function": check_hreflang},
+    {"criterion": "Balise X-default présente", "function": check_x_default},
+    {"criterion": "Langue dans la balise <html>", "function": check_html_lang_attribute},
+    {"criterion": "Utilisation de balises HTML5", "function": check_html5_usage},
+    {"criterion": "Présence de la balise viewport", "function": check_viewport_meta},
+    {"criterion": "Certificat SSL présent et sécurisé", "function": check_ssl_certificate},
+    {"criterion": "Vérifier la gestion du multilingue (TLD / Dossier / Sous-domaine)", "function": check_multilingual_handling},
+    {"criterion": "Vérification de l'optimisation du moteur de recherche interne", "function": check_internal_search_optimization},
+    {"criterion": "Lazy Loading des images", "function": check_lazy_loading},
+    {"criterion": "Liens internes contenant des UTM", "function": check_internal_links_with_utm},
+    {"criterion": "Structure Hn (Ordre, Hn Structurel, Hn Vides)", "function": check_hn_structure},
+    {"criterion": "Vitesse de chargement du site", "function": check_page_speed},
+    {"criterion": "Utilisation d'un CDN", "function": check_cdn_usage},
+    {"criterion": "Taille des pages inférieures à 4Mo", "function": check_page_size},
+    {"criterion": "Présence de scripts inutilisés dans le code source", "function": check_unused_scripts},
+    {"criterion": "Cache navigateur activé", "function": check_browser_cache},
+    {"criterion": "Présence de CSS dans le code HTML", "function": check_inline_css},
+    {"criterion": "Score Optimisation Pagespeed", "function": check_pagespeed_score},
+    {"criterion": "Utilisation de DNS Prefetching", "function": check_dns_prefetching},
+    {"criterion": "Serveur mutualisé ou dédié", "function": check_server_type}
+]
@@ -0,0 +1,126 @@
+"""Banc d'essai de l'audit technique express sur une base de crawl générée.
+
+Crée une base SQLite au format des exports Screaming Frog (1 million de liens par défaut),
+puis lance l'audit complet deux fois (sur place sans index, puis indexée comme une copie du cache)
+et construit le classeur détaillé des critères en échec.
+
+    python -m scripts.AudittechexpressBenchmark --links 1000000 --pages 100000
+"""
+
+import argparse
+import os
+import random
+import resource
+import sqlite3
+import tempfile
+import time
+
+from scripts.Audittechexpress import CRITERIA, MAX_WORKERS, export_details, run_audit
+from scripts.CrawlDatabase import build_indexes
+
+INTERNAL_COLUMNS = [
+    "Address", "StatusCode", "Status", "Indexability", "RedirectURI", "MetaRefresh", "Title1", "Title1Length",
+    "H1_1", "H2_1", "H3_1", "MetaRobots", "MetaRobots_1_Directive", "HTMLLang", "DocType", "MetaViewport",
+    "Protocol", "Secure", "LoadTime", "TotalSize", "UnusedScripts", "CacheControl", "InlineCSS",
+    "PageSpeedScore", "DNSPrefetch", "Server",
+]
+
+def generate_fixture(path, pages, links, images, seed=0):
+    """Base de crawl synthétique : pages internes, liens sortants, images, sitemap, robots.txt, hreflang."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE Internal ({', '.join(INTERNAL_COLUMNS)})")
+    conn.execute("CREATE TABLE AllOutlinks (Source, Destination, Address)")
+    conn.execute("CREATE TABLE Images (Address, Size, AltText, Width, Height, LazyLoaded)")
+    for table in ("CSS", "JS", "Sitemaps", "RedirectChains"):
+        conn.execute(f"CREATE TABLE {table} (Address)")
+    conn.execute("CREATE TABLE RobotsTxt (Content)")
+    conn.execute("CREATE TABLE Hreflang (Address, Lang)")
+
+    addresses = [
+        f"{rng.choice(['http', 'https'])}://{rng.choice(['www.example.com'] * 8 + ['example.com', 'blog.example.com'])}"
+        f"/{rng.choice(['fr/', 'en/', '', 'search/'])}page-{i}{rng.choice(['', '/'])}"
+        for i in range(pages)
+    ]
+
+    def internal_rows():
+        for i, address in enumerate(addresses):
+            status_code = rng.choice([200] * 8 + [301, 404, 500])
+            yield (
+                address, status_code, rng.choice(["OK", "Soft 404"]), rng.choice(["Indexable", "Non-Indexable"]),
+                rng.choice(addresses) if status_code == 301 else None, rng.choice([None, "", "0;url=/"]),
+                rng.choice([f"Titre {i}", "Titre dupliqué", None]), rng.randint(10, 90),
+                rng.choice([f"H1 {i}", "H1 dupliqué", None]), rng.choice(["H2", None]), rng.choice(["H3", None]),
+                None, None, rng.choice(["fr", "", None]), rng.choice(["<!DOCTYPE html>", None]),
+                rng.choice(["width=device-width", None]), address.split(":")[0], int(address.startswith("https")),
+                rng.random() * 6000, rng.randint(0, 6 * 1024 * 1024), rng.choice(["script.js", None]),
+                rng.choice(["max-age=3600", None]), rng.randint(0, 3), rng.random() * 100,
+                rng.choice(["//cdn.example.com", None]), rng.choice(["nginx", "dedicated"]),
+            )
+
+    def outlink_rows():
+        for _ in range(links):
+            destination = rng.choice(addresses) if rng.random() < 0.9 else "https://external.example.org/"
+            yield rng.choice(addresses), destination, destination + rng.choice(["", "", "?utm_source=newsletter"])
+
+    def image_rows():
+        for i in range(images):
+            yield (
+                f"https://{rng.choice(['cdn.example.com', 'www.example.com'])}/img-{i}{rng.choice(['.jpg', '.png', '.gif', '.webp'])}",
+                rng.randint(0, 300 * 1024), rng.choice(["alt", "", None]), rng.choice([0, 800]), rng.choice([0, 600]),
+                rng.choice(["Yes", "No"]),
+            )
+
+    conn.executemany(f"INSERT INTO Internal VALUES ({', '.join('?' * len(INTERNAL_COLUMNS))})", internal_rows())
+    conn.executemany("INSERT INTO AllOutlinks VALUES (?, ?, ?)", outlink_rows())
+    conn.executemany("INSERT INTO Images VALUES (?, ?, ?, ?, ?, ?)", image_rows())
+    conn.executemany("INSERT INTO Sitemaps VALUES (?)", ((rng.choice(addresses),) for _ in range(pages // 10)))
+    conn.execute("INSERT INTO CSS VALUES ('https://www.example.com/style.css')")
+    conn.execute("INSERT INTO JS VALUES ('https://www.example.com/app.js')")
+    conn.execute("INSERT INTO RobotsTxt VALUES ('User-agent: *\nSitemap: https://www.example.com/sitemap.xml')")
+    conn.execute("INSERT INTO Hreflang VALUES ('https://www.example.com/', 'x-default')")
+    conn.commit()
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai de l'audit technique express")
+    parser.add_argument("--links", type=int, default=1_000_000)
+    parser.add_argument("--pages", type=int, default=100_000)
+    parser.add_argument("--images", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Nombre de vérifications exécutées en parallèle")
+    parser.add_argument("--db", help="Base existante à réutiliser (sinon une base temporaire est générée)")
+    args = parser.parse_args()
+
+    # La base générée (sans --db) est supprimée avec son dossier temporaire à la fin du banc d'essai
+    with tempfile.TemporaryDirectory() as temp_dir:
+        run_benchmark(args.db or os.path.join(temp_dir, "benchmark.dbseospider"), args)
+
+def run_benchmark(path, args):
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        generate_fixture(path, args.pages, args.links, args.images)
+        print(f"Base générée en {time.perf_counter() - start:.1f} s : {path} ({os.path.getsize(path) / 1e6:.0f} Mo)")
+
+    for run, in_place in (("base sur place", True), ("copie indexée du cache", False)):
+        if not in_place:
+            start = time.perf_counter()
+            build_indexes(path)
+            print(f"Index construits (comme à l'import) en {time.perf_counter() - start:.2f} s")
+        start = time.perf_counter()
+        results, details, scan_timings = run_audit(path, CRITERIA, max_workers=args.workers, in_place=in_place)
+        print(f"Audit ({run}) : {time.perf_counter() - start:.2f} s pour {len(results)} critères")
+        print("  Parcours groupés : " + ", ".join(f"{table} {duration:.2f} s" for table, duration in scan_timings.items()))
+
+    start = time.perf_counter()
+    output = export_details(path, details)
+    output.seek(0, os.SEEK_END)
+    print(f"Export détaillé ({len(details)} onglets) : {time.perf_counter() - start:.2f} s, {output.tell() / 1e6:.0f} Mo")
+    output.close()
+
+    # ru_maxrss est en kilo-octets sous Linux
+    print(f"Mémoire maximale du processus : {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} Mo")
+    for result in sorted(results, key=lambda result: -result["Durée (s)"]):
+        print(f"- [{result['Durée (s)']:.3f} s] {result['Critère']} : {result['Statut']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Bases de crawl Screaming Frog (.dbseospider) partagées par les pages Audittechexpress et TableSF.
+
+Chaque base importée est copiée une seule fois dans un cache adressé par son contenu : le fichier est
+nommé d'après l'empreinte SHA-256 du fichier importé, ses index sont construits avant sa publication
+(renommage atomique), puis il n'est plus jamais modifié et peut être ouvert en lecture seule immuable.
+"""
+
+import streamlit as st
+import sqlite3
+import os
+import hashlib
+import shutil
+import threading
+import time
+from urllib.parse import quote
+
+UPLOAD_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "dbseospider", "uploads")
+UPLOAD_CACHE_MAX_FILES = 5
+# Une base utilisée depuis moins longtemps que ce délai n'est jamais évincée, même au-delà du nombre maximum
+UPLOAD_CACHE_MIN_AGE = 2 * 60 * 60
+COPY_CHUNK_SIZE = 16 * 1024 * 1024
+# Lecture des bases par projection mémoire (PRAGMA mmap_size)
+MMAP_SIZE = 1024 * 1024 * 1024
+
+# Index des jointures de l'audit (pages liées, redirections, sitemap), construits à l'import
+CRAWL_INDEXES = [("Internal", "Address"), ("AllOutlinks", "Destination")]
+
+def quote_identifier(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def connect_read_only(db_path, immutable=True, check_same_thread=True):
+    """Connexion en lecture seule ; `immutable` seulement pour les copies du cache, qui ne changent jamais."""
+    uri = f"file:{quote(os.path.abspath(db_path))}?mode=ro" + ("&immutable=1" if immutable else "")
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=check_same_thread)
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    return conn
+
+def build_indexes(db_path, indexes=CRAWL_INDEXES):
+    """Crée les index dont la table et la colonne existent ; les autres erreurs SQLite sont propagées."""
+    conn = sqlite3.connect(db_path)
+    try:
+        for table, column in indexes:
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table)})")]
+            if column not in columns:
+                continue
+            index_name = quote_identifier(f"audit_{table}_{column}")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {quote_identifier(table)} ({quote_identifier(column)})")
+        conn.commit()
+    finally:
+        conn.close()
+
+def upload_cache_path(uploaded_file):
+    digest = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+    return os.path.join(UPLOAD_CACHE_DIR, f"{digest}.dbseospider")
+
+def store_upload(uploaded_file, path=None):
+    """Copie le fichier dans le cache (sauf s'il y est déjà), index compris ; renvoie le chemin."""
+    path = path or upload_cache_path(uploaded_file)
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+
+    os.makedirs(UPLOAD_CACHE_DIR, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        uploaded_file.seek(0)
+        with open(temp_path, "wb") as f:
+            shutil.copyfileobj(uploaded_file, f, COPY_CHUNK_SIZE)
+        build_indexes(temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    evict_uploads(keep=path)
+    return path
+
+def evict_uploads(keep=None):
+    """Ne garde que les UPLOAD_CACHE_MAX_FILES bases utilisées le plus récemment, sauf celles utilisées récemment.
+
+    Les fichiers temporaires laissés par un import interrompu suivent la même règle d'âge.
+    """
+    entries = [os.path.join(UPLOAD_CACHE_DIR, name) for name in os.listdir(UPLOAD_CACHE_DIR)]
+    cached = sorted((path for path in entries if path.endswith(".dbseospider")), key=os.path.getmtime, reverse=True)
+    leftovers = [path for path in entries if path.endswith((".tmp", ".tmp-journal"))]
+    now = time.time()
+    for path in cached[UPLOAD_CACHE_MAX_FILES:] + leftovers:
+        try:
+            if path != keep and now - os.path.getmtime(path) > UPLOAD_CACHE_MIN_AGE:
+                os.remove(path)
+        except OSError:
+            pass
+
+def ensure_upload(uploaded_file, path=None):
+    """Chemin de la copie en cache, recopiée si elle a été évincée, et marquée comme utilisée.
+
+    Renvoie None (avec un message d'erreur) si le fichier importé n'est pas une base SQLite lisible.
+    """
+    if path is not None:
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            pass
+    try:
+        return store_upload(uploaded_file, path)
+    except sqlite3.DatabaseError as e:
+        st.error(f"Le fichier {uploaded_file.name} n'est pas une base .dbseospider lisible : {e}")
+        return None
+
+def cached_upload_path(uploaded_file):
+    """Chemin de la copie en cache (ou None) ; l'empreinte n'est calculée qu'une fois par fichier importé et par session."""
+    key = f"dbseospider_upload_{uploaded_file.file_id}"
+    path = st.session_state.get(key)
+    if path is not None and os.path.exists(path):
+        return ensure_upload(uploaded_file, path)
+    with st.spinner("Copie de la base dans le cache..."):
+        path = ensure_upload(uploaded_file, path)
+    if path is not None:
+        st.session_state[key] = path
+    return path
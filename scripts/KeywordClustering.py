@@ -1,33 +1,115 @@
 import streamlit as st
 import pandas as pd
 from openai import OpenAI
-from sklearn.cluster import KMeans
+from sklearn.cluster import HDBSCAN, MiniBatchKMeans
+from sklearn.preprocessing import normalize
 import numpy as np
 from collections import defaultdict
+import hashlib
+import os
 import re
+import sqlite3
+from contextlib import closing
 
-# Initialiser le client OpenAI
+# Initialiser le client OpenAI (base_url optionnelle, par exemple pour un serveur d'embeddings local)
 @st.cache_resource
 def get_openai_client():
-    return OpenAI(api_key=st.secrets["openai_api_key"])
+    return OpenAI(api_key=st.secrets["openai_api_key"], base_url=st.secrets.get("openai_base_url"))
 
-client = get_openai_client()
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_BATCH_SIZE = 500
+EMBEDDING_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "keywordclustering", "embeddings.sqlite")
 
-@st.cache_data
-def get_embedding(text, model="text-embedding-3-small"):
-    text = text.replace("\n", " ")
-    return client.embeddings.create(input=[text], model=model).data[0].embedding
+class EmbeddingCache:
+    """Cache SQLite des vecteurs d'embedding, indexés par empreinte (modèle + texte)."""
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+
+    @staticmethod
+    def key(text, model):
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        found = {}
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for key, vector in conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk):
+                    found[key] = np.frombuffer(vector, dtype=np.float32)
+        return found
+
+    def put_many(self, items):
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                             [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()])
+
+def get_embeddings(texts, model=EMBEDDING_MODEL, cache=None, batch_size=EMBEDDING_BATCH_SIZE, embedding_client=None, progress_callback=None):
+    """Retourne la matrice d'embeddings des textes ; seuls les textes absents du cache sont envoyés, par lots."""
+    embedding_client = embedding_client or get_openai_client()
+    cache = cache or EmbeddingCache()
+    texts = [str(text).replace("\n", " ").strip() or " " for text in texts]
+    keys = [EmbeddingCache.key(text, model) for text in texts]
+    vectors = cache.get_many(list(dict.fromkeys(keys)))
+
+    missing = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in vectors))
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        response = embedding_client.embeddings.create(input=batch, model=model)
+        computed = {EmbeddingCache.key(batch[item.index], model): item.embedding for item in response.data}
+        cache.put_many(computed)
+        vectors.update({key: np.asarray(vector, dtype=np.float32) for key, vector in computed.items()})
+        if progress_callback is not None:
+            progress_callback(min(1.0, (start + batch_size) / len(missing)))
+    return np.vstack([vectors[key] for key in keys]) if keys else np.empty((0, 0), dtype=np.float32)
+
+# Algorithmes de clustering disponibles sur les embeddings
+CLUSTERING_KMEANS = "MiniBatchKMeans"
+CLUSTERING_HDBSCAN = "HDBSCAN"
+
+def cluster_embeddings(embeddings, method=CLUSTERING_KMEANS, n_clusters=20, min_cluster_size=5):
+    """Regroupe les vecteurs normalisés ; HDBSCAN marque le bruit avec le label -1."""
+    embeddings = normalize(embeddings)
+    if method == CLUSTERING_HDBSCAN:
+        return HDBSCAN(min_cluster_size=min_cluster_size).fit_predict(embeddings)
+    n_clusters = max(1, min(n_clusters, len(embeddings)))
+    return MiniBatchKMeans(n_clusters=n_clusters, random_state=42, batch_size=1024, n_init=3).fit_predict(embeddings)
+
+def name_clusters(keywords, embeddings, labels):
+    """Nomme chaque cluster par le mot-clé le plus proche de son centre."""
+    embeddings = normalize(embeddings)
+    names = {-1: "Non catégorisé"}
+    for label in np.unique(labels):
+        if label == -1:
+            continue
+        members = np.flatnonzero(labels == label)
+        centroid = embeddings[members].mean(axis=0)
+        names[label] = keywords[members[np.argmax(embeddings[members] @ centroid)]]
+    return [names[label] for label in labels]
+
+# Mots ignorés lors de l'extraction des mots principaux
+COMMON_WORDS = frozenset(['de', 'd', 'du', 'des', 'le', 'la', 'les', 'un', 'une', 'homme', 'femme', 'enfant', 'garçon', 'fille'])
 
 def extract_main_keywords(keywords):
+    """Compte les mots principaux (au singulier) des mots-clés, dans l'ordre de première apparition."""
+    # Découper tous les mots-clés en un seul passage, puis compter chaque mot distinct
+    words = ' '.join(map(str, pd.Series(keywords, dtype=object).dropna())).lower().split()
+    codes, uniques = pd.factorize(pd.Series(words, dtype=object))
+    counts = np.bincount(codes, minlength=len(uniques))
+
+    # Filtrage des mots courants et mise au singulier (retirer le -s final sauf après un autre s),
+    # appliqués une seule fois par mot distinct
+    uniques = pd.Series(uniques, dtype=object)
+    keep = ~uniques.isin(COMMON_WORDS).to_numpy()
+    singular = uniques[keep].str.replace(r'(?<!s)s$', '', regex=True)
+
     frequency = defaultdict(int)
-    common_words = ['de', 'd', 'du', 'des', 'le', 'la', 'les', 'un', 'une', 'homme', 'femme', 'enfant', 'garçon', 'fille']
-    for keyword in keywords:
-        words = keyword.lower().split()
-        main_words = [word for word in words if word not in common_words]
-        for word in main_words:
-            if word.endswith('s') and not word.endswith('ss'):
-                word = word[:-1]  # Mettre au singulier
-            frequency[word] += 1
+    for word, count in zip(singular.tolist(), counts[keep].tolist()):
+        frequency[word] += count
     return frequency
 
 def define_categories(frequencies, min_occurrence=10):
@@ -36,17 +118,69 @@ def define_categories(frequencies, min_occurrence=10):
         categories = sorted(frequencies, key=frequencies.get, reverse=True)[:5]  # Prendre les 5 plus fréquents
     return categories
 
-def categorize_keywords(keywords, categories):
-    categorized = []
-    for keyword in keywords:
-        keyword_lower = keyword.lower()
-        for category in categories:
-            if category in keyword_lower:
-                categorized.append((keyword, category))
-                break
+# Règles de priorité quand plusieurs catégories correspondent à un mot-clé
+PRIORITY_ORDER = "Ordre des catégories"
+PRIORITY_LONGEST = "Catégorie la plus longue"
+PRIORITY_FREQUENT = "Catégorie la plus fréquente"
+PRIORITY_LEFTMOST = "Première catégorie dans le mot-clé"
+PRIORITY_RULES = [PRIORITY_ORDER, PRIORITY_LONGEST, PRIORITY_FREQUENT, PRIORITY_LEFTMOST]
+
+def trie_regex(words):
+    """Compile une liste de mots en une expression régulière arborescente (un seul passage par caractère)."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + pattern + ')?' if '' in node else pattern
+
+    return build(trie)
+
+def build_category_matcher(categories):
+    """Automate de correspondance de toutes les catégories, sur des mots entiers (pluriel en -s accepté)."""
+    categories = [category for category in categories if category]
+    if not categories:
+        return None
+    return re.compile(r'\b(' + trie_regex(categories) + r')s?\b')
+
+def match_categories(keywords, categories):
+    """Retourne, pour chaque mot-clé, la liste des catégories trouvées en un seul balayage."""
+    matcher = build_category_matcher(categories)
+    lowered = pd.Series([str(keyword).lower() for keyword in keywords], dtype=object)
+    if matcher is None:
+        return pd.Series([[] for _ in range(len(lowered))], dtype=object)
+    return lowered.str.findall(matcher)
+
+def categorize_keywords(keywords, categories, priority=PRIORITY_ORDER, frequencies=None, matches=None):
+    """Attribue à chaque mot-clé une catégorie parmi celles trouvées, selon la règle de priorité choisie."""
+    if matches is None:
+        matches = match_categories(keywords, categories)
+    exploded = matches.explode().dropna()
+    best = pd.Series("Non catégorisé", index=matches.index, dtype=object)
+    if not exploded.empty:
+        found = pd.DataFrame({"row": exploded.index, "category": exploded.to_numpy()})
+        order = {category: rank for rank, category in enumerate(categories)}
+        if priority == PRIORITY_LEFTMOST:
+            found["rank"] = found.groupby("row").cumcount()
         else:
-            categorized.append((keyword, "Non catégorisé"))
-    return categorized
+            if priority == PRIORITY_LONGEST:
+                ranked = sorted(categories, key=lambda c: (-len(c), order[c]))
+            elif priority == PRIORITY_FREQUENT:
+                frequencies = frequencies or {}
+                ranked = sorted(categories, key=lambda c: (-frequencies.get(c, 0), order[c]))
+            else:
+                ranked = categories
+            found["rank"] = found["category"].map({category: rank for rank, category in enumerate(ranked)})
+        winners = found.sort_values(["row", "rank"], kind="stable").drop_duplicates("row")
+        best.loc[winners["row"].to_numpy()] = winners["category"].to_numpy()
+    return list(zip(keywords, best.tolist()))
 
 def main():
     st.title("Catégorisation de mots-clés")
@@ -70,22 +204,48 @@ def main():
         keywords_text = st.text_area("Entrez les mots-clés (un par ligne) :")
         keywords = [kw.strip() for kw in keywords_text.split("\n") if kw.strip()]
 
+    method = st.radio("Méthode de catégorisation :", ("Mots fréquents", "Clustering par embeddings"))
+    if method == "Clustering par embeddings":
+        algorithm = st.selectbox("Algorithme de clustering :", (CLUSTERING_KMEANS, CLUSTERING_HDBSCAN))
+        if algorithm == CLUSTERING_KMEANS:
+            n_clusters = st.number_input("Nombre de clusters :", min_value=2, value=20)
+            min_cluster_size = 5
+        else:
+            n_clusters = 20
+            min_cluster_size = st.number_input("Taille minimum d'un cluster :", min_value=2, value=5)
+    else:
+        priority = st.selectbox("Priorité si plusieurs catégories correspondent :", PRIORITY_RULES)
+
     if st.button("Catégoriser"):
         with st.spinner("Catégorisation en cours..."):
-            # Extraire les mots principaux et leurs fréquences
-            frequencies = extract_main_keywords(keywords)
+            if method == "Clustering par embeddings":
+                # Embeddings par lots, mis en cache sur disque, puis clustering vectoriel
+                keywords = [str(keyword) for keyword in keywords]
+                progress_bar = st.progress(0)
+                embeddings = get_embeddings(keywords, progress_callback=progress_bar.progress)
+                progress_bar.empty()
+                labels = cluster_embeddings(embeddings, algorithm, int(n_clusters), int(min_cluster_size))
+                cluster_names = name_clusters(keywords, embeddings, labels)
+                final_categories = list(zip(keywords, cluster_names))
+                categories = sorted(set(cluster_names))
+            else:
+                # Extraire les mots principaux et leurs fréquences
+                frequencies = extract_main_keywords(keywords)
 
-            # Définir les catégories
-            categories = define_categories(frequencies)
+                # Définir les catégories
+                categories = define_categories(frequencies)
 
-            # Catégoriser les mots-clés
-            final_categories = categorize_keywords(keywords, categories)
+                # Catégoriser les mots-clés (toutes les catégories trouvées, puis la prioritaire)
+                matches = match_categories(keywords, categories)
+                final_categories = categorize_keywords(keywords, categories, priority, frequencies, matches)
             
             if input_method == "Fichier (XLSX/CSV)":
                 output_df = df.copy()
                 output_df["Catégorie"] = [category for _, category in final_categories]
             else:
                 output_df = pd.DataFrame({"Mot-clé": keywords, "Catégorie": [category for _, category in final_categories]})
+            if method != "Clustering par embeddings":
+                output_df["Catégories trouvées"] = [", ".join(dict.fromkeys(found)) for found in matches]
             
             st.write("Catégories définies :", categories)
             st.write("Résultats de la catégorisation :")
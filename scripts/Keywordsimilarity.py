@@ -1,18 +1,244 @@
 import streamlit as st
 import pandas as pd
-from itertools import combinations
+import numpy as np
+from scipy import sparse # Matrices creuses pour compter les URLs communes
 import networkx as nx # Bibliothèque pour les graphes
+import os
+import shutil
+import threading
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO # Pour l'export Excel en mémoire
 
+# Nombre de mots-clés traités par bloc lors du produit matriciel creux
+KEYWORDS_PER_BLOCK = 2000
+
+# Dossier du cache disque des graphes de recouvrement SERP (un fichier .npz par graphe)
+OVERLAP_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "keywordsimilarity")
+OVERLAP_CACHE_MAX_FILES = 20
+# Un graphe utilisé depuis moins longtemps que ce délai n'est jamais évincé
+OVERLAP_CACHE_MIN_AGE = 2 * 60 * 60
+
+@st.cache_data(show_spinner=False)
+def read_serp_export(file_bytes):
+    return pd.read_excel(BytesIO(file_bytes))
+
+def build_incidence_matrix(filtered_data, keyword_col, url_col):
+    """Construit en une passe la matrice d'incidence CSR mot-clé × URL (codes entiers via pd.factorize).
+
+    Retourne la liste des mots-clés (ordre d'apparition) et la matrice binaire correspondante.
+    """
+    keyword_codes, keywords = pd.factorize(filtered_data[keyword_col])
+    url_codes, urls = pd.factorize(filtered_data[url_col])
+    incidence = sparse.csr_matrix(
+        (np.ones(len(keyword_codes), dtype=np.int32), (keyword_codes, url_codes)),
+        shape=(len(keywords), len(urls))
+    )
+    # Une même URL peut apparaître plusieurs fois pour un mot-clé : la matrice reste binaire
+    incidence.sum_duplicates()
+    incidence.data[:] = 1
+    return list(keywords), incidence
+
+def shared_urls_count(incidence, keyword_indices):
+    """Nombre d'URLs présentes dans les résultats de tous les mots-clés d'un groupe."""
+    return int((np.asarray(incidence[keyword_indices].sum(axis=0)).ravel() == len(keyword_indices)).sum())
+
+def serp_overlap_counts(incidence, progress_callback=None):
+    """Retourne toutes les paires (i < j) de mots-clés partageant au moins une URL et leur nombre d'URLs communes.
+
+    Le nombre d'URLs communes vient du produit creux incidence × incidenceᵀ : seules les paires
+    partageant au moins une URL sont calculées, le coût dépend donc des recouvrements réels.
+    """
+    incidence_t = incidence.T.tocsr()
+    n_keywords = incidence.shape[0]
+    pairs_i, pairs_j, overlaps = [], [], []
+    for start in range(0, n_keywords, KEYWORDS_PER_BLOCK):
+        common = (incidence[start:start + KEYWORDS_PER_BLOCK] @ incidence_t).tocoo()
+        rows = common.row.astype(np.int32) + start
+        upper = rows < common.col
+        pairs_i.append(rows[upper])
+        pairs_j.append(common.col[upper].astype(np.int32))
+        overlaps.append(common.data[upper].astype(np.int32))
+        if progress_callback is not None:
+            progress_callback(min(1.0, (start + KEYWORDS_PER_BLOCK) / n_keywords))
+    if not pairs_i:
+        return np.array([], dtype=np.int32), np.array([], dtype=np.int32), np.array([], dtype=np.int32)
+    return np.concatenate(pairs_i), np.concatenate(pairs_j), np.concatenate(overlaps)
+
+def filter_overlap_pairs(pairs_i, pairs_j, overlaps, max_results, similarity_threshold):
+    """Ne garde que les paires dont la similarité (URLs communes / résultats analysés) atteint le seuil."""
+    similarity = (overlaps / max_results) * 100 if max_results > 0 else np.zeros(len(overlaps))
+    keep = similarity >= similarity_threshold
+    return pairs_i[keep], pairs_j[keep], similarity[keep]
+
+def overlap_cache_key(file_bytes, keyword_col, url_col, rank_col, max_results):
+    """Clé du graphe de recouvrement : empreinte du fichier et paramètres qui changent les URLs retenues."""
+    file_hash = hashlib.sha256(file_bytes).hexdigest()
+    params_hash = hashlib.sha256(repr((str(keyword_col), str(url_col), str(rank_col), max_results)).encode("utf-8")).hexdigest()
+    return f"{file_hash[:32]}_{params_hash[:16]}"
+
+def overlap_graph_path(cache_key):
+    return os.path.join(OVERLAP_CACHE_DIR, f"{cache_key}.npz")
+
+def save_overlap_graph(cache_key, keywords, incidence, pairs_i, pairs_j, overlaps):
+    """Enregistre dans un seul fichier la liste d'arêtes creuse (paires, URLs communes), la matrice d'incidence
+    et les mots-clés. Écrit dans un fichier temporaire puis renommé atomiquement : un lecteur ne voit jamais de
+    graphe partiel, même en cas d'arrêt brutal ou de calcul concurrent de la même clé."""
+    os.makedirs(OVERLAP_CACHE_DIR, exist_ok=True)
+    path = overlap_graph_path(cache_key)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    incidence = incidence.tocsr()
+    with open(temp_path, "wb") as f:
+        np.savez(f, pairs_i=pairs_i, pairs_j=pairs_j, overlaps=overlaps,
+                 incidence_data=incidence.data, incidence_indices=incidence.indices, incidence_indptr=incidence.indptr,
+                 incidence_shape=np.array(incidence.shape), keywords=np.array([str(keyword) for keyword in keywords], dtype=str))
+    os.replace(temp_path, path)
+    evict_overlap_graphs(keep=path)
+
+def evict_overlap_graphs(keep=None):
+    """Ne garde que les OVERLAP_CACHE_MAX_FILES graphes utilisés le plus récemment, sauf ceux utilisés récemment.
+
+    Les fichiers temporaires abandonnés et les dossiers de l'ancien format suivent la même règle d'âge.
+    """
+    entries = sorted((os.path.join(OVERLAP_CACHE_DIR, name) for name in os.listdir(OVERLAP_CACHE_DIR)), key=os.path.getmtime, reverse=True)
+    graphs = [path for path in entries if path.endswith(".npz")]
+    stale = [path for path in entries if not path.endswith(".npz")] + graphs[OVERLAP_CACHE_MAX_FILES:]
+    now = time.time()
+    for path in stale:
+        try:
+            if path == keep or now - os.path.getmtime(path) <= OVERLAP_CACHE_MIN_AGE:
+                continue
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except OSError:
+            pass
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_overlap_graph(cache_key):
+    """Charge un graphe de recouvrement enregistré ; lève FileNotFoundError s'il n'existe pas encore."""
+    path = overlap_graph_path(cache_key)
+    with np.load(path) as graph:
+        keywords = graph["keywords"].tolist()
+        incidence = sparse.csr_matrix((graph["incidence_data"], graph["incidence_indices"], graph["incidence_indptr"]),
+                                      shape=tuple(graph["incidence_shape"]))
+        edges = graph["pairs_i"], graph["pairs_j"], graph["overlaps"]
+    os.utime(path)
+    return (keywords, incidence, *edges)
+
+# Méthodes de groupement disponibles
+GROUPING_CLIQUES = "Cliques maximales (budget par composante)"
+GROUPING_GREEDY = "Couverture gloutonne par cliques"
+GROUPING_COMPONENTS = "Composantes connexes"
+GROUPING_LOUVAIN = "Communautés de Louvain"
+GROUPING_MODES = [GROUPING_CLIQUES, GROUPING_GREEDY, GROUPING_COMPONENTS, GROUPING_LOUVAIN]
+# Nom des groupes produits par chaque méthode (titres, onglet Excel, fichier exporté)
+GROUPING_LABELS = {
+    GROUPING_CLIQUES: "Cliques",
+    GROUPING_GREEDY: "Cliques",
+    GROUPING_COMPONENTS: "Composantes",
+    GROUPING_LOUVAIN: "Communautés",
+}
+
+# Nombre de groupes affichés individuellement dans la page
+MAX_DISPLAYED_GROUPS = 200
+
+# Nombre de sommets visé par tâche envoyée au pool de processus
+NODES_PER_TASK = 5000
+
+def greedy_clique_cover(G):
+    """Partitionne le graphe en cliques : on part du sommet de plus haut degré et on ajoute les voisins compatibles."""
+    remaining = set(G.nodes)
+    cliques = []
+    for node in sorted(G.nodes, key=lambda n: (-G.degree(n), str(n))):
+        if node not in remaining:
+            continue
+        clique = [node]
+        candidates = set(G[node]) & remaining
+        for neighbor in sorted(candidates, key=lambda n: (-G.degree(n), str(n))):
+            if all(neighbor in G[member] for member in clique[1:]):
+                clique.append(neighbor)
+        remaining.difference_update(clique)
+        cliques.append(clique)
+    return cliques
+
+def component_cliques(components, min_group_size, time_budget, max_cliques):
+    """Énumère les cliques maximales de chaque composante (liste de (sommets, arêtes)) avec un budget.
+
+    Si une composante dépasse le temps ou le nombre de cliques alloués, on bascule sur la couverture
+    gloutonne pour cette composante. Retourne les cliques et le nombre de composantes tronquées.
+    """
+    cliques = []
+    truncated = 0
+    for nodes, edges in components:
+        component = nx.Graph()
+        component.add_nodes_from(nodes)
+        component.add_edges_from(edges)
+        found = []
+        deadline = time.monotonic() + time_budget
+        exceeded = False
+        for clique in nx.find_cliques(component):
+            if len(clique) >= min_group_size:
+                found.append(clique)
+            if len(found) > max_cliques or time.monotonic() > deadline:
+                exceeded = True
+                break
+        if exceeded:
+            truncated += 1
+            found = [clique for clique in greedy_clique_cover(component) if len(clique) >= min_group_size]
+        cliques.extend(found)
+    return cliques, truncated
+
+def group_keywords(G, mode, min_group_size, time_budget=10, max_cliques=100000):
+    """Regroupe les mots-clés du graphe selon la méthode choisie ; retourne (groupes, composantes tronquées)."""
+    if mode == GROUPING_LOUVAIN:
+        groups = nx.community.louvain_communities(G, weight='weight', seed=42)
+        return [list(group) for group in groups if len(group) >= min_group_size], 0
+
+    # Les composantes trop petites ne peuvent pas contenir de groupe assez grand
+    components = [component for component in nx.connected_components(G) if len(component) >= min_group_size]
+    if mode == GROUPING_COMPONENTS:
+        return [list(component) for component in components], 0
+    if mode == GROUPING_GREEDY:
+        groups = []
+        for component in components:
+            groups.extend(clique for clique in greedy_clique_cover(G.subgraph(component)) if len(clique) >= min_group_size)
+        return groups, 0
+
+    # Cliques maximales : composantes réparties par paquets d'environ NODES_PER_TASK sommets sur un pool de processus
+    tasks, current, current_size = [], [], 0
+    for component in sorted(components, key=len, reverse=True):
+        current.append((list(component), list(G.subgraph(component).edges())))
+        current_size += len(component)
+        if current_size >= NODES_PER_TASK:
+            tasks.append(current)
+            current, current_size = [], 0
+    if current:
+        tasks.append(current)
+    if not tasks:
+        return [], 0
+
+    groups, truncated = [], 0
+    with ProcessPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1)) as executor:
+        futures = [executor.submit(component_cliques, task, min_group_size, time_budget, max_cliques) for task in tasks]
+        for future in futures:
+            task_groups, task_truncated = future.result()
+            groups.extend(task_groups)
+            truncated += task_truncated
+    return groups, truncated
+
 def main():
-    st.title("Analyse de Similarité et Groupement Complet (Cliques) de Mots-Clés") # Titre mis à jour
+    st.title("Analyse de Similarité et Groupement de Mots-Clés")
 
     # Chargement du fichier
     uploaded_file = st.file_uploader("Téléchargez votre fichier Excel", type=["xlsx"])
 
     if uploaded_file:
         try:
-            data = pd.read_excel(uploaded_file)
+            file_bytes = uploaded_file.getvalue()
+            data = read_serp_export(file_bytes)
             # Supprimer les lignes où les colonnes essentielles seraient vides dès le départ
             # Note: On fera une sélection plus tard, mais ça évite des erreurs si les colonnes existent déjà avec des nans
             # data.dropna(subset=[col for col in ['Mot-clé', 'URL', 'Position'] if col in data.columns], inplace=True) # Exemple, adapter si noms connus
@@ -56,110 +282,118 @@ def main():
             similarity_threshold = st.selectbox("Similarité minimum requise (%)",
                                                 similarity_options, index=similarity_options.index(default_similarity), key="sim_thresh")
 
-        # Option pour la taille minimale des groupes (cliques) à afficher
+        # Option pour la taille minimale des groupes à afficher
         min_group_size = st.selectbox("Taille minimum des groupes à afficher",
                                       options=[2, 3, 4, 5], index=0, key="min_group",
-                                      help="Seuls les groupes contenant au moins ce nombre de mots-clés (tous similaires entre eux) seront affichés.")
-
-
-        if st.button(f"Trouver les Groupes (Taille >= {min_group_size})"):
+                                      help="Seuls les groupes contenant au moins ce nombre de mots-clés seront affichés.")
+
+        # Méthode de groupement et budget par composante connexe
+        grouping_mode = st.selectbox("Méthode de groupement", GROUPING_MODES, index=0, key="grouping_mode",
+                                     help="Les cliques maximales sont exactes mais coûteuses sur les graphes denses ; les autres méthodes sont rapides.")
+        time_budget, max_cliques = 10, 100000
+        if grouping_mode == GROUPING_CLIQUES:
+            col3, col4 = st.columns(2)
+            with col3:
+                time_budget = st.number_input("Budget de temps par composante (secondes)", min_value=1, value=10, key="time_budget")
+            with col4:
+                max_cliques = st.number_input("Nombre maximum de cliques par composante", min_value=100, value=100000, step=1000, key="max_cliques")
+
+
+        # Le graphe de recouvrement ne dépend que du fichier, des colonnes et du nombre de résultats analysés :
+        # une fois calculé, changer le seuil ou la taille des groupes ne fait que refiltrer les arêtes
+        cache_key = overlap_cache_key(file_bytes, keyword_col, url_col, rank_col, max_results)
+        if st.button(f"Trouver les Groupes (Taille >= {min_group_size})") or st.session_state.get("kwsim_cache_key") == cache_key:
+            st.session_state["kwsim_cache_key"] = cache_key
             with st.spinner("Analyse en cours... Filtrage, calcul des similarités et recherche des groupes..."):
                 try:
-                    # --- Préparation et Filtrage des Données ---
-                    # S'assurer que la colonne de rang est numérique
-                    if not pd.api.types.is_numeric_dtype(data[rank_col]):
-                        try:
-                            data[rank_col] = pd.to_numeric(data[rank_col], errors='coerce')
-                            initial_rows = len(data)
-                            data.dropna(subset=[rank_col], inplace=True)
-                            if len(data) < initial_rows:
-                                st.info(f"{initial_rows - len(data)} lignes supprimées car la colonne '{rank_col}' n'était pas numérique.")
-                            data[rank_col] = data[rank_col].astype(int)
-                        except Exception as conv_e:
-                            st.error(f"Impossible de convertir la colonne '{rank_col}' en numérique : {conv_e}")
-                            return
-
-                    # Filtrer par rang et supprimer les lignes avec des NaN dans les colonnes clés après filtrage
-                    filtered_data = data[data[rank_col] <= max_results].copy()
-                    filtered_data.dropna(subset=[keyword_col, url_col], inplace=True)
-
-                    # Assurer le type string pour éviter les problèmes de type mixte
-                    filtered_data[keyword_col] = filtered_data[keyword_col].astype(str).str.strip()
-                    filtered_data[url_col] = filtered_data[url_col].astype(str).str.strip()
-
-                    keywords = filtered_data[keyword_col].unique()
-                    keywords = [kw for kw in keywords if kw] # Exclure les mots-clés vides si présents
+                    try:
+                        keywords, incidence, pairs_i, pairs_j, overlaps = load_overlap_graph(cache_key)
+                        st.caption("Graphe de recouvrement des SERP chargé depuis le cache : seuls le filtrage et le regroupement sont recalculés.")
+                    except FileNotFoundError:
+                        # --- Préparation et Filtrage des Données ---
+                        # S'assurer que la colonne de rang est numérique
+                        if not pd.api.types.is_numeric_dtype(data[rank_col]):
+                            try:
+                                data[rank_col] = pd.to_numeric(data[rank_col], errors='coerce')
+                                initial_rows = len(data)
+                                data.dropna(subset=[rank_col], inplace=True)
+                                if len(data) < initial_rows:
+                                    st.info(f"{initial_rows - len(data)} lignes supprimées car la colonne '{rank_col}' n'était pas numérique.")
+                                data[rank_col] = data[rank_col].astype(int)
+                            except Exception as conv_e:
+                                st.error(f"Impossible de convertir la colonne '{rank_col}' en numérique : {conv_e}")
+                                return
+
+                        # Filtrer par rang et supprimer les lignes avec des NaN dans les colonnes clés après filtrage
+                        filtered_data = data[data[rank_col] <= max_results].copy()
+                        filtered_data.dropna(subset=[keyword_col, url_col], inplace=True)
+
+                        # Assurer le type string pour éviter les problèmes de type mixte
+                        filtered_data[keyword_col] = filtered_data[keyword_col].astype(str).str.strip()
+                        filtered_data[url_col] = filtered_data[url_col].astype(str).str.strip()
+
+                        # Exclure les mots-clés vides si présents
+                        filtered_data = filtered_data[filtered_data[keyword_col] != ""]
+
+                        # Matrice d'incidence mot-clé × URL, partagée par le calcul des similarités et l'export
+                        keywords, incidence = build_incidence_matrix(filtered_data, keyword_col, url_col)
+
+                        # Seules les paires partageant une URL sont évaluées
+                        st.write(f"Calcul des recouvrements pour les paires partageant au moins une URL (parmi {len(keywords)} mots-clés uniques)...")
+
+                        # Barre de progression
+                        progress_bar = st.progress(0)
+                        pairs_i, pairs_j, overlaps = serp_overlap_counts(incidence, progress_bar.progress)
+                        progress_bar.empty() # Cache la barre une fois terminé
+                        save_overlap_graph(cache_key, keywords, incidence, pairs_i, pairs_j, overlaps)
 
                     if len(keywords) < min_group_size:
                         st.warning(f"Moins de {min_group_size} mots-clés uniques trouvés après filtrage ({len(keywords)}). Impossible de former des groupes de cette taille.")
                         return
 
-                    # --- Calcul des Similarités et Construction du Graphe ---
+                    # --- Filtrage des Similarités et Construction du Graphe ---
                     G = nx.Graph()
                     G.add_nodes_from(keywords)
-
-                    total_combinations = len(list(combinations(keywords, 2)))
-                    st.write(f"Calcul des similarités pour {total_combinations} paires de mots-clés (parmi {len(keywords)} uniques)...")
-
-                    # Optimisation: Pré-calculer les sets d'URLs par mot-clé
-                    urls_per_keyword = {}
-                    for keyword in keywords:
-                        urls_per_keyword[keyword] = set(filtered_data.loc[filtered_data[keyword_col] == keyword, url_col])
-
-                    # Barre de progression
-                    progress_bar = st.progress(0)
-                    processed_count = 0
-
-                    for kw1, kw2 in combinations(keywords, 2):
-                        urls_kw1 = urls_per_keyword[kw1]
-                        urls_kw2 = urls_per_keyword[kw2]
-
-                        common_urls = urls_kw1.intersection(urls_kw2)
-                        if max_results > 0:
-                            similarity = (len(common_urls) / max_results) * 100
-                        else:
-                            similarity = 0
-
-                        if similarity >= similarity_threshold:
-                            G.add_edge(kw1, kw2, weight=round(similarity, 2))
-
-                        processed_count += 1
-                        if total_combinations > 0:
-                             progress_bar.progress(processed_count / total_combinations)
-
-                    progress_bar.empty() # Cache la barre une fois terminé
-
-                    # --- Recherche des Cliques (Groupes Entièrement Connectés) ---
-                    st.write("Recherche des groupes où tous les membres sont similaires entre eux...")
-                    # nx.find_cliques retourne un générateur de listes (chaque liste est une clique)
-                    all_cliques = list(nx.find_cliques(G))
-
-                    # Filtrer les cliques par taille minimale
-                    meaningful_cliques = [clique for clique in all_cliques if len(clique) >= min_group_size]
+                    pairs_i, pairs_j, similarities = filter_overlap_pairs(pairs_i, pairs_j, overlaps, max_results, similarity_threshold)
+                    G.add_weighted_edges_from(
+                        (keywords[i], keywords[j], round(similarity, 2))
+                        for i, j, similarity in zip(pairs_i.tolist(), pairs_j.tolist(), similarities.tolist())
+                    )
+
+                    # --- Recherche des Groupes (par composante connexe) ---
+                    st.write(f"Recherche des groupes ({grouping_mode})...")
+                    meaningful_cliques, truncated_components = group_keywords(G, grouping_mode, min_group_size, time_budget, max_cliques)
+                    if truncated_components:
+                        st.info(f"{truncated_components} composante(s) ont dépassé le budget : couverture gloutonne utilisée à la place des cliques maximales.")
 
                     # --- Affichage et Export des Résultats ---
-                    st.subheader(f"Groupes Trouvés (Cliques de Taille >= {min_group_size})")
+                    group_label = GROUPING_LABELS[grouping_mode]
+                    st.subheader(f"Groupes Trouvés ({group_label} de Taille >= {min_group_size})")
 
                     if meaningful_cliques:
                         # Trier les cliques pour un affichage cohérent (par taille décroissante, puis alphabétiquement)
                         sorted_cliques = sorted(meaningful_cliques, key=lambda c: (-len(c), sorted(c)))
 
+                        keyword_index = {keyword: idx for idx, keyword in enumerate(keywords)}
                         output_data = []
                         group_id_counter = 1
                         for clique in sorted_cliques:
                             # Trier les mots-clés au sein de la clique
                             sorted_keywords_in_clique = sorted(list(clique))
+                            common_urls = shared_urls_count(incidence, [keyword_index[keyword] for keyword in sorted_keywords_in_clique])
                             for keyword in sorted_keywords_in_clique:
-                                output_data.append({"Groupe ID": group_id_counter, "Mot-Clé": keyword, "Taille Groupe": len(clique)})
+                                output_data.append({"Groupe ID": group_id_counter, "Mot-Clé": keyword, "Taille Groupe": len(clique), "URLs Communes au Groupe": common_urls})
                             group_id_counter += 1
 
                         results_df = pd.DataFrame(output_data)
 
                         # Affichage résumé dans Streamlit
-                        st.write(f"Nombre total de groupes (cliques) trouvés : {len(sorted_cliques)}")
-                        for i, clique in enumerate(sorted_cliques):
+                        st.write(f"Nombre total de groupes ({group_label.lower()}) trouvés : {len(sorted_cliques)}")
+                        for i, clique in enumerate(sorted_cliques[:MAX_DISPLAYED_GROUPS]):
                              display_group = ", ".join(sorted(list(clique)))
                              st.write(f"**Groupe {i+1} (Taille {len(clique)}):** {display_group}")
+                        if len(sorted_cliques) > MAX_DISPLAYED_GROUPS:
+                             st.write(f"... {len(sorted_cliques) - MAX_DISPLAYED_GROUPS} autres groupes dans le tableau et l'export.")
 
                         st.write("---")
                         st.write("Tableau Détaillé des Groupes (pour export) :")
@@ -168,24 +402,24 @@ def main():
                         # Export Excel
                         output = BytesIO()
                         with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                            results_df.to_excel(writer, index=False, sheet_name=f'Cliques_Taille>={min_group_size}')
+                            results_df.to_excel(writer, index=False, sheet_name=f'{group_label}_Taille>={min_group_size}')
                             # Ajouter une feuille d'info (optionnel)
                             info_df = pd.DataFrame({
-                                'Paramètre': ['Colonne Mots-clés', 'Colonne URLs', 'Colonne Positions', 'Max Résultats Analysés', 'Seuil Similarité (%)', 'Taille Minimum Groupe'],
-                                'Valeur': [keyword_col, url_col, rank_col, max_results, similarity_threshold, min_group_size]
+                                'Paramètre': ['Colonne Mots-clés', 'Colonne URLs', 'Colonne Positions', 'Max Résultats Analysés', 'Seuil Similarité (%)', 'Taille Minimum Groupe', 'Méthode de Groupement'],
+                                'Valeur': [keyword_col, url_col, rank_col, max_results, similarity_threshold, min_group_size, grouping_mode]
                             })
                             info_df.to_excel(writer, index=False, sheet_name='Parametres_Analyse')
 
                         excel_data = output.getvalue()
 
                         st.download_button(
-                            label=f"Télécharger les Groupes (Cliques) en Excel",
+                            label=f"Télécharger les Groupes ({group_label}) en Excel",
                             data=excel_data,
-                            file_name=f"keyword_cliques_sim{similarity_threshold}pct_top{max_results}_min{min_group_size}.xlsx",
+                            file_name=f"keyword_{group_label.lower()}_sim{similarity_threshold}pct_top{max_results}_min{min_group_size}.xlsx",
                             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                         )
                     else:
-                        st.write(f"Aucun groupe (clique) de taille >= {min_group_size} où tous les mots-clés sont mutuellement similaires n'a été trouvé avec un seuil de {similarity_threshold}%.")
+                        st.write(f"Aucun groupe ({group_label.lower()}) de taille >= {min_group_size} n'a été trouvé avec un seuil de {similarity_threshold}% ({grouping_mode}).")
                         st.info("Essayez peut-être avec un seuil de similarité plus bas ou une taille de groupe minimum plus petite.")
 
                 except Exception as analysis_e:
@@ -1,20 +1,228 @@
 import pandas as pd
-import nltk
-from nltk import ngrams, pos_tag, word_tokenize
 from bs4 import BeautifulSoup
 from collections import Counter
+import hashlib
+import json
+import os
+import re
+import sqlite3
 import string
+import time
 import streamlit as st
+from contextlib import closing
 from concurrent.futures import ThreadPoolExecutor
 
-# Téléchargement de la liste de stop words et de 'punkt'
-nltk.download('stopwords', quiet=True)
-nltk.download('punkt', quiet=True)
-nltk.download('averaged_perceptron_tagger', quiet=True)
+# Liste des mots d'arrêt français (reprise de nltk.corpus.stopwords, embarquée pour
+# éviter tout téléchargement au chargement du module)
+FRENCH_STOPWORDS = frozenset("""
+au aux avec ce ces dans de des du elle en et eux il ils je la le les leur lui ma mais
+me même mes moi mon ne nos notre nous on ou par pas pour qu que qui sa se ses son sur
+ta te tes toi ton tu un une vos votre vous c d j l à m n s t y été étée étées étés
+étant étante étants étantes suis es est sommes êtes sont serai seras sera serons serez
+seront serais serait serions seriez seraient étais était étions étiez étaient fus fut
+fûmes fûtes furent sois soit soyons soyez soient fusse fusses fût fussions fussiez
+fussent ayant ayante ayantes ayants eu eue eues eus ai as avons avez ont aurai auras
+aura aurons aurez auront aurais aurait aurions auriez auraient avais avait avions
+aviez avaient eut eûmes eûtes eurent aie aies ait ayons ayez aient eusse eusses eût
+eussions eussiez eussent
+""".split())
 
-# Définir les listes de mots d'arrêt et de lettres de l'alphabet
-french_stopwords_list = nltk.corpus.stopwords.words('french')
-alphabet_list = list(string.ascii_lowercase)
+# Lettres seules à ignorer
+ALPHABET = frozenset(string.ascii_lowercase)
+
+# Tokenizer : suites de lettres (accents compris), l'apostrophe et les chiffres séparent les mots
+TOKEN_PATTERN = re.compile(r"[^\W\d_]+")
+
+# Formes conjuguées fréquentes des auxiliaires, modaux et verbes courants
+# (sans les formes qui sont aussi des noms courants : pouvoir, savoir, devoir, devenir, fait, vue, prise,
+# permis, reste, venue, allée...)
+FRENCH_VERB_FORMS = frozenset("""
+être avoir faire aller vouloir falloir venir voir prendre mettre
+dire donner permettre rester passer trouver
+faite faites font fais faisons faisait faisaient fera feront ferait feraient
+va vais vas vont allons allez allait allaient ira iront irait iraient allé allés
+peut peux pouvons pouvez peuvent pouvait pouvaient pourra pourront pourrait pourraient pu
+veut veux voulons voulez veulent voulait voulaient voudra voudrait voudraient voulu
+doit dois devons devez doivent devait devaient devra devront devrait devraient dû
+sait sais savons savez savent savait savaient saura saurait su
+faut fallait faudra faudrait fallu
+vient viens venons venez viennent venait venaient viendra viendrait venu venus
+voit vois voyons voyez voient voyait voyaient verra verrait vu
+prend prends prenons prenez prennent prenait prenaient prendra prendrait pris
+met mets mettons mettez mettent mettait mettaient mettra mettrait mis
+dit dis disons dites disent disait disaient dira dirait
+permet permettent permettait permettra permettrait
+devient deviennent devenait deviendra deviendrait devenu devenue
+restent restait resté
+trouve trouvent trouvait trouvé trouvée
+""".split())
+
+# Terminaisons verbales non ambiguës (imparfait, conditionnel, subjonctif imparfait)
+FRENCH_VERB_SUFFIXES = ("aient", "eraient", "erait", "erions", "eriez", "assions", "issions", "issaient", "issait")
+
+# Mots en -er qui ne sont pas des infinitifs (noms français et emprunts à l'anglais)
+FRENCH_ER_EXCEPTIONS = frozenset("""
+mer fer hiver enfer amer cher hier super laser poster cancer leader container
+danger étranger léger boucher berger boulanger verger plancher rocher clocher foyer
+loyer dîner déjeuner goûter souper cocher archer hyper manager designer newsletter
+sticker flyer header footer banner cluster
+router player computer server timer scooter burger hamburger blazer thriller teaser
+trailer master webmaster reporter supporter starter toaster flipper voucher charter
+hipster blockbuster bestseller youtuber influencer freelancer cover water
+""".split())
+
+# Terminaisons d'emprunts anglais qui ne sont jamais des infinitifs français (power, poker, speaker...)
+FRENCH_ER_LOANWORD_SUFFIXES = ("wer", "ker")
+
+
+def is_french_verb(token):
+    """Indique si un token est (très probablement) une forme verbale française."""
+    if token in FRENCH_VERB_FORMS:
+        return True
+    if token.endswith(FRENCH_VERB_SUFFIXES):
+        return True
+    # Infinitifs du 1er groupe (les mots en -ier sont presque toujours des noms)
+    return (len(token) > 4 and token.endswith("er") and not token.endswith(("ier",) + FRENCH_ER_LOANWORD_SUFFIXES)
+            and token not in FRENCH_ER_EXCEPTIONS)
+
+
+# Pluriels irréguliers (-aux qui ne viennent pas de -al, -eux et -oux des noms en -eu et -ou)
+FRENCH_IRREGULAR_PLURALS = {
+    "travaux": "travail", "vitraux": "vitrail", "coraux": "corail", "émaux": "émail", "soupiraux": "soupirail",
+    "baux": "bail", "jeux": "jeu", "feux": "feu", "lieux": "lieu", "cheveux": "cheveu", "neveux": "neveu",
+    "vœux": "vœu", "enjeux": "enjeu", "bijoux": "bijou", "cailloux": "caillou", "choux": "chou",
+    "genoux": "genou", "hiboux": "hibou", "joujoux": "joujou", "poux": "pou",
+}
+
+# Mots invariables terminés par -s
+FRENCH_INVARIABLE_WORDS = frozenset("""
+temps corps après très toujours près dès alors ailleurs parfois jamais mais moins plus puis depuis sans sous
+dans vers pays fois bras dos pas poids prix repas discours concours parcours secours recours cours ours
+mœurs remords legs mets bois avis souris tandis volontiers
+gros héros hélas fils repas cas tas lilas matelas ananas canevas verglas fracas cadenas compas embarras
+propos repos clos enclos chaos cosmos pathos albatros tournedos mars
+""".split())
+
+
+def singularize_french(token):
+    """Lemmatisation légère : ramène un nom ou adjectif pluriel au singulier."""
+    if len(token) <= 3 or token in FRENCH_INVARIABLE_WORDS:
+        return token
+    if token in FRENCH_IRREGULAR_PLURALS:
+        return FRENCH_IRREGULAR_PLURALS[token]
+    if token.endswith("eaux"):
+        return token[:-1]
+    if token.endswith("aux") and len(token) > 4:
+        return token[:-3] + "al"
+    # Les autres mots en -x (heureux, vieux, prix...) sont invariables
+    if token.endswith("s") and not token.endswith(("ss", "us", "is", "ès")):
+        return token[:-1]
+    return token
+
+
+class FrenchTextPipeline:
+    """Chaîne de traitement du texte français : tokenizer, mots d'arrêt, filtre verbal, lemmatiseur."""
+
+    def __init__(self, name="fr", stopwords=FRENCH_STOPWORDS, verb_filter=is_french_verb, lemmatizer=None, token_pattern=TOKEN_PATTERN):
+        # Le nom identifie la configuration dans le cache des documents
+        self.name = name
+        self.excluded = frozenset(stopwords) | ALPHABET
+        self.verb_filter = verb_filter
+        self.lemmatizer = lemmatizer
+        self.token_pattern = token_pattern
+
+    def tokenize(self, text):
+        # Ignorer les mots vides, les verbes, les auxiliaires et les lettres seules
+        excluded = self.excluded
+        verb_filter = self.verb_filter
+        tokens = [token for token in self.token_pattern.findall(text) if token not in excluded and not (verb_filter and verb_filter(token))]
+        if self.lemmatizer is not None:
+            tokens = [self.lemmatizer(token) for token in tokens]
+        return tokens
+
+    def analyze(self, text):
+        """Retourne les mots, bigrammes et trigrammes filtrés d'un texte déjà nettoyé."""
+        tokens = self.tokenize(text)
+        return tokens, ngrams(tokens, 2), ngrams(tokens, 3)
+
+
+# Pipeline par défaut, sans lemmatisation, et sa variante lemmatisée
+default_pipeline = FrenchTextPipeline()
+lemmatized_pipeline = FrenchTextPipeline(name="fr-lemme", lemmatizer=singularize_french)
+
+# Version des filtres (mots d'arrêt, verbes, lemmatiseur) : à incrémenter quand ils changent, pour que
+# les analyses mises en cache avec les anciennes règles ne soient plus réutilisées
+TEXT_FILTERS_VERSION = 4
+
+# Emplacement et taille maximale du cache local des documents analysés
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "mytextguru", "documents.sqlite")
+CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+
+class DocumentCache:
+    """Cache SQLite des analyses de documents, indexé par empreinte du contenu, avec éviction LRU par taille."""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS documents (key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_last_access ON documents (last_access)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def key(text, pipeline=default_pipeline):
+        content = text if isinstance(text, str) else ""
+        return hashlib.sha256(f"{pipeline.name}\0{TEXT_FILTERS_VERSION}\0{content}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """Retourne un dictionnaire clé -> analyse pour les clés présentes dans le cache."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with closing(self._connect()) as conn, conn:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for key, value in conn.execute(f"SELECT key, value FROM documents WHERE key IN ({placeholders})", chunk):
+                    found[key] = tuple(Counter(dict(pairs)) for pairs in json.loads(value))
+                conn.execute(f"UPDATE documents SET last_access = ? WHERE key IN ({placeholders})", [time.time(), *chunk])
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Enregistre des analyses (clé -> compteurs de mots, bigrammes, trigrammes) puis applique l'éviction."""
+        now = time.time()
+        rows = []
+        for key, counters in items.items():
+            value = json.dumps([list(counter.items()) for counter in counters], ensure_ascii=False)
+            rows.append((key, value, len(value.encode("utf-8")), now))
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO documents (key, value, size, last_access) VALUES (?, ?, ?, ?)", rows)
+            self._evict(conn)
+
+    def _evict(self, conn):
+        # Supprimer les documents les moins récemment utilisés jusqu'à repasser sous la taille maximale
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in conn.execute("SELECT key, size FROM documents ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM documents WHERE key = ?", evicted)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
 
 # Fonction pour nettoyer le texte HTML
 def clean_html(text):
@@ -24,26 +232,30 @@ def clean_html(text):
     else:
         return ""
 
-# Fonction pour extraire les mots et les n-grams
-def extract_words_ngrams(text, n):
-    tokens = word_tokenize(text)
-    pos_tokens = pos_tag(tokens)
-    
-    # Ignorer les mots vides, non alphabétiques, les verbes, les auxiliaires et les lettres seules
-    filtered_tokens = [token for token, pos in pos_tokens if token not in french_stopwords_list and token.isalpha() and pos not in ['VB', 'VBP', 'VBZ', 'VBD', 'VBG', 'VBN'] and token not in alphabet_list]
-    
-    if n > 1:
-        n_grams = ngrams(filtered_tokens, n)
-        return [' '.join(grams) for grams in n_grams]
-    else:
-        return filtered_tokens
+# Fonction pour construire les n-grams à partir d'une liste de tokens
+def ngrams(tokens, n):
+    return [' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+
+# Fonction pour compter les mots, bigrammes et trigrammes d'un document HTML
+def count_document(text, pipeline=default_pipeline):
+    return tuple(Counter(terms) for terms in pipeline.analyze(clean_html(text)))
 
-def process_text(text, num_words, num_bigrams, num_trigrams):
-    cleaned = clean_html(text)
-    words = extract_words_ngrams(cleaned, 1)
-    bigrams = extract_words_ngrams(cleaned, 2)
-    trigrams = extract_words_ngrams(cleaned, 3)
-    return words, bigrams, trigrams
+def count_documents(texts, pipeline=default_pipeline, cache=None, map_function=map):
+    """Compte les termes de chaque document ; seuls les documents absents du cache sont analysés."""
+    if cache is None:
+        return list(map_function(lambda text: count_document(text, pipeline), texts))
+    keys = [DocumentCache.key(text, pipeline) for text in texts]
+    known = cache.get_many(keys)
+    # Analyser une seule fois chaque nouveau contenu, même s'il apparaît plusieurs fois
+    missing = {key: text for key, text in zip(keys, texts) if key not in known}
+    computed = dict(zip(missing, map_function(lambda text: count_document(text, pipeline), missing.values())))
+    if computed:
+        cache.put_many(computed)
+        known.update(computed)
+    return [known[key] for key in keys]
+
+def show_cache_stats(cache):
+    st.info(f"Cache : {cache.hits} document(s) déjà analysé(s), {cache.misses} nouveau(x) — taux de succès {cache.hit_rate:.0%}")
 
 def main():
     st.title("MyTextGuru")
@@ -65,20 +277,25 @@ def main():
             num_words = st.number_input("Nombre de mots uniques à garder", min_value=1, value=50)
             num_bigrams = st.number_input("Nombre de bigrammes à garder", min_value=1, value=30)
             num_trigrams = st.number_input("Nombre de trigrammes à garder", min_value=1, value=30)
+            lemmatize = st.checkbox("Regrouper singuliers et pluriels (lemmatisation légère)", value=False)
+            pipeline = lemmatized_pipeline if lemmatize else default_pipeline
+            use_cache = st.checkbox("Utiliser le cache local des documents déjà analysés", value=True)
+            cache = DocumentCache() if use_cache else None
 
             # Utiliser ThreadPoolExecutor pour paralléliser le traitement
             with ThreadPoolExecutor(max_workers=4) as executor:
-                results = list(executor.map(lambda text: process_text(text, num_words, num_bigrams, num_trigrams), html_content))
-
-            # Extraire les résultats
-            words = [word for result in results for word in result[0]]
-            bigrams = [bigram for result in results for bigram in result[1]]
-            trigrams = [trigram for result in results for trigram in result[2]]
+                results = count_documents(html_content, pipeline, cache, executor.map)
+            if cache is not None:
+                show_cache_stats(cache)
 
             # Compter les occurrences
-            words_counter = Counter(words)
-            bigrams_counter = Counter(bigrams)
-            trigrams_counter = Counter(trigrams)
+            words_counter = Counter()
+            bigrams_counter = Counter()
+            trigrams_counter = Counter()
+            for words, bigrams, trigrams in results:
+                words_counter.update(words)
+                bigrams_counter.update(bigrams)
+                trigrams_counter.update(trigrams)
 
             # Prendre les mots/n-grams les plus courants
             most_common_words = [word for word, count in words_counter.most_common(num_words)]
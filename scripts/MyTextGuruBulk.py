@@ -1,60 +1,50 @@
+import os
+import numpy as np
 import pandas as pd
-import nltk
-from nltk import ngrams, pos_tag, word_tokenize
-from bs4 import BeautifulSoup
-from collections import Counter
-import string
 import streamlit as st
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO  # Import nécessaire pour gérer le buffer en mémoire
-
-# Téléchargement de la liste de stop words et de 'punkt'
-nltk.download('stopwords', quiet=True)
-nltk.download('punkt', quiet=True)
-nltk.download('averaged_perceptron_tagger', quiet=True)
-
-# Définir les listes de mots d'arrêt et de lettres de l'alphabet
-french_stopwords_list = nltk.corpus.stopwords.words('french')
-alphabet_list = list(string.ascii_lowercase)
-
-# Fonction pour nettoyer le texte HTML
-def clean_html(text):
-    if isinstance(text, str):
-        soup = BeautifulSoup(text, "html.parser")
-        return soup.get_text().lower()
-    else:
-        return ""
-
-# Fonction pour extraire les mots et les n-grams
-def extract_words_ngrams(text, n):
-    tokens = word_tokenize(text)
-    pos_tokens = pos_tag(tokens)
-    
-    # Ignorer les mots vides, non alphabétiques, les verbes, les auxiliaires et les lettres seules
-    filtered_tokens = [token for token, pos in pos_tokens if token not in french_stopwords_list and token.isalpha() and pos not in ['VB', 'VBP', 'VBZ', 'VBD', 'VBG', 'VBN'] and token not in alphabet_list]
-    
-    if n > 1:
-        n_grams = ngrams(filtered_tokens, n)
-        return [' '.join(grams) for grams in n_grams]
-    else:
-        return filtered_tokens
-
-def process_text(texts):
-    cleaned_texts = [clean_html(text) for text in texts]
-    all_words = []
-    all_bigrams = []
-    all_trigrams = []
-    
-    for cleaned in cleaned_texts:
-        words = extract_words_ngrams(cleaned, 1)
-        bigrams = extract_words_ngrams(cleaned, 2)
-        trigrams = extract_words_ngrams(cleaned, 3)
-        
-        all_words.extend(words)
-        all_bigrams.extend(bigrams)
-        all_trigrams.extend(trigrams)
-    
-    return all_words, all_bigrams, all_trigrams
+from scripts.MyTextGuru import DocumentCache, count_document, default_pipeline, lemmatized_pipeline, show_cache_stats
+
+# Nombre de documents envoyés à chaque tâche du pool de processus
+DOCUMENTS_PER_TASK = 200
+
+def count_batch(texts, pipeline=default_pipeline):
+    """Compte les mots, bigrammes et trigrammes d'un lot de documents (exécuté dans un processus du pool)."""
+    return [count_document(text, pipeline) for text in texts]
+
+def top_terms_per_group(group_counters, top_n):
+    """Retourne, pour chaque groupe (liste de compteurs par document), ses top_n termes joints par des virgules.
+
+    L'ordre est celui de Counter.most_common sur la concaténation des documents du groupe.
+    """
+    results = [''] * len(group_counters)
+    lengths = np.fromiter((sum(len(counter) for counter in counters) for counters in group_counters), dtype=np.int64, count=len(group_counters))
+    if lengths.sum() == 0:
+        return results
+
+    # Encodage entier des termes puis comptage creux groupe × terme : chaque couple (groupe, terme)
+    # unique est une case non nulle, avec son nombre d'occurrences et sa première position
+    terms = np.array([term for counters in group_counters for counter in counters for term in counter], dtype=object)
+    weights = np.fromiter((count for counters in group_counters for counter in counters for count in counter.values()), dtype=np.int64, count=len(terms))
+    codes, vocabulary = pd.factorize(terms)
+    group_ids = np.repeat(np.arange(len(group_counters), dtype=np.int64), lengths)
+    keys = group_ids * len(vocabulary) + codes
+    unique_keys, first_index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    counts = np.bincount(inverse.ravel(), weights=weights).astype(np.int64)
+    rows = unique_keys // len(vocabulary)
+    cols = unique_keys % len(vocabulary)
+
+    # Tri par groupe, fréquence décroissante puis première apparition, et rang dans chaque groupe
+    order = np.lexsort((first_index, -counts, rows))
+    rows, cols = rows[order], cols[order]
+    ranks = np.arange(len(rows)) - np.searchsorted(rows, rows, side='left')
+    keep = ranks < top_n
+
+    top_terms = pd.Series(vocabulary[cols[keep]]).groupby(rows[keep], sort=False).agg(', '.join)
+    for group_idx, joined in top_terms.items():
+        results[group_idx] = joined
+    return results
 
 def main():
     st.title("MyTextGuru")
@@ -80,54 +70,68 @@ def main():
             num_words = st.number_input("Nombre de mots uniques à garder", min_value=1, value=50)
             num_bigrams = st.number_input("Nombre de bigrammes à garder", min_value=1, value=30)
             num_trigrams = st.number_input("Nombre de trigrammes à garder", min_value=1, value=30)
+            lemmatize = st.checkbox("Regrouper singuliers et pluriels (lemmatisation légère)", value=False)
+            pipeline = lemmatized_pipeline if lemmatize else default_pipeline
+            use_cache = st.checkbox("Utiliser le cache local des documents déjà analysés", value=True)
 
             # Bouton pour lancer le traitement
             if st.button("Lancer l'analyse"):
                 # Afficher une barre de progression
                 progress_bar = st.progress(0)
                 grouped = df.groupby(id_column)
-                output_data = []
-
-                total_groups = len(grouped)
-                for idx, (group_id, group_data) in enumerate(grouped, start=1):
+                group_ids = []
+                group_contents = []
+                for group_id, group_data in grouped:
                     # Limiter le nombre de lignes par lot
-                    group_data = group_data.head(lines_per_batch)
-                    html_content = group_data[content_column].dropna().tolist()
-                    
-                    if not html_content:
-                        # Si le contenu HTML est vide, passer au groupe suivant
-                        output_data.append({
-                            'ID': group_id,
-                            'Mots Uniques': '',
-                            'Duos de Mots': '',
-                            'Trios de Mots': ''
-                        })
-                        progress_bar.progress(idx / total_groups)
-                        continue
-                    
-                    # Traiter le texte
-                    words, bigrams, trigrams = process_text(html_content)
-                    
-                    # Compter les occurrences
-                    words_counter = Counter(words)
-                    bigrams_counter = Counter(bigrams)
-                    trigrams_counter = Counter(trigrams)
-                    
-                    # Prendre les mots/n-grams les plus courants
-                    most_common_words = ', '.join([word for word, count in words_counter.most_common(num_words)])
-                    most_common_bigrams = ', '.join([bigram for bigram, count in bigrams_counter.most_common(num_bigrams)])
-                    most_common_trigrams = ', '.join([trigram for trigram, count in trigrams_counter.most_common(num_trigrams)])
-                    
-                    # Ajouter les résultats au tableau de sortie
-                    output_data.append({
+                    group_ids.append(group_id)
+                    group_contents.append(group_data[content_column].head(lines_per_batch).dropna().tolist())
+
+                # Ne traiter que les documents absents du cache, une seule fois chacun
+                texts = [text for contents in group_contents for text in contents]
+                keys = [DocumentCache.key(text, pipeline) for text in texts]
+                cache = DocumentCache() if use_cache else None
+                known = cache.get_many(keys) if cache is not None else {}
+                missing = {key: text for key, text in zip(keys, texts) if key not in known}
+
+                # Répartir les documents restants par paquets sur un pool de processus
+                missing_keys = list(missing)
+                batches = [missing_keys[i:i + DOCUMENTS_PER_TASK] for i in range(0, len(missing_keys), DOCUMENTS_PER_TASK)]
+                computed = {}
+                if batches:
+                    with ProcessPoolExecutor(max_workers=min(len(batches), os.cpu_count() or 1)) as executor:
+                        futures = [executor.submit(count_batch, [missing[key] for key in batch], pipeline) for batch in batches]
+                        for idx, (batch, future) in enumerate(zip(batches, futures), start=1):
+                            computed.update(zip(batch, future.result()))
+                            # Mettre à jour la barre de progression
+                            progress_bar.progress(idx / len(batches))
+                progress_bar.progress(1.0)
+                if cache is not None:
+                    if computed:
+                        cache.put_many(computed)
+                    show_cache_stats(cache)
+                known.update(computed)
+
+                # Regrouper les compteurs par groupe et extraire les top-N de chaque groupe
+                group_counters = []
+                position = 0
+                for contents in group_contents:
+                    group_counters.append([known[key] for key in keys[position:position + len(contents)]])
+                    position += len(contents)
+                results = zip(
+                    top_terms_per_group([[counters[0] for counters in group] for group in group_counters], num_words),
+                    top_terms_per_group([[counters[1] for counters in group] for group in group_counters], num_bigrams),
+                    top_terms_per_group([[counters[2] for counters in group] for group in group_counters], num_trigrams),
+                )
+
+                output_data = [
+                    {
                         'ID': group_id,
                         'Mots Uniques': most_common_words,
                         'Duos de Mots': most_common_bigrams,
                         'Trios de Mots': most_common_trigrams
-                    })
-                    
-                    # Mettre à jour la barre de progression
-                    progress_bar.progress(idx / total_groups)
+                    }
+                    for group_id, (most_common_words, most_common_bigrams, most_common_trigrams) in zip(group_ids, results)
+                ]
 
                 # Créer un DataFrame pour le fichier de sortie
                 output_df = pd.DataFrame(output_data)
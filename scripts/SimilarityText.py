@@ -1,9 +1,361 @@
 import streamlit as st
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+from scipy import sparse
 import numpy as np
 import openpyxl
+import xlsxwriter
+import os
+import re
+import glob
+import hashlib
+import time
+import uuid
+
+# Nombre maximal de cases de similarité calculées par bloc de lignes
+CASES_PAR_BLOC = 5_000_000
+
+# Nombre maximal de lignes de données par onglet Excel et taille des blocs de paires écrits
+LIGNES_MAX_ONGLET = 1_048_575
+PAIRES_PAR_BLOC = 100_000
+
+FICHIER_SORTIE = 'resultats_similarite.xlsx'
+
+# Fonction pour parcourir la similarité cosinus par blocs de produits matriciels creux
+def blocs_similarite(vecteur, seuil, top_k=None):
+    """Calcule la similarité cosinus par blocs de lignes sans jamais construire la matrice n×n dense.
+
+    Produit, pour chaque bloc, les paires (i, j, score) au-dessus du seuil (i < j), ou avec top_k les
+    k meilleurs voisins de chaque ligne (j != i), ainsi que la meilleure paire du triangle supérieur du bloc.
+    """
+    vecteur = normalize(vecteur).tocsr()
+    transposee = vecteur.T.tocsr()
+    n = vecteur.shape[0]
+    taille_bloc = max(1, CASES_PAR_BLOC // max(n, 1))
+    for debut in range(0, n, taille_bloc):
+        bloc = (vecteur[debut:debut + taille_bloc] @ transposee).tocoo()
+        lignes = bloc.row.astype(np.int64) + debut
+        colonnes = bloc.col.astype(np.int64)
+        scores = bloc.data
+
+        # Meilleure paire du triangle supérieur (la première dans l'ordre ligne/colonne en cas d'égalité)
+        superieur = colonnes > lignes
+        meilleure = None
+        if superieur.any():
+            score_max = scores[superieur].max()
+            candidats = np.flatnonzero(superieur & (scores == score_max))
+            premier = candidats[np.lexsort((colonnes[candidats], lignes[candidats]))[0]]
+            meilleure = (score_max, lignes[premier], colonnes[premier])
+
+        masque = (scores > seuil) & (superieur if top_k is None else colonnes != lignes)
+        lignes, colonnes, scores = lignes[masque], colonnes[masque], scores[masque]
+        if top_k is not None:
+            lignes, colonnes, scores = garder_top_k(lignes, colonnes, scores, top_k)
+        yield lignes, colonnes, scores, meilleure
+
+# Fonction pour garder les k meilleurs voisins de chaque ligne (triés par score décroissant)
+def garder_top_k(lignes, colonnes, scores, top_k):
+    ordre = np.lexsort((-scores, lignes))
+    lignes, colonnes, scores = lignes[ordre], colonnes[ordre], scores[ordre]
+    rangs = np.arange(len(lignes)) - np.searchsorted(lignes, lignes, side='left')
+    garder = rangs < top_k
+    return lignes[garder], colonnes[garder], scores[garder]
+
+# Fonction pour calculer les statistiques de similarité avec une mémoire en O(n·k)
+def analyser_similarite(vecteur, seuil, top_k=None, ecrire_paires=None):
+    """Retourne la similarité moyenne, la meilleure paire (score, i, j) et les index des textes retenus.
+
+    Les paires (i < j) au-dessus du seuil sont transmises bloc par bloc à ecrire_paires.
+    """
+    vecteur = normalize(vecteur).tocsr()
+    n = vecteur.shape[0]
+
+    # Moyenne du triangle supérieur : somme des produits scalaires de toutes les paires distinctes
+    somme = np.asarray(vecteur.sum(axis=0)).ravel()
+    total_paires = (somme @ somme - vecteur.multiply(vecteur).sum()) / 2
+    similarite_moyenne = total_paires / (n * (n - 1) / 2)
+
+    # Sans aucune paire non nulle, le maximum est 0 pour la première paire
+    meilleure = (0.0, 0, 1)
+    retenus = np.zeros(n, dtype=bool)
+    cles_voisins, scores_voisins = [], []
+    for lignes, colonnes, scores, meilleure_bloc in blocs_similarite(vecteur, seuil, top_k):
+        if meilleure_bloc is not None and meilleure_bloc[0] > meilleure[0]:
+            meilleure = meilleure_bloc
+        retenus[lignes] = True
+        retenus[colonnes] = True
+        if top_k is None:
+            if ecrire_paires is not None:
+                ecrire_paires(lignes, colonnes, scores)
+        else:
+            # Une paire peut figurer dans les voisins de ses deux textes : la ramener à i < j
+            cles_voisins.append(np.minimum(lignes, colonnes) * n + np.maximum(lignes, colonnes))
+            scores_voisins.append(scores)
+
+    if top_k is not None and ecrire_paires is not None and cles_voisins:
+        cles, premiers = np.unique(np.concatenate(cles_voisins), return_index=True)
+        scores = np.concatenate(scores_voisins)[premiers]
+        for debut in range(0, len(cles), PAIRES_PAR_BLOC):
+            bloc = cles[debut:debut + PAIRES_PAR_BLOC]
+            ecrire_paires(bloc // n, bloc % n, scores[debut:debut + PAIRES_PAR_BLOC])
+    return similarite_moyenne, meilleure, np.flatnonzero(retenus)
+
+# Classe pour écrire les paires par blocs, en mémoire constante, sur un ou plusieurs onglets
+class EcrivainPaires:
+    ENTETES = ('Index texte 1', 'Index texte 2', 'Similarité')
+
+    def __init__(self, classeur, nom='Paires'):
+        self.classeur = classeur
+        self.nom = nom
+        self.feuille = None
+        self.ligne = LIGNES_MAX_ONGLET + 1
+        self.nombre_onglets = 0
+        self.nombre = 0
+
+    def _nouvel_onglet(self):
+        self.nombre_onglets += 1
+        nom = self.nom if self.nombre_onglets == 1 else f"{self.nom} ({self.nombre_onglets})"
+        self.feuille = self.classeur.add_worksheet(nom)
+        self.feuille.write_row(0, 0, self.ENTETES)
+        self.ligne = 1
+
+    def ecrire(self, lignes, colonnes, scores):
+        if self.feuille is None:
+            self._nouvel_onglet()
+        self.nombre += len(lignes)
+        debut = 0
+        while debut < len(lignes):
+            if self.ligne > LIGNES_MAX_ONGLET:
+                self._nouvel_onglet()
+            fin = min(len(lignes), debut + LIGNES_MAX_ONGLET + 1 - self.ligne)
+            for i, j, score in zip(lignes[debut:fin].tolist(), colonnes[debut:fin].tolist(), scores[debut:fin].tolist()):
+                self.feuille.write_row(self.ligne, 0, (i, j, score))
+                self.ligne += 1
+            debut = fin
+
+# Fonction pour écrire un DataFrame ligne par ligne dans un onglet (compatible mode mémoire constante)
+def ecrire_dataframe(feuille, df):
+    feuille.write_row(0, 0, [str(colonne) for colonne in df.columns])
+    valeurs = df.astype(object).where(df.notna(), None)
+    for numero, ligne in enumerate(valeurs.itertuples(index=False, name=None), start=1):
+        feuille.write_row(numero, 0, ligne)
+
+# Dossier des index de similarité persistants (un sous-dossier par index)
+DOSSIER_INDEX = os.path.join(os.path.expanduser("~"), ".cache", "similaritytext", "index")
+INDEX_PAR_DEFAUT = "principal"
+NOM_INDEX = re.compile(r"^[\w-]+$")
+
+# Fonction pour résoudre le nom d'un index en sous-dossier de DOSSIER_INDEX (jamais en dehors)
+def dossier_index(nom):
+    if not NOM_INDEX.match(nom):
+        raise ValueError(f"Nom d'index invalide : {nom!r} (lettres, chiffres, '_' et '-' uniquement)")
+    return os.path.join(DOSSIER_INDEX, nom)
+
+# Classe pour un index de similarité persistant, enrichi par lots sans revectoriser l'historique
+class IndexSimilarite:
+    """Index TF-IDF incrémental stocké sur disque.
+
+    Les textes sont vectorisés avec un HashingVectorizer (sans état, même tokenisation que TfidfVectorizer) ;
+    chaque lot ajouté est un segment autonome (.npz : fréquences brutes, étiquettes et empreintes des textes), écrit dans un fichier
+    temporaire puis renommé atomiquement sous un nom unique. Deux ajouts concurrents créent donc deux segments
+    distincts, et un arrêt brutal ne laisse jamais de segment partiel. Les fréquences documentaires sont
+    recalculées au chargement, et l'IDF est appliqué au moment de la requête par une mise à l'échelle des colonnes.
+    Un texte dont le contenu est déjà indexé n'est pas ajouté une seconde fois.
+    """
+
+    NOMBRE_DIMENSIONS = 2 ** 20
+
+    def __init__(self, dossier=DOSSIER_INDEX):
+        self.dossier = dossier
+        self.vectoriseur = HashingVectorizer(n_features=self.NOMBRE_DIMENSIONS, alternate_sign=False, norm=None)
+        self.frequences = sparse.csr_matrix((0, self.NOMBRE_DIMENSIONS))
+        self.frequences_documentaires = np.zeros(self.NOMBRE_DIMENSIONS, dtype=np.int64)
+        self.etiquettes = []
+        self.empreintes = set()
+        self.segments = set()
+        os.makedirs(dossier, exist_ok=True)
+        self._charger()
+
+    def __len__(self):
+        return self.frequences.shape[0]
+
+    def _chemin(self, nom):
+        return os.path.join(self.dossier, nom)
+
+    @staticmethod
+    def empreinte(texte):
+        return hashlib.sha256(texte.encode("utf-8")).hexdigest()
+
+    def _charger(self):
+        """Charge les segments pas encore lus (y compris ceux ajoutés entre-temps par une autre session)."""
+        # Les noms de segments commencent par un horodatage : l'ordre alphabétique est l'ordre d'ajout
+        segments = [segment for segment in sorted(glob.glob(self._chemin("lot_*.npz"))) if segment not in self.segments]
+        if not segments:
+            return
+        matrices = [self.frequences]
+        for segment in segments:
+            with np.load(segment) as contenu:
+                matrices.append(sparse.csr_matrix((contenu["data"], contenu["indices"], contenu["indptr"]), shape=tuple(contenu["shape"])))
+                self.etiquettes.extend(contenu["etiquettes"].tolist())
+                if "empreintes" in contenu.files:
+                    self.empreintes.update(contenu["empreintes"].tolist())
+            self.segments.add(segment)
+        self.frequences = sparse.vstack(matrices).tocsr()
+        self.frequences_documentaires = self.frequences.getnnz(axis=0).astype(np.int64)
+
+    def _idf(self, frequences_documentaires, nombre_documents):
+        # Même lissage que TfidfVectorizer (smooth_idf=True)
+        return np.log((1 + nombre_documents) / (1 + frequences_documentaires)) + 1
+
+    def interroger(self, textes, seuil, top_k=10):
+        """Retourne les textes indexés les plus proches de chaque nouveau texte, au-dessus du seuil."""
+        requete = self.vectoriseur.transform(textes).tocsr()
+        if len(self) == 0 or requete.shape[0] == 0:
+            return pd.DataFrame(columns=['Index nouveau texte', 'Texte indexé', 'Similarité'])
+
+        # IDF calculé comme si le lot était déjà ajouté à l'index
+        frequences_documentaires = self.frequences_documentaires + requete.getnnz(axis=0)
+        idf = sparse.diags(self._idf(frequences_documentaires, len(self) + requete.shape[0]))
+        corpus_transpose = normalize(self.frequences @ idf).T.tocsr()
+        requete = normalize(requete @ idf).tocsr()
+
+        resultats = []
+        taille_bloc = max(1, CASES_PAR_BLOC // len(self))
+        for debut in range(0, requete.shape[0], taille_bloc):
+            bloc = (requete[debut:debut + taille_bloc] @ corpus_transpose).tocoo()
+            masque = bloc.data > seuil
+            lignes, colonnes, scores = garder_top_k(bloc.row[masque].astype(np.int64) + debut, bloc.col[masque].astype(np.int64), bloc.data[masque], top_k)
+            resultats.append((lignes, colonnes, scores))
+        lignes, colonnes, scores = (np.concatenate(valeurs) for valeurs in zip(*resultats))
+        return pd.DataFrame({
+            'Index nouveau texte': lignes,
+            'Texte indexé': np.array(self.etiquettes, dtype=object)[colonnes],
+            'Similarité': scores,
+        })
+
+    def ajouter(self, textes, etiquettes):
+        """Ajoute à l'index, sous forme d'un nouveau segment, les textes dont le contenu n'y est pas encore.
+
+        Retourne le nombre de textes ajoutés.
+        """
+        self._charger()
+        nouveaux = {}
+        for texte, etiquette in zip(textes, etiquettes):
+            empreinte = self.empreinte(texte)
+            if empreinte not in self.empreintes and empreinte not in nouveaux:
+                nouveaux[empreinte] = (texte, str(etiquette))
+        if not nouveaux:
+            return 0
+
+        textes, etiquettes = (list(valeurs) for valeurs in zip(*nouveaux.values()))
+        frequences = self.vectoriseur.transform(textes).tocsr()
+        nom = f"lot_{time.time_ns():020d}_{uuid.uuid4().hex}.npz"
+        temporaire = self._chemin(f".{nom}.tmp")
+        with open(temporaire, "wb") as fichier:
+            np.savez(fichier, data=frequences.data, indices=frequences.indices, indptr=frequences.indptr,
+                     shape=np.array(frequences.shape), etiquettes=np.array(etiquettes, dtype=str),
+                     empreintes=np.array(list(nouveaux), dtype=str))
+        os.replace(temporaire, self._chemin(nom))
+        self.segments.add(self._chemin(nom))
+        self.frequences = sparse.vstack([self.frequences, frequences]).tocsr()
+        self.frequences_documentaires += frequences.getnnz(axis=0)
+        self.etiquettes.extend(etiquettes)
+        self.empreintes.update(nouveaux)
+        return len(nouveaux)
+
+# Paramètres du mode quasi-doublons (MinHash/LSH)
+PREMIER_MINHASH = 4294967291  # plus grand nombre premier < 2^32
+MOTS = re.compile(r"\w+")
+
+# Fonction pour découper chaque texte en shingles de mots, encodés en entiers 32 bits
+def shingles_textes(textes, taille_shingle=3):
+    shingles = []
+    for texte in textes:
+        mots = MOTS.findall(texte.lower())
+        if not mots:
+            shingles.append(np.array([], dtype=np.uint64))
+            continue
+        fenetres = [' '.join(mots[i:i + taille_shingle]) for i in range(max(1, len(mots) - taille_shingle + 1))]
+        shingles.append(np.unique(np.fromiter((int.from_bytes(hashlib.blake2b(f.encode('utf-8'), digest_size=4).digest(), 'little') for f in fenetres), dtype=np.uint64, count=len(fenetres))))
+    return shingles
+
+# Fonction pour calculer les signatures MinHash de tous les textes
+def signatures_minhash(shingles, nombre_permutations=128, graine=42):
+    rng = np.random.default_rng(graine)
+    a = rng.integers(1, PREMIER_MINHASH, size=nombre_permutations, dtype=np.uint64)
+    b = rng.integers(0, PREMIER_MINHASH, size=nombre_permutations, dtype=np.uint64)
+    longueurs = np.array([len(s) for s in shingles], dtype=np.int64)
+    signatures = np.full((len(shingles), nombre_permutations), np.iinfo(np.uint64).max, dtype=np.uint64)
+    non_vides = np.flatnonzero(longueurs)
+    if len(non_vides) == 0:
+        return signatures
+    tous = np.concatenate([shingles[i] for i in non_vides])
+    debuts = np.concatenate(([0], np.cumsum(longueurs[non_vides])[:-1]))
+    for p in range(nombre_permutations):
+        hachages = (a[p] * tous + b[p]) % PREMIER_MINHASH
+        signatures[non_vides, p] = np.minimum.reduceat(hachages, debuts)
+    return signatures
+
+# Fonction pour choisir le découpage en bandes le plus proche du seuil de Jaccard visé
+def choisir_bandes(nombre_permutations, seuil):
+    diviseurs = [b for b in range(1, nombre_permutations + 1) if nombre_permutations % b == 0]
+    bandes = min(diviseurs, key=lambda b: abs((1 / b) ** (b / nombre_permutations) - seuil))
+    return bandes, nombre_permutations // bandes
+
+# Fonction pour générer les paires candidates partageant au moins une bande de signature
+def candidats_lsh(signatures, bandes, lignes_par_bande):
+    n = signatures.shape[0]
+    valides = np.flatnonzero(signatures[:, 0] != np.iinfo(np.uint64).max)
+    cles_paires = []
+    for bande in range(bandes):
+        tranche = np.ascontiguousarray(signatures[valides, bande * lignes_par_bande:(bande + 1) * lignes_par_bande])
+        _, seaux = np.unique(tranche.view(np.dtype((np.void, tranche.dtype.itemsize * lignes_par_bande))).ravel(), return_inverse=True)
+        seaux = seaux.ravel()
+
+        # Ne parcourir que les seaux contenant au moins deux textes
+        multiples = np.bincount(seaux)[seaux] >= 2
+        if not multiples.any():
+            continue
+        membres, seaux = valides[multiples], seaux[multiples]
+        ordre = np.argsort(seaux, kind='stable')
+        frontieres = np.flatnonzero(np.diff(seaux[ordre])) + 1
+        for groupe in np.split(membres[ordre], frontieres):
+            i, j = np.triu_indices(len(groupe), k=1)
+            cles_paires.append(groupe[i] * n + groupe[j])
+    if not cles_paires:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    cles = np.unique(np.concatenate(cles_paires))
+    return cles // n, cles % n
+
+# Fonction pour détecter les quasi-doublons : MinHash + LSH, puis vérification exacte des seuls candidats
+def quasi_doublons(textes, seuil, taille_shingle=3, nombre_permutations=128):
+    shingles = shingles_textes(textes, taille_shingle)
+    signatures = signatures_minhash(shingles, nombre_permutations)
+    bandes, lignes_par_bande = choisir_bandes(nombre_permutations, seuil)
+    gauche, droite = candidats_lsh(signatures, bandes, lignes_par_bande)
+
+    # Jaccard estimé : part des valeurs de signature identiques
+    jaccard_estime = (signatures[gauche] == signatures[droite]).mean(axis=1) if len(gauche) else np.array([])
+
+    # Jaccard exact via une matrice d'incidence texte × shingle
+    longueurs = np.array([len(s) for s in shingles], dtype=np.int64)
+    codes, colonnes = np.unique(np.concatenate(shingles) if len(shingles) else np.array([], dtype=np.uint64), return_inverse=True)
+    incidence = sparse.csr_matrix((np.ones(len(colonnes)), (np.repeat(np.arange(len(textes)), longueurs), colonnes.ravel())), shape=(len(textes), len(codes)))
+    intersection = np.zeros(len(gauche))
+    for debut in range(0, len(gauche), 100_000):
+        g, d = gauche[debut:debut + 100_000], droite[debut:debut + 100_000]
+        intersection[debut:debut + 100_000] = np.asarray(incidence[g].multiply(incidence[d]).sum(axis=1)).ravel()
+    union = longueurs[gauche] + longueurs[droite] - intersection
+    jaccard_exact = np.divide(intersection, union, out=np.zeros(len(gauche)), where=union > 0)
+
+    garder = jaccard_exact > seuil
+    return pd.DataFrame({
+        'Index texte 1': gauche[garder],
+        'Index texte 2': droite[garder],
+        'Jaccard estimé': jaccard_estime[garder] if len(gauche) else jaccard_estime,
+        'Jaccard exact': jaccard_exact[garder],
+    })
 
 # Fonction principale qui sera appelée depuis main.py
 def main():
@@ -24,54 +376,109 @@ def main():
         colonnes = df.columns.tolist()
         colonne_texte = st.selectbox("Sélectionnez la colonne contenant les textes à analyser", colonnes)
 
+        # Choix du mode d'analyse
+        mode = st.radio("Mode d'analyse", ("Similarité TF-IDF (seuil)", "Quasi-doublons (MinHash/LSH)", "Comparer à l'index persistant"))
+        if mode == "Quasi-doublons (MinHash/LSH)":
+            taille_shingle = st.number_input("Taille des shingles (nombre de mots)", min_value=1, value=3)
+            nombre_permutations = st.selectbox("Nombre de permutations MinHash", [64, 128, 256], index=1)
+        elif mode == "Comparer à l'index persistant":
+            nom_index = st.text_input(f"Nom de l'index (sous-dossier de {DOSSIER_INDEX})", value=INDEX_PAR_DEFAUT)
+            colonne_etiquette = st.selectbox("Colonne identifiant les textes (URL, titre...)", colonnes)
+            ajouter_index = st.checkbox("Ajouter ces textes à l'index après la comparaison", value=True)
+
         # Sélection du seuil de similarité
         seuil_similarite = st.selectbox("Sélectionnez un pourcentage de similarité", [10, 20, 30, 40, 50, 60, 70, 80, 90])
 
+        # Nombre de voisins gardés par texte : borne la mémoire sans changer les textes retenus
+        nombre_voisins = st.number_input("Nombre maximum de voisins similaires gardés par texte (0 = toutes les paires)", min_value=0, value=10)
+
         if st.button("Lancer l'analyse"):
             # Extraire les textes de la colonne sélectionnée
             textes = df[colonne_texte].astype(str).tolist()
 
-            # Calcul de la matrice de similarité cosinus
+            seuil_similarite_normalise = seuil_similarite / 100
+            if mode == "Comparer à l'index persistant":
+                try:
+                    index = IndexSimilarite(dossier_index(nom_index.strip()))
+                except ValueError as e:
+                    st.error(str(e))
+                    return
+                st.write(f"Index : {len(index)} textes déjà indexés")
+                correspondances = index.interroger(textes, seuil_similarite_normalise, int(nombre_voisins) or len(index) or 1)
+                generer_fichier_index(df, correspondances, seuil_similarite)
+                if ajouter_index:
+                    ajoutes = index.ajouter(textes, df[colonne_etiquette].tolist())
+                    st.write(f"{ajoutes} textes ajoutés à l'index ({len(textes) - ajoutes} déjà indexés ignorés, {len(index)} au total)")
+                return
+
+            if len(textes) < 2:
+                st.warning("Il faut au moins deux textes pour calculer une similarité.")
+                return
+
+            if mode == "Quasi-doublons (MinHash/LSH)":
+                paires = quasi_doublons(textes, seuil_similarite_normalise, int(taille_shingle), nombre_permutations)
+                generer_fichier_doublons(df, paires, seuil_similarite)
+                return
+
+            # Calcul de la similarité cosinus par blocs creux, en ne gardant que les paires au-dessus du seuil ;
+            # les paires sont écrites au fil des blocs dans un classeur en mémoire constante
             vecteur = TfidfVectorizer().fit_transform(textes)
-            matrice_similarite = cosine_similarity(vecteur, vecteur)
+            with xlsxwriter.Workbook(FICHIER_SORTIE, {'constant_memory': True, 'nan_inf_to_errors': True}) as classeur:
+                feuille_stats = classeur.add_worksheet('Statistiques')
+                paires = EcrivainPaires(classeur)
+                top_k = int(nombre_voisins) or None
+                similarite_moyenne, (similarite_max, i_max, j_max), resultat = analyser_similarite(vecteur, seuil_similarite_normalise, top_k, paires.ecrire)
 
-            # Trouver les deux textes les plus similaires
-            similarite_max = np.max(matrice_similarite[np.triu_indices(len(textes), k=1)])
-            indices_max = np.unravel_index(np.argmax(matrice_similarite, axis=None), matrice_similarite.shape)
-            texte_1 = textes[indices_max[0]]
-            texte_2 = textes[indices_max[1]]
+                # Les deux textes les plus similaires
+                texte_1 = textes[i_max]
+                texte_2 = textes[j_max]
 
-            # Calculer la similarité moyenne
-            similarite_moyenne = np.mean(matrice_similarite[np.triu_indices(len(textes), k=1)])
+                # Générer le fichier de sortie
+                generer_fichier_sortie(classeur, feuille_stats, df, similarite_moyenne, texte_1, texte_2, similarite_max, seuil_similarite, resultat)
 
-            # Filtrer les textes avec une similarité supérieure au seuil
-            seuil_similarite_normalise = seuil_similarite / 100
-            indices_textes_similaires = np.where(matrice_similarite > seuil_similarite_normalise)
-            resultat = set()
-            for i, j in zip(indices_textes_similaires[0], indices_textes_similaires[1]):
-                if i != j:
-                    resultat.add(i)
-                    resultat.add(j)
-
-            # Générer le fichier de sortie
-            generer_fichier_sortie(df, similarite_moyenne, texte_1, texte_2, similarite_max, seuil_similarite, resultat)
-
-
-# Fonction pour générer le fichier de sortie
-def generer_fichier_sortie(df, similarite_moyenne, texte_1, texte_2, taux_max, seuil, resultat):
-    # Créer un fichier Excel avec deux onglets
-    with pd.ExcelWriter('resultats_similarite.xlsx', engine='openpyxl') as writer:
-        # Onglet 1 : Statistiques de similarité
-        stats = pd.DataFrame({
-            'Taux de similarité moyen': [similarite_moyenne],
-            'Taux de similarité maximum': [taux_max],
-            'Texte 1': [texte_1],
-            'Texte 2': [texte_2]
-        })
-        stats.to_excel(writer, sheet_name='Statistiques', index=False)
-        
-        # Onglet 2 : Résultats filtrés
-        df_resultat = df.loc[resultat]
-        df_resultat.to_excel(writer, sheet_name=f'Textes > {seuil}%', index=False)
+            st.write(f"{paires.nombre} paires de textes au-dessus du seuil")
+            st.success(f"Le fichier a été généré avec succès : {FICHIER_SORTIE}")
+
+
+# Fonction pour générer les onglets de statistiques et de textes retenus
+def generer_fichier_sortie(classeur, feuille_stats, df, similarite_moyenne, texte_1, texte_2, taux_max, seuil, resultat):
+    # Onglet 1 : Statistiques de similarité
+    stats = pd.DataFrame({
+        'Taux de similarité moyen': [similarite_moyenne],
+        'Taux de similarité maximum': [taux_max],
+        'Texte 1': [texte_1],
+        'Texte 2': [texte_2]
+    })
+    ecrire_dataframe(feuille_stats, stats)
+
+    # Dernier onglet : Résultats filtrés
+    df_resultat = df.iloc[resultat]
+    ecrire_dataframe(classeur.add_worksheet(f'Textes > {seuil}%'), df_resultat)
+
+
+# Fonction pour générer le fichier de sortie du mode quasi-doublons
+def generer_fichier_doublons(df, paires, seuil):
+    with pd.ExcelWriter(FICHIER_SORTIE, engine='openpyxl') as writer:
+        # Onglet 1 : Paires de quasi-doublons, avec Jaccard estimé et exact
+        paires.to_excel(writer, sheet_name='Quasi-doublons', index=False)
+
+        # Onglet 2 : Textes concernés
+        resultat = np.unique(np.concatenate([paires['Index texte 1'].to_numpy(), paires['Index texte 2'].to_numpy()]))
+        df.iloc[resultat].to_excel(writer, sheet_name=f'Textes > {seuil}%', index=False)
+
+    st.write(f"{len(paires)} paires de quasi-doublons trouvées")
+    st.success(f"Le fichier a été généré avec succès : {FICHIER_SORTIE}")
+
+
+# Fonction pour générer le fichier de sortie de la comparaison à l'index persistant
+def generer_fichier_index(df, correspondances, seuil):
+    with pd.ExcelWriter(FICHIER_SORTIE, engine='openpyxl') as writer:
+        # Onglet 1 : Correspondances entre nouveaux textes et textes indexés
+        correspondances.to_excel(writer, sheet_name='Correspondances', index=False)
+
+        # Onglet 2 : Nouveaux textes proches d'un texte déjà indexé
+        resultat = np.unique(correspondances['Index nouveau texte'].to_numpy(dtype=np.int64))
+        df.iloc[resultat].to_excel(writer, sheet_name=f'Textes > {seuil}%', index=False)
 
-    st.success("Le fichier a été généré avec succès : resultats_similarite.xlsx")
+    st.write(f"{len(correspondances)} correspondances avec l'index au-dessus du seuil")
+    st.success(f"Le fichier a été généré avec succès : {FICHIER_SORTIE}")
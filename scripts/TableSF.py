@@ -1,73 +1,57 @@
 import streamlit as st
 import sqlite3
 import pandas as pd
-import tempfile
-import os
 
-def list_tables(uploaded_file):
-    temp_file_path = None
-    conn = None
+from scripts.CrawlDatabase import cached_upload_path, connect_read_only, quote_identifier
+
+# Les bases sont copiées une fois dans le cache partagé (CrawlDatabase), sous le nom de leur empreinte SHA-256,
+# avec leurs index : le chemin identifie un contenu figé, il sert donc de clé aux caches de connexion et de schéma.
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def open_database(db_path):
+    """Connexion en lecture seule partagée, une par base (le fichier en cache n'est plus modifié après l'import)."""
+    return connect_read_only(db_path, check_same_thread=False)
+
+@st.cache_data(show_spinner="Lecture du schéma de la base...", max_entries=4)
+def schema_catalog(db_path):
+    """Tables de la base avec leurs colonnes (nom, type) et leur nombre de lignes."""
+    conn = open_database(db_path)
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';")]
+    catalog = {}
+    for table in tables:
+        columns = [(col[1], col[2]) for col in conn.execute(f"PRAGMA table_info({quote_identifier(table)});")]
+        rows = conn.execute(f"SELECT COUNT(*) FROM {quote_identifier(table)}").fetchone()[0]
+        catalog[table] = {"columns": columns, "rows": rows}
+    return catalog
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def table_preview(db_path, table_name):
+    return pd.read_sql_query(f"SELECT * FROM {quote_identifier(table_name)} LIMIT 5", open_database(db_path))
+
+def list_tables(db_path):
     try:
-        # Sauvegarder le fichier uploadé dans un emplacement temporaire
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.dbseospider') as temp_file:
-            temp_file.write(uploaded_file.getbuffer())
-            temp_file_path = temp_file.name
-
-        # Connexion à la base de données SQLite
-        conn = sqlite3.connect(temp_file_path)
-        cursor = conn.cursor()
-
-        # Lister toutes les tables dans la base de données
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';")
-        tables = [row[0] for row in cursor.fetchall()]
-
-        return tables
-
+        return schema_catalog(db_path)
     except sqlite3.Error as e:
         st.error(f"Erreur SQLite : {e}")
     except Exception as e:
         st.error(f"Une erreur inattendue s'est produite : {e}")
-    finally:
-        if conn:
-            conn.close()
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
-    
-    return []
-
-def display_table_info(uploaded_file, table_name):
-    temp_file_path = None
-    conn = None
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.dbseospider') as temp_file:
-            temp_file.write(uploaded_file.getbuffer())
-            temp_file_path = temp_file.name
 
-        conn = sqlite3.connect(temp_file_path)
-        
-        # Obtenir les informations sur les colonnes
-        cursor = conn.cursor()
-        cursor.execute(f"PRAGMA table_info({table_name});")
-        columns_info = cursor.fetchall()
+    return {}
 
-        st.write(f"Colonnes de la table '{table_name}':")
-        for col in columns_info:
-            st.write(f"- {col[1]} ({col[2]})")
+def display_table_info(db_path, table_name, table_info):
+    try:
+        st.write(f"Colonnes de la table '{table_name}' ({table_info['rows']} lignes) :")
+        for name, column_type in table_info["columns"]:
+            st.write(f"- {name} ({column_type})")
 
         # Afficher un aperçu des données
-        df = pd.read_sql_query(f"SELECT * FROM {table_name} LIMIT 5", conn)
         st.write("Aperçu des données:")
-        st.dataframe(df)
+        st.dataframe(table_preview(db_path, table_name))
 
     except sqlite3.Error as e:
         st.error(f"Erreur SQLite lors de l'affichage des informations de la table : {e}")
     except Exception as e:
         st.error(f"Une erreur inattendue s'est produite lors de l'affichage des informations de la table : {e}")
-    finally:
-        if conn:
-            conn.close()
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
 
 def main():
     st.title("Analyseur de Fichier Screaming Frog")
@@ -75,16 +59,19 @@ def main():
     uploaded_file = st.file_uploader("Téléchargez votre fichier .dbseospider", type="dbseospider")
 
     if uploaded_file is not None:
-        tables = list_tables(uploaded_file)
+        db_path = cached_upload_path(uploaded_file)
+        if db_path is None:
+            return
+        tables = list_tables(db_path)
 
         if tables:
             st.header("Tables Disponibles")
-            for table in tables:
-                st.write(f"- {table}")
+            for table, table_info in tables.items():
+                st.write(f"- {table} ({table_info['rows']} lignes)")
 
-            selected_table = st.selectbox("Sélectionnez une table pour voir plus d'informations", tables)
+            selected_table = st.selectbox("Sélectionnez une table pour voir plus d'informations", list(tables))
             if selected_table:
-                display_table_info(uploaded_file, selected_table)
+                display_table_info(db_path, selected_table, tables[selected_table])
         else:
             st.warning("Aucune table trouvée dans le fichier ou une erreur s'est produite.")
 
@@ -0,0 +1,50 @@
+import io
+
+import pandas as pd
+import pytest
+
+import scripts.AuditSemantique as audit
+
+
+def site_frame(site, keywords, urls):
+    return pd.DataFrame({
+        'Mot-clé': pd.Categorical(keywords),
+        'Volume': [100.0] * len(keywords),
+        'Position': pd.array([1] * len(keywords), dtype='int32'),
+        'URL': pd.Categorical(urls),
+        audit.SITE_COLUMN: site,
+    })
+
+
+def test_save_snapshot_keeps_only_the_site_categories(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit, "SNAPSHOT_DIR", str(tmp_path))
+    long_data = audit.concat_compact([
+        site_frame("a.fr", ["chaussure", "basket"], ["https://a.fr/1", "https://a.fr/2"]),
+        site_frame("b.fr", ["sandale", "botte", "basket"], ["https://b.fr/1", "https://b.fr/2", "https://b.fr/3"]),
+    ])
+    site_data = long_data[long_data[audit.SITE_COLUMN] == "a.fr"]
+
+    audit.save_snapshot(site_data, "a.fr", "2026-10")
+    snapshot = pd.read_parquet(audit.snapshot_path("a.fr", "2026-10"))
+
+    assert sorted(snapshot['Mot-clé'].cat.categories) == ["basket", "chaussure"]
+    assert sorted(snapshot['URL'].cat.categories) == ["https://a.fr/1", "https://a.fr/2"]
+    assert snapshot['Mot-clé'].astype(str).tolist() == site_data['Mot-clé'].astype(str).tolist()
+
+
+class Export(io.BytesIO):
+    name = "export.csv"
+
+
+def test_pyarrow_reads_csv_in_batches_like_pandas(monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(audit, "PYARROW_BLOCK_SIZE", 4096)
+    rows = "".join(f"mot {i}\t{i * 10}\t{i % 100}\thttps://a.fr/{i}\t\n" for i in range(2000))
+    data = ("Keyword\tVolume\tPosition\tURL\tVide\n" + rows).encode("utf-16")
+    usecols = ["Keyword", "Position", "URL", "Vide"]
+
+    batches = list(audit.read_export(Export(data), usecols=usecols, chunksize=audit.CHUNK_SIZE, use_pyarrow=True))
+    expected = pd.concat(audit.read_export(Export(data), usecols=usecols, chunksize=audit.CHUNK_SIZE), ignore_index=True)
+
+    assert len(batches) > 1
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True)[expected.columns], expected, check_dtype=False)
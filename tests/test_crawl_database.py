@@ -0,0 +1,45 @@
+import io
+import os
+import sqlite3
+import time
+
+import scripts.CrawlDatabase as crawl_db
+
+
+class Upload(io.BytesIO):
+    """Fichier importé minimal (interface de st.runtime.uploaded_file_manager.UploadedFile)."""
+
+    name = "crawl.dbseospider"
+
+
+def test_invalid_upload_reports_an_error_and_leaves_no_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(crawl_db, "UPLOAD_CACHE_DIR", str(tmp_path))
+    errors = []
+    monkeypatch.setattr(crawl_db.st, "error", errors.append)
+
+    assert crawl_db.ensure_upload(Upload(b"ceci n'est pas une base SQLite" * 100)) is None
+    assert len(errors) == 1
+    assert os.listdir(tmp_path) == []
+
+
+def test_store_upload_evicts_stale_temp_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(crawl_db, "UPLOAD_CACHE_DIR", str(tmp_path))
+    stale = tmp_path / "abc.dbseospider.1.2.tmp"
+    fresh = tmp_path / "def.dbseospider.3.4.tmp"
+    stale.write_bytes(b"")
+    fresh.write_bytes(b"")
+    old = time.time() - crawl_db.UPLOAD_CACHE_MIN_AGE - 60
+    os.utime(stale, (old, old))
+
+    source = tmp_path / "source.sqlite"
+    with sqlite3.connect(source) as conn:
+        conn.execute('CREATE TABLE Internal ("Address" TEXT)')
+    conn.close()
+    path = crawl_db.ensure_upload(Upload(source.read_bytes()))
+    source.unlink()
+
+    assert not stale.exists()
+    assert fresh.exists()
+    with crawl_db.connect_read_only(path) as conn:
+        assert conn.execute("SELECT name FROM sqlite_master WHERE type='index'").fetchall() == [("audit_Internal_Address",)]
+    conn.close()
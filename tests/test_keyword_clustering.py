@@ -0,0 +1,73 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+from openai import OpenAI
+
+from scripts.KeywordClustering import EmbeddingCache, get_embeddings
+
+
+def stub_vector(text):
+    """Vecteur déterministe propre à chaque texte, pour vérifier le réordonnancement."""
+    return [float(len(text)), float(sum(map(ord, text)) % 997), 1.0]
+
+
+class StubEmbeddingsHandler(BaseHTTPRequestHandler):
+    """Serveur /embeddings minimal : répond avec les éléments dans l'ordre inverse (seul `index` fait foi)."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.batches.append(body["input"])
+        data = [{"object": "embedding", "index": index, "embedding": stub_vector(text)} for index, text in enumerate(body["input"])]
+        payload = json.dumps({
+            "object": "list",
+            "data": data[::-1],
+            "model": body["model"],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubEmbeddingsHandler)
+    server.batches = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stub_client(stub_server):
+    return OpenAI(api_key="test", base_url=f"http://127.0.0.1:{stub_server.server_address[1]}/v1", max_retries=0)
+
+
+def test_get_embeddings_batches_remaps_and_caches(stub_server, stub_client, tmp_path):
+    keywords = [f"mot clé {i}" for i in range(23)] + ["mot clé 3", "mot clé 7"]
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+    expected = np.array([stub_vector(keyword) for keyword in keywords], dtype=np.float32)
+
+    # 23 mots-clés distincts par lots de 10 : 3 requêtes, doublons envoyés une seule fois
+    embeddings = get_embeddings(keywords, cache=cache, batch_size=10, embedding_client=stub_client)
+    assert [len(batch) for batch in stub_server.batches] == [10, 10, 3]
+    assert sum(stub_server.batches, []) == list(dict.fromkeys(keywords))
+
+    # Réponses servies à l'envers : chaque vecteur doit revenir à son mot-clé grâce à `index`
+    np.testing.assert_array_equal(embeddings, expected)
+
+    # Deuxième passage : tout vient du cache SQLite, aucune requête
+    stub_server.batches.clear()
+    again = get_embeddings(keywords, cache=EmbeddingCache(cache.path), batch_size=10, embedding_client=stub_client)
+    assert stub_server.batches == []
+    np.testing.assert_array_equal(again, expected)
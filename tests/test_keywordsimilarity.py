@@ -0,0 +1,30 @@
+import os
+import time
+
+import numpy as np
+from scipy import sparse
+
+import scripts.Keywordsimilarity as kwsim
+
+
+def test_overlap_graph_round_trip_and_eviction(tmp_path, monkeypatch):
+    monkeypatch.setattr(kwsim, "OVERLAP_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(kwsim, "OVERLAP_CACHE_MAX_FILES", 3)
+    incidence = sparse.csr_matrix(np.array([[1, 1, 0], [0, 1, 1]], dtype=np.int8))
+    pairs_i, pairs_j, overlaps = np.array([0]), np.array([1]), np.array([1])
+
+    kwsim.save_overlap_graph("graphe", ["chaussure", "basket"], incidence, pairs_i, pairs_j, overlaps)
+    keywords, loaded, *edges = kwsim.load_overlap_graph.__wrapped__("graphe")
+    assert keywords == ["chaussure", "basket"]
+    assert (loaded != incidence).nnz == 0
+    assert [edge.tolist() for edge in edges] == [[0], [1], [1]]
+    assert os.listdir(tmp_path) == ["graphe.npz"]
+
+    # Graphes et fichiers temporaires anciens : seuls les plus récents au-delà du délai minimum sont gardés
+    old = time.time() - kwsim.OVERLAP_CACHE_MIN_AGE - 60
+    for name in ["ancien1.npz", "ancien2.npz", "interrompu.npz.1.2.tmp"]:
+        (tmp_path / name).write_bytes(b"")
+        os.utime(tmp_path / name, (old, old))
+    os.utime(tmp_path / "ancien1.npz", (old + 30, old + 30))
+    kwsim.save_overlap_graph("nouveau", ["a"], incidence[:1], pairs_i[:0], pairs_j[:0], overlaps[:0])
+    assert sorted(os.listdir(tmp_path)) == ["ancien1.npz", "graphe.npz", "nouveau.npz"]
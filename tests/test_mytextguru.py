@@ -0,0 +1,30 @@
+import pytest
+
+from scripts.MyTextGuru import is_french_verb, singularize_french
+
+
+@pytest.mark.parametrize("word", ["permis", "vue", "prise", "reste", "fait", "power", "poker", "router", "pouvoir", "savoir"])
+def test_nouns_are_not_filtered_as_verbs(word):
+    assert not is_french_verb(word)
+
+
+@pytest.mark.parametrize("word", ["manger", "acheter", "marcher", "pourrait", "faites", "peuvent", "trouvait"])
+def test_verb_forms_are_filtered(word):
+    assert is_french_verb(word)
+
+
+@pytest.mark.parametrize("plural, singular", [
+    ("bateaux", "bateau"), ("châteaux", "château"), ("nouveaux", "nouveau"), ("chevaux", "cheval"),
+    ("journaux", "journal"), ("travaux", "travail"), ("jeux", "jeu"), ("bijoux", "bijou"),
+    ("pages", "page"), ("sites", "site"), ("chaussures", "chaussure"),
+])
+def test_singularize_plurals(plural, singular):
+    assert singularize_french(plural) == singular
+
+
+@pytest.mark.parametrize("word", [
+    "gros", "héros", "hélas", "fils", "temps", "très", "toujours", "corps", "après", "heureux", "vieux",
+    "prix", "repas", "succès", "bus", "avis",
+])
+def test_singularize_keeps_invariable_words(word):
+    assert singularize_french(word) == word
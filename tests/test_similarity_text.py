@@ -0,0 +1,18 @@
+import scripts.SimilarityText as similarity
+
+
+def test_index_skips_texts_already_indexed(tmp_path):
+    dossier = str(tmp_path / "index")
+    index = similarity.IndexSimilarite(dossier)
+    assert index.ajouter(["le chat noir dort", "un chien court", "le chat noir dort"], ["u1", "u2", "u3"]) == 2
+
+    # Même fichier relancé, depuis une autre instance : rien n'est ajouté
+    autre = similarity.IndexSimilarite(dossier)
+    assert autre.ajouter(["le chat noir dort", "un chien court"], ["u1", "u2"]) == 0
+    assert autre.ajouter(["un oiseau chante"], ["u4"]) == 1
+
+    # L'instance d'origine voit l'ajout concurrent avant de dédupliquer
+    assert index.ajouter(["un oiseau chante"], ["u4"]) == 0
+    rechargé = similarity.IndexSimilarite(dossier)
+    assert len(rechargé) == 3
+    assert rechargé.etiquettes == ["u1", "u2", "u4"]